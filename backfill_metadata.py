@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Media Metadata Backfill Script for CI-NDA
+Probes stored videos and audio (mp4, mov, webm, mp3, wav) that have no
+duration/resolution metadata yet and saves it for the listings
+"""
+
+import argparse
+import sys
+import mysql.connector
+from mysql.connector import Error
+
+from server import DB_CONFIG, MEDIA_PROBES, store_media_metadata
+
+def pending_media(cursor, force):
+    """(hash, public name) of stored videos and audio without metadata (all of them with force)"""
+    placeholders = ', '.join(['%s'] * len(MEDIA_PROBES))
+    condition = "" if force else "AND b.metadata IS NULL"
+    cursor.execute(f"""
+    SELECT b.hash, MIN(u.public_name) FROM media_blobs b
+    JOIN media_uploads u ON u.blob_hash = b.hash
+    WHERE SUBSTRING_INDEX(u.public_name, '.', -1) IN ({placeholders}) {condition}
+    GROUP BY b.hash
+    """, sorted(MEDIA_PROBES))
+    return cursor.fetchall()
+
+def main():
+    parser = argparse.ArgumentParser(description='Probe media files without metadata')
+    parser.add_argument('--force', action='store_true', help='Probe files that already have metadata')
+    parser.add_argument('--dry-run', action='store_true', help='Only report how many files are pending')
+    args = parser.parse_args()
+
+    print("🎞️  CI-NDA Media Metadata Backfill")
+    print("=" * 40)
+
+    try:
+        connection = mysql.connector.connect(**DB_CONFIG)
+    except Error as e:
+        print(f"❌ Error connecting to database: {e}")
+        sys.exit(1)
+
+    try:
+        cursor = connection.cursor()
+        pending = pending_media(cursor, args.force)
+        cursor.close()
+        print(f"📋 {len(pending)} files pending")
+        if args.dry_run:
+            return
+
+        probed = 0
+        unreadable = 0
+        for done, (digest, public_name) in enumerate(pending, 1):
+            try:
+                metadata = store_media_metadata(connection, digest, public_name, overwrite=args.force)
+            except OSError as e:
+                print(f"\n⚠️  {digest}: {e}")
+                continue
+            probed += 1
+            if not metadata:
+                unreadable += 1
+            print(f"\r  Probed {done}/{len(pending)} files", end='', flush=True)
+        print()
+        print(f"✅ Probed {probed} files")
+        if unreadable:
+            print(f"⚠️  {unreadable} files had headers that couldn't be parsed")
+    except Error as e:
+        print(f"❌ Error probing media: {e}")
+        connection.rollback()
+        sys.exit(1)
+    finally:
+        connection.close()
+
+if __name__ == '__main__':
+    main()
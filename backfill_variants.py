@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Image Variant Backfill Script for CI-NDA
+Generates the resized WebP/JPEG variants behind the listing srcset maps for
+stored images that don't have them yet (uploaded before the pipeline existed,
+dropped because its queue was full, or failed every retry)
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import mysql.connector
+from mysql.connector import Error
+
+from server import (DB_CONFIG, Image, IMAGE_EXTENSIONS, MEDIA_VARIANT_WIDTHS, MEDIA_VARIANT_QUALITY,
+                    blob_path, render_variants, record_variants)
+
+def pending_images(cursor, force):
+    """Hashes of stored images without variants (all stored images with force)"""
+    placeholders = ', '.join(['%s'] * len(IMAGE_EXTENSIONS))
+    condition = "" if force else "AND b.variants IS NULL"
+    cursor.execute(f"""
+    SELECT DISTINCT b.hash FROM media_blobs b
+    JOIN media_uploads u ON u.blob_hash = b.hash
+    WHERE SUBSTRING_INDEX(u.public_name, '.', -1) IN ({placeholders}) {condition}
+    """, sorted(IMAGE_EXTENSIONS))
+    return [row[0] for row in cursor.fetchall()]
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate missing image variants')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--force', action='store_true', help='Regenerate variants that already exist')
+    parser.add_argument('--dry-run', action='store_true', help='Only report how many images are pending')
+    args = parser.parse_args()
+
+    print("🖼️  CI-NDA Image Variant Backfill")
+    print("=" * 40)
+
+    if Image is None:
+        print("❌ Pillow is not installed (pip install Pillow)")
+        sys.exit(1)
+
+    try:
+        connection = mysql.connector.connect(**DB_CONFIG)
+    except Error as e:
+        print(f"❌ Error connecting to database: {e}")
+        sys.exit(1)
+
+    try:
+        cursor = connection.cursor()
+        digests = pending_images(cursor, args.force)
+        cursor.close()
+        print(f"📋 {len(digests)} images pending (widths {', '.join(map(str, MEDIA_VARIANT_WIDTHS))})")
+        if args.dry_run or not digests:
+            return
+
+        generated = 0
+        failed = 0
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            futures = {
+                executor.submit(render_variants, blob_path(digest), digest,
+                                MEDIA_VARIANT_WIDTHS, MEDIA_VARIANT_QUALITY): digest
+                for digest in digests
+            }
+            for future in as_completed(futures):
+                digest = futures[future]
+                try:
+                    variants = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"\n⚠️  {digest}: {e}")
+                    continue
+                record_variants(connection, digest, variants)
+                generated += 1
+                print(f"\r  Processed {generated + failed}/{len(digests)} images", end='', flush=True)
+        print()
+        print(f"✅ Generated variants for {generated} images")
+        if failed:
+            print(f"⚠️  {failed} images failed; they stay pending for the next run")
+    except Error as e:
+        print(f"❌ Error backfilling variants: {e}")
+        connection.rollback()
+        sys.exit(1)
+    finally:
+        connection.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Password hashing benchmark for CI-NDA
+Measures login (bcrypt verify) throughput of the worker pool for 1..N workers
+"""
+
+import os
+import sys
+import time
+import threading
+
+from server import PasswordHasher, PasswordHasherBusy, BCRYPT_ROUNDS
+
+# Benchmark configuration
+CHECKS_PER_RUN = int(os.getenv('BENCH_CHECKS', '64'))
+CLIENTS_PER_WORKER = 4
+
+def run(workers, rounds, hashed):
+    """Verify CHECKS_PER_RUN passwords from concurrent clients and return checks/sec"""
+    hasher = PasswordHasher(workers=workers, max_queue=workers * CLIENTS_PER_WORKER, rounds=rounds)
+    clients = workers * CLIENTS_PER_WORKER
+    remaining = [CHECKS_PER_RUN]
+    lock = threading.Lock()
+    rejected = [0]
+
+    def client():
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            try:
+                hasher.check('benchmark-password', hashed)
+            except PasswordHasherBusy:
+                with lock:
+                    rejected[0] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return CHECKS_PER_RUN / elapsed, rejected[0]
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else BCRYPT_ROUNDS
+    cores = os.cpu_count() or 1
+
+    print("🔐 CI-NDA bcrypt Benchmark")
+    print("=" * 40)
+    print(f"Cost factor: {rounds}, cores: {cores}, checks per run: {CHECKS_PER_RUN}")
+
+    hashed = PasswordHasher(rounds=rounds).hash('benchmark-password')
+
+    baseline = None
+    for workers in range(1, cores + 1):
+        throughput, rejected = run(workers, rounds, hashed)
+        baseline = baseline or throughput
+        print(f"  {workers:>2} workers: {throughput:8.1f} logins/sec "
+              f"(x{throughput / baseline:.2f}, {rejected} rejected)")
+
+if __name__ == '__main__':
+    main()
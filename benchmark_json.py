@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+JSON serialization benchmark for CI-NDA
+Encodes realistic get_portfolios and get_courses pages with Flask's stdlib
+provider and with the orjson-backed FastJSONProvider
+"""
+
+import datetime
+import decimal
+import random
+import sys
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from server import app, orjson, FastJSONProvider
+
+ITERATIONS = 200
+
+WORDS = """
+film documentary editing cinematography directing lighting sound design screenplay
+camera lens color grading festival premiere trailer short feature indie studio
+""".split()
+
+def text(words):
+    return ' '.join(random.choice(WORDS) for _ in range(words))
+
+def portfolios_page(size):
+    """Same shape as a get_portfolios response"""
+    now = datetime.datetime.now()
+    portfolios = []
+    for i in range(size):
+        portfolios.append({
+            'id': i + 1,
+            'user_id': random.randint(1, 500),
+            'title': text(5).title(),
+            'description': text(60),
+            'thumbnail': f'/uploads/thumb_{i}.jpg',
+            'video_url': f'/uploads/video_{i}.mp4',
+            'tags': random.sample(WORDS, 4),
+            'category': 'Short Films',
+            'views': random.randint(0, 100000),
+            'likesCount': random.randint(0, 5000),
+            'commentsCount': random.randint(0, 500),
+            'user': {'name': text(2).title(), 'avatar': f'/uploads/avatar_{i}.jpg'},
+            'created_at': (now - datetime.timedelta(hours=i)).isoformat(),
+            'updated_at': now - datetime.timedelta(minutes=i)
+        })
+    return {'success': True, 'portfolios': portfolios,
+            'pagination': {'currentPage': 1, 'hasPrev': False, 'hasNext': True}}
+
+def courses_page(size, lessons):
+    """Same shape as a get_courses response"""
+    now = datetime.datetime.now()
+    courses = []
+    for i in range(size):
+        courses.append({
+            'id': i + 1,
+            'title': text(4).title(),
+            'category': 'CINEMATOGRAPHY',
+            'instructor': {'name': text(2).title(), 'avatar': '/uploads/instructor.jpg', 'bio': text(30)},
+            'description': text(80),
+            'image': f'/uploads/course_{i}.jpg',
+            'duration': '6 weeks',
+            'level': 'Beginner',
+            'price': decimal.Decimal('49.99'),
+            'lessons': [{'id': n + 1, 'title': text(4).title(), 'duration': '12:30',
+                         'description': text(25)} for n in range(lessons)],
+            'enrolledStudents': random.randint(0, 10000),
+            'is_published': 1,
+            'created_at': now - datetime.timedelta(days=i),
+            'updated_at': now
+        })
+    return {'success': True, 'courses': courses,
+            'pagination': {'currentPage': 1, 'hasPrev': False, 'hasNext': True}}
+
+def timed(provider, payload):
+    """Average milliseconds to build a JSON response for the payload"""
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        provider.response(payload).get_data()
+    return (time.perf_counter() - started) * 1000 / ITERATIONS
+
+def main():
+    if orjson is None:
+        print("❌ orjson is not installed (pip install orjson)")
+        sys.exit(1)
+
+    print("📦 CI-NDA JSON Serialization Benchmark")
+    print("=" * 40)
+
+    app.debug = False
+    stdlib = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+    payloads = [
+        ('portfolios x100', portfolios_page(100)),
+        ('courses x20, 30 lessons', courses_page(20, 30)),
+        ('courses x100, 10 lessons', courses_page(100, 10)),
+    ]
+
+    print(f"\n{'payload':<28}{'stdlib':>10}{'orjson':>10}{'speedup':>10}")
+    for name, payload in payloads:
+        # Both providers must produce the same document
+        assert stdlib.loads(stdlib.response(payload).get_data()) == fast.loads(fast.response(payload).get_data())
+        stdlib_ms = timed(stdlib, payload)
+        fast_ms = timed(fast, payload)
+        print(f"{name:<28}{stdlib_ms:>8.2f}ms{fast_ms:>8.2f}ms{stdlib_ms / fast_ms:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
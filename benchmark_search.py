@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Search benchmark for CI-NDA
+Seeds a scratch table with synthetic course text and compares leading-wildcard
+LIKE scans against FULLTEXT MATCH ... AGAINST (natural language and boolean modes).
+With --index, builds the in-process BM25 index (SEARCH_BACKEND=memory) over a
+synthetic corpus instead and checks its query latency against --target-ms
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+import mysql.connector
+from mysql.connector import Error
+
+from server import DB_CONFIG, InvertedIndex, ReadWriteLock
+
+BENCH_TABLE = 'search_benchmark'
+
+VOCABULARY = """
+film documentary editing cinematography directing lighting sound design screenplay
+camera lens color grading festival premiere trailer short feature indie studio
+producer actor casting storyboard montage narrative experimental animation drama
+comedy thriller horror music video commercial workshop masterclass mentor grant
+""".split()
+
+QUERIES = ['documentary', 'editing', 'color grading', 'festival premiere', 'storyboard']
+
+def random_text(words):
+    return ' '.join(random.choice(VOCABULARY) for _ in range(words))
+
+def zipf_vocabulary(size):
+    """VOCABULARY followed by made-up words, with Zipf cumulative weights (head words most common)"""
+    words = list(VOCABULARY)
+    while len(words) < size:
+        words.append(f"{random.choice(VOCABULARY)[:5]}{len(words)}")
+    cumulative = []
+    total = 0.0
+    for rank in range(1, len(words) + 1):
+        total += 1 / rank
+        cumulative.append(total)
+    return words, cumulative
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def benchmark_index(args):
+    """Build an InvertedIndex over synthetic documents and time queries against it"""
+    words, cumulative = zipf_vocabulary(args.vocabulary)
+    index = InvertedIndex(lambda row: f"{row['title']} {row['description']}")
+    lock = ReadWriteLock()
+
+    started = time.perf_counter()
+    for doc in range(args.docs):
+        title = ' '.join(random.choices(words, cum_weights=cumulative, k=random.randint(2, 8)))
+        description = ' '.join(random.choices(words, cum_weights=cumulative, k=random.randint(10, 80)))
+        with lock.write():
+            index.add(doc, {'id': doc, 'title': title, 'description': description})
+        if doc % 10000 == 0:
+            print(f"\r  Indexed {doc}/{args.docs} documents", end='', flush=True)
+    print(f"\r  Indexed {args.docs} documents in {time.perf_counter() - started:.1f}s")
+
+    # Common, mid-frequency and rare terms, alone and in pairs
+    queries = list(QUERIES)
+    while len(queries) < args.queries:
+        terms = random.choices(words, cum_weights=cumulative, k=random.choice((1, 2)))
+        queries.append(' '.join(terms))
+
+    def run():
+        samples = []
+        for query in queries:
+            query_started = time.perf_counter()
+            with lock.read():
+                index.search(query, args.limit)
+            samples.append((time.perf_counter() - query_started) * 1000)
+        return samples
+
+    cold = run()
+    warm = []
+    for _ in range(args.repeat):
+        warm.extend(run())
+
+    print(f"\n{'':<8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for label, samples in (('cold', cold), ('warm', warm)):
+        print(f"{label:<8}" + ''.join(f"{value:>8.3f}ms" for value in (
+            statistics.median(samples), percentile(samples, 0.95), percentile(samples, 0.99), max(samples))))
+
+    p95 = percentile(warm, 0.95)
+    met = p95 < args.target_ms
+    print(f"\n{'✅' if met else '❌'} warm p95 {p95:.3f}ms vs {args.target_ms}ms target "
+          f"at {args.docs} documents ({len(queries)} queries, top {args.limit})")
+    return met
+
+def seed(connection, rows, batch_size):
+    """Create the scratch table and fill it with synthetic rows"""
+    cursor = connection.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS `{BENCH_TABLE}`")
+    cursor.execute(f"""
+    CREATE TABLE `{BENCH_TABLE}` (
+      `id` int(11) NOT NULL AUTO_INCREMENT,
+      `title` varchar(255) NOT NULL,
+      `description` text NOT NULL,
+      PRIMARY KEY (`id`)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """)
+
+    inserted = 0
+    while inserted < rows:
+        batch = [(random_text(4), random_text(40)) for _ in range(min(batch_size, rows - inserted))]
+        cursor.executemany(f"INSERT INTO `{BENCH_TABLE}` (title, description) VALUES (%s, %s)", batch)
+        connection.commit()
+        inserted += len(batch)
+        print(f"\r  Seeded {inserted}/{rows} rows", end='', flush=True)
+    print()
+
+    print("  Building FULLTEXT index...")
+    started = time.perf_counter()
+    cursor.execute(f"ALTER TABLE `{BENCH_TABLE}` ADD FULLTEXT KEY `ft_search` (`title`, `description`)")
+    print(f"  Index built in {time.perf_counter() - started:.1f}s")
+    cursor.close()
+
+def timed(cursor, sql, params, repeat):
+    """Run a query repeat times and return (best seconds, row count)"""
+    best = None
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        rows = len(cursor.fetchall())
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare LIKE and FULLTEXT search')
+    parser.add_argument('--rows', type=int, default=1000000, help='Rows to seed')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT batch')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per query (best is reported)')
+    parser.add_argument('--limit', type=int, default=20, help='LIMIT used by each query')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch table afterwards')
+    parser.add_argument('--index', action='store_true', help='Benchmark the in-process index instead (no database)')
+    parser.add_argument('--docs', type=int, default=500000, help='Documents to index with --index')
+    parser.add_argument('--vocabulary', type=int, default=20000, help='Distinct words in the --index corpus')
+    parser.add_argument('--queries', type=int, default=200, help='Distinct queries with --index')
+    parser.add_argument('--target-ms', type=float, default=1.0, help='Warm p95 query latency target with --index')
+    parser.add_argument('--strict', action='store_true', help='Exit with status 1 when the target is missed')
+    args = parser.parse_args()
+
+    print("🔎 CI-NDA Search Benchmark")
+    print("=" * 40)
+
+    if args.index:
+        met = benchmark_index(args)
+        if args.strict and not met:
+            sys.exit(1)
+        return
+
+    try:
+        connection = mysql.connector.connect(**DB_CONFIG)
+    except Error as e:
+        print(f"❌ Error connecting to database: {e}")
+        sys.exit(1)
+
+    try:
+        seed(connection, args.rows, args.batch_size)
+        cursor = connection.cursor()
+
+        like_sql = f"""
+        SELECT id, title FROM `{BENCH_TABLE}`
+        WHERE title LIKE %s OR description LIKE %s
+        ORDER BY id DESC LIMIT %s
+        """
+        match = "MATCH(title, description) AGAINST (%s {})"
+        match_sql = f"""
+        SELECT id, title, {match} AS relevance FROM `{BENCH_TABLE}`
+        WHERE {match}
+        ORDER BY relevance DESC LIMIT %s
+        """
+
+        print(f"\n{'query':<20}{'LIKE':>12}{'natural':>12}{'boolean':>12}")
+        for query in QUERIES:
+            pattern = f'%{query}%'
+            boolean_query = ' '.join(f'+{word}' for word in query.split())
+            like_time, _ = timed(cursor, like_sql, (pattern, pattern, args.limit), args.repeat)
+            natural_time, _ = timed(cursor, match_sql.format('IN NATURAL LANGUAGE MODE', 'IN NATURAL LANGUAGE MODE'),
+                                    (query, query, args.limit), args.repeat)
+            boolean_time, _ = timed(cursor, match_sql.format('IN BOOLEAN MODE', 'IN BOOLEAN MODE'),
+                                    (boolean_query, boolean_query, args.limit), args.repeat)
+            print(f"{query:<20}{like_time * 1000:>10.1f}ms{natural_time * 1000:>10.1f}ms{boolean_time * 1000:>10.1f}ms")
+
+        cursor.close()
+    except Error as e:
+        print(f"❌ Benchmark failed: {e}")
+        sys.exit(1)
+    finally:
+        if not args.keep:
+            cursor = connection.cursor()
+            cursor.execute(f"DROP TABLE IF EXISTS `{BENCH_TABLE}`")
+            cursor.close()
+        connection.close()
+
+if __name__ == '__main__':
+    main()
@@ -36,7 +36,8 @@ CREATE TABLE `users` (
   KEY `idx_email` (`email`),
   KEY `idx_user_type` (`user_type`),
   KEY `idx_created_at` (`created_at`),
-  UNIQUE KEY `unique_social_login` (`social_provider`, `social_provider_id`)
+  UNIQUE KEY `unique_social_login` (`social_provider`, `social_provider_id`),
+  FULLTEXT KEY `ft_search` (`name`, `bio`, `location`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ============================================================================
@@ -53,13 +54,16 @@ CREATE TABLE `courses` (
   `level` enum('Beginner','Intermediate','Advanced') NOT NULL,
   `price` decimal(10,2) DEFAULT 0.00,
   `lessons` json DEFAULT NULL,
+  `enrolled_count` int(11) DEFAULT 0,
   `is_published` boolean DEFAULT TRUE,
   `created_at` timestamp DEFAULT CURRENT_TIMESTAMP,
-  `updated_at` timestamp DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  `updated_at` timestamp(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
   PRIMARY KEY (`id`),
   KEY `idx_category` (`category`),
   KEY `idx_level` (`level`),
-  KEY `idx_created_at` (`created_at`)
+  KEY `idx_created_at` (`created_at`),
+  KEY `idx_updated_at` (`updated_at`),
+  FULLTEXT KEY `ft_search` (`title`, `description`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ============================================================================
@@ -96,12 +100,14 @@ CREATE TABLE `opportunities` (
   `deadline` timestamp NOT NULL,
   `is_active` boolean DEFAULT TRUE,
   `created_at` timestamp DEFAULT CURRENT_TIMESTAMP,
-  `updated_at` timestamp DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  `updated_at` timestamp(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
   PRIMARY KEY (`id`),
   KEY `idx_type` (`type`),
   KEY `idx_deadline` (`deadline`),
   KEY `idx_is_active` (`is_active`),
-  KEY `idx_created_at` (`created_at`)
+  KEY `idx_created_at` (`created_at`),
+  KEY `idx_updated_at` (`updated_at`),
+  FULLTEXT KEY `ft_search` (`title`, `description`, `company`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ============================================================================
@@ -120,6 +126,7 @@ CREATE TABLE `opportunity_applications` (
   KEY `idx_user_id` (`user_id`),
   KEY `idx_opportunity_id` (`opportunity_id`),
   KEY `idx_status` (`status`),
+  KEY `idx_applied_at` (`applied_at`),
   FOREIGN KEY (`user_id`) REFERENCES `users`(`id`) ON DELETE CASCADE,
   FOREIGN KEY (`opportunity_id`) REFERENCES `opportunities`(`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -137,12 +144,16 @@ CREATE TABLE `portfolios` (
   `tags` json DEFAULT NULL,
   `category` enum('Short Films','Documentaries','Music Videos','Commercials','Experimental') DEFAULT NULL,
   `views` int(11) DEFAULT 0,
+  `likes_count` int(11) DEFAULT 0,
+  `comments_count` int(11) DEFAULT 0,
   `created_at` timestamp DEFAULT CURRENT_TIMESTAMP,
-  `updated_at` timestamp DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  `updated_at` timestamp(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
   PRIMARY KEY (`id`),
   KEY `idx_user_id` (`user_id`),
   KEY `idx_category` (`category`),
   KEY `idx_created_at` (`created_at`),
+  KEY `idx_updated_at` (`updated_at`),
+  FULLTEXT KEY `ft_search` (`title`, `description`),
   FOREIGN KEY (`user_id`) REFERENCES `users`(`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -241,6 +252,58 @@ CREATE TABLE `notifications` (
   FOREIGN KEY (`user_id`) REFERENCES `users`(`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- ============================================================================
+-- UPLOAD SESSIONS TABLE (resumable chunked uploads)
+-- ============================================================================
+CREATE TABLE `upload_sessions` (
+  `id` char(32) NOT NULL,
+  `user_id` int(11) NOT NULL,
+  `filename` varchar(255) NOT NULL,
+  `total_size` bigint NOT NULL,
+  `received_bytes` bigint NOT NULL DEFAULT 0,
+  `chunk_digests` mediumtext NOT NULL,
+  `lease_until` timestamp NULL DEFAULT NULL,
+  `created_at` timestamp DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` timestamp DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  KEY `idx_user_id` (`user_id`),
+  KEY `idx_updated_at` (`updated_at`),
+  FOREIGN KEY (`user_id`) REFERENCES `users`(`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================================================
+-- MEDIA STORAGE TABLES (content-addressed upload blobs)
+-- ============================================================================
+CREATE TABLE `media_blobs` (
+  `hash` char(64) NOT NULL,
+  `size` bigint NOT NULL,
+  `ref_count` int(11) NOT NULL DEFAULT 0,
+  `variants` json DEFAULT NULL,
+  `variants_at` timestamp(6) NULL DEFAULT NULL,
+  `metadata` json DEFAULT NULL,
+  `metadata_at` timestamp(6) NULL DEFAULT NULL,
+  `created_at` timestamp DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` timestamp DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`hash`),
+  KEY `idx_ref_count` (`ref_count`),
+  KEY `idx_variants_at` (`variants_at`),
+  KEY `idx_metadata_at` (`metadata_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE `media_uploads` (
+  `id` char(32) NOT NULL,
+  `user_id` int(11) NOT NULL,
+  `blob_hash` char(64) NOT NULL,
+  `filename` varchar(255) NOT NULL,
+  `public_name` varchar(80) NOT NULL,
+  `created_at` timestamp DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  KEY `idx_user_id` (`user_id`),
+  KEY `idx_blob_hash` (`blob_hash`),
+  FOREIGN KEY (`user_id`) REFERENCES `users`(`id`) ON DELETE CASCADE,
+  FOREIGN KEY (`blob_hash`) REFERENCES `media_blobs`(`hash`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- ============================================================================
 -- INSERT SAMPLE DATA
 -- ============================================================================
@@ -304,6 +367,7 @@ INSERT INTO `mentorships` (`mentor_id`, `mentee_id`, `status`, `specialties`, `b
 CREATE INDEX `idx_courses_category_level` ON `courses`(`category`, `level`);
 CREATE INDEX `idx_opportunities_type_deadline` ON `opportunities`(`type`, `deadline`);
 CREATE INDEX `idx_portfolios_user_category` ON `portfolios`(`user_id`, `category`);
+CREATE INDEX `idx_portfolios_category_created` ON `portfolios`(`category`, `created_at`);
 CREATE INDEX `idx_users_type_verified` ON `users`(`user_type`, `is_verified`);
 
 -- ============================================================================
@@ -411,16 +475,45 @@ BEGIN
   WHERE id = OLD.user_id;
 END //
 
--- Trigger to update portfolio views
+-- Trigger to update portfolio views and likes_count (one AFTER INSERT trigger
+-- on portfolio_likes, so both counters move in a single UPDATE)
 CREATE TRIGGER increment_portfolio_views
 AFTER INSERT ON portfolio_likes
 FOR EACH ROW
 BEGIN
   UPDATE portfolios 
-  SET views = views + 1 
+  SET views = views + 1, likes_count = likes_count + 1 
+  WHERE id = NEW.portfolio_id;
+END //
+
+-- Triggers to keep portfolio engagement counters in sync with likes and comments
+CREATE TRIGGER update_portfolio_likes_after_delete
+AFTER DELETE ON portfolio_likes
+FOR EACH ROW
+BEGIN
+  UPDATE portfolios 
+  SET likes_count = GREATEST(likes_count - 1, 0) 
+  WHERE id = OLD.portfolio_id;
+END //
+
+CREATE TRIGGER update_portfolio_comments_after_insert
+AFTER INSERT ON portfolio_comments
+FOR EACH ROW
+BEGIN
+  UPDATE portfolios 
+  SET comments_count = comments_count + 1 
   WHERE id = NEW.portfolio_id;
 END //
 
+CREATE TRIGGER update_portfolio_comments_after_delete
+AFTER DELETE ON portfolio_comments
+FOR EACH ROW
+BEGIN
+  UPDATE portfolios 
+  SET comments_count = GREATEST(comments_count - 1, 0) 
+  WHERE id = OLD.portfolio_id;
+END //
+
 DELIMITER ;
 
 -- ============================================================================
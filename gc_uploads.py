@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Upload Garbage Collection Script for CI-NDA
+Removes resumable upload sessions that were abandoned before completion
+(with their partial files) and media blobs no upload refers to anymore
+"""
+
+import argparse
+import sys
+import mysql.connector
+from mysql.connector import Error
+
+from server import (DB_CONFIG, UPLOAD_SESSION_TTL, MEDIA_GC_GRACE, collect_abandoned_uploads,
+                    collect_orphaned_blobs, media_storage_stats)
+
+def main():
+    parser = argparse.ArgumentParser(description='Remove abandoned resumable uploads')
+    parser.add_argument('--max-age', type=int, default=UPLOAD_SESSION_TTL,
+                        help='Seconds since the last chunk after which a session is abandoned')
+    parser.add_argument('--blob-grace', type=int, default=MEDIA_GC_GRACE,
+                        help='Seconds an unreferenced blob is kept before it is removed')
+    parser.add_argument('--skip-blobs', action='store_true', help='Only clean up upload sessions')
+    args = parser.parse_args()
+
+    print("🧹 CI-NDA Upload Garbage Collection")
+    print("=" * 40)
+
+    try:
+        connection = mysql.connector.connect(**DB_CONFIG)
+    except Error as e:
+        print(f"❌ Error connecting to database: {e}")
+        sys.exit(1)
+
+    try:
+        cursor = connection.cursor()
+        removed = collect_abandoned_uploads(cursor, args.max_age)
+        connection.commit()
+        cursor.close()
+        print(f"✅ Removed {removed} abandoned uploads")
+
+        if not args.skip_blobs:
+            removed = collect_orphaned_blobs(connection, args.blob_grace)
+            print(f"✅ Removed {removed} orphaned blobs")
+
+            cursor = connection.cursor()
+            stats = media_storage_stats(cursor)
+            cursor.close()
+            print(f"📦 {stats['blobs']} blobs, {stats['storedBytes'] / 1048576:.1f} MB stored, "
+                  f"{stats['savedBytes'] / 1048576:.1f} MB saved by deduplication")
+    except Error as e:
+        print(f"❌ Error collecting uploads: {e}")
+        connection.rollback()
+        sys.exit(1)
+    finally:
+        connection.close()
+
+if __name__ == '__main__':
+    main()
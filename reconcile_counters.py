@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Counter Reconciliation Script for CI-NDA
+Adds missing denormalized counter columns and repairs counters that drifted
+from the rows they count (course enrollments, portfolio likes and comments)
+"""
+
+import argparse
+import sys
+import mysql.connector
+from mysql.connector import Error
+
+from server import DB_CONFIG
+
+# Denormalized counters: (table, counter column, counted table, foreign key)
+COUNTERS = [
+    ('courses', 'enrolled_count', 'course_enrollments', 'course_id'),
+    ('portfolios', 'likes_count', 'portfolio_likes', 'portfolio_id'),
+    ('portfolios', 'comments_count', 'portfolio_comments', 'portfolio_id'),
+]
+
+def column_exists(cursor, table, column):
+    """Check whether a counter column exists in the current schema"""
+    cursor.execute("""
+    SELECT COUNT(*) FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+def reconcile(connection, table, column, child_table, foreign_key, batch_size, dry_run):
+    """Recount one counter in primary key batches and fix rows that drifted"""
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT MIN(id), MAX(id) FROM `{table}`")
+    min_id, max_id = cursor.fetchone()
+    if min_id is None:
+        cursor.close()
+        return 0
+
+    drift_condition = f"NOT (t.`{column}` <=> COALESCE(x.n, 0))"
+    counts = f"""
+    SELECT `{foreign_key}` AS ref_id, COUNT(*) AS n FROM `{child_table}`
+    WHERE `{foreign_key}` BETWEEN %s AND %s
+    GROUP BY `{foreign_key}`
+    """
+
+    repaired = 0
+    for start in range(min_id, max_id + 1, batch_size):
+        end = start + batch_size - 1
+        if dry_run:
+            cursor.execute(f"""
+            SELECT COUNT(*) FROM `{table}` t
+            LEFT JOIN ({counts}) x ON x.ref_id = t.id
+            WHERE t.id BETWEEN %s AND %s AND {drift_condition}
+            """, (start, end, start, end))
+            repaired += cursor.fetchone()[0]
+        else:
+            cursor.execute(f"""
+            UPDATE `{table}` t
+            LEFT JOIN ({counts}) x ON x.ref_id = t.id
+            SET t.`{column}` = COALESCE(x.n, 0)
+            WHERE t.id BETWEEN %s AND %s AND {drift_condition}
+            """, (start, end, start, end))
+            repaired += cursor.rowcount
+            connection.commit()
+
+    cursor.close()
+    return repaired
+
+def main():
+    parser = argparse.ArgumentParser(description='Repair denormalized counters')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Rows per UPDATE batch')
+    parser.add_argument('--dry-run', action='store_true', help='Only report drifted rows')
+    args = parser.parse_args()
+
+    print("🔢 CI-NDA Counter Reconciliation")
+    print("=" * 40)
+
+    try:
+        connection = mysql.connector.connect(**DB_CONFIG)
+    except Error as e:
+        print(f"❌ Error connecting to database: {e}")
+        sys.exit(1)
+
+    try:
+        for table, column, child_table, foreign_key in COUNTERS:
+            cursor = connection.cursor()
+            if not column_exists(cursor, table, column):
+                if args.dry_run:
+                    print(f"⚠️  {table}.{column} is missing; run without --dry-run to add it")
+                    cursor.close()
+                    continue
+                # Older schemas predate the counter column
+                cursor.execute(f"ALTER TABLE `{table}` ADD COLUMN `{column}` int(11) DEFAULT 0")
+                print(f"✅ Added column {table}.{column}")
+            cursor.close()
+
+            repaired = reconcile(connection, table, column, child_table, foreign_key,
+                                 args.batch_size, args.dry_run)
+            verb = 'drifted' if args.dry_run else 'repaired'
+            print(f"✅ {table}.{column}: {repaired} rows {verb}")
+    except Error as e:
+        print(f"❌ Error reconciling counters: {e}")
+        connection.rollback()
+        sys.exit(1)
+    finally:
+        connection.close()
+
+    print("\n🎉 Counter reconciliation completed!")
+
+if __name__ == '__main__':
+    main()
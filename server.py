@@ -4,9 +4,10 @@ CI-NDA Flask Backend Server
 Complete backend for the filmmaker platform with authentication and CRUD operations
 """
 
-from flask import Flask, request, jsonify, session, g, send_from_directory
+from flask import Flask, request, jsonify, session, g, send_from_directory, stream_with_context
 from flask_cors import CORS
-from functools import wraps
+from flask.json.provider import DefaultJSONProvider
+from functools import wraps, partial
 import mysql.connector
 from mysql.connector import Error
 import bcrypt
@@ -14,10 +15,49 @@ import jwt
 import datetime
 import os
 from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
+from urllib.parse import quote
 import re
+import secrets
+import shutil
+import tempfile
+import stat
+import mimetypes
+import mmap
+import struct
 import json
+import time
+import hashlib
+import base64
+import math
+import heapq
+import pickle
+import atexit
+import unicodedata
+import bisect
+import threading
+from collections import deque, OrderedDict, Counter
+from contextlib import contextmanager
+from array import array
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from dotenv import load_dotenv
 
+try:
+    import redis  # Optional shared backend for the response cache
+except ImportError:
+    redis = None
+
+try:
+    import orjson  # Optional fast JSON encoder
+except ImportError:
+    orjson = None
+
+try:
+    from PIL import Image, ImageOps  # Optional image variant generation
+except ImportError:
+    Image = ImageOps = None
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -49,41 +89,416 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'mov', 'avi', 'webm',
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
 
-# Create uploads directory if it doesn't exist
+# Resumable (chunked) upload configuration; partial files must be on the same filesystem as UPLOAD_FOLDER
+UPLOAD_TMP_FOLDER = os.getenv('UPLOAD_TMP_FOLDER', os.path.join(UPLOAD_FOLDER, '.partial'))
+UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', '5368709120'))  # Default 5GB per resumable upload
+UPLOAD_SESSION_TTL = int(os.getenv('UPLOAD_SESSION_TTL', '86400'))  # Seconds an idle upload session is kept
+UPLOAD_GC_INTERVAL = int(os.getenv('UPLOAD_GC_INTERVAL', '3600'))  # Seconds between abandoned-session sweeps
+
+# Content-addressed blob store; must be on the same filesystem as UPLOAD_FOLDER (files are hard-linked)
+MEDIA_BLOB_FOLDER = os.getenv('MEDIA_BLOB_FOLDER', os.path.join(UPLOAD_FOLDER, '.blobs'))
+MEDIA_GC_GRACE = int(os.getenv('MEDIA_GC_GRACE', '86400'))  # Seconds an unreferenced blob is kept before GC
+
+# Media serving for /uploads/<filename>; MEDIA_SENDFILE_MODE hands the transfer to a front proxy:
+# none, nginx (X-Accel-Redirect to MEDIA_ACCEL_PREFIX) or apache (X-Sendfile, also lighttpd)
+MEDIA_SENDFILE_MODE = os.getenv('MEDIA_SENDFILE_MODE', 'none').lower()
+MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/protected-uploads')  # nginx internal location aliased to UPLOAD_FOLDER
+MEDIA_MAX_AGE = int(os.getenv('MEDIA_MAX_AGE', '3600'))  # Browser cache lifetime for names that aren't content-addressed
+MEDIA_STAT_CACHE_SIZE = int(os.getenv('MEDIA_STAT_CACHE_SIZE', '10000'))
+MEDIA_STAT_CACHE_TTL = float(os.getenv('MEDIA_STAT_CACHE_TTL', '10'))  # Seconds; content-addressed files are kept longer
+
+# Resized image variants for srcset (needs Pillow); images that don't fit the queue are left for backfill_variants.py
+MEDIA_VARIANT_WIDTHS = sorted(int(width) for width in os.getenv('MEDIA_VARIANT_WIDTHS', '320,640,1280').split(','))
+MEDIA_VARIANT_QUALITY = int(os.getenv('MEDIA_VARIANT_QUALITY', '80'))
+MEDIA_VARIANT_WORKERS = int(os.getenv('MEDIA_VARIANT_WORKERS', '2'))  # Worker processes; 0 disables the pipeline
+MEDIA_VARIANT_MAX_QUEUE = int(os.getenv('MEDIA_VARIANT_MAX_QUEUE', '100'))
+MEDIA_VARIANT_RETRIES = int(os.getenv('MEDIA_VARIANT_RETRIES', '3'))
+
+# Create uploads directories if they don't exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+os.makedirs(UPLOAD_TMP_FOLDER, exist_ok=True)
+os.makedirs(MEDIA_BLOB_FOLDER, exist_ok=True)
+
+# Connection pool configuration from environment variables
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))  # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '3600'))  # Max connection lifetime in seconds
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'True').lower() == 'true'
+DB_INIT_STATEMENTS = ["SET NAMES utf8mb4"]
+
+# Authenticated user cache configuration
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '10000'))
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '30'))  # Seconds
+USER_CACHE_SLIM = os.getenv('USER_CACHE_SLIM', 'True').lower() == 'true'  # Never cache password hashes
+
+# Verified JWT cache configuration
+JWT_CACHE_SIZE = int(os.getenv('JWT_CACHE_SIZE', '10000'))
+JWT_CACHE_TTL = float(os.getenv('JWT_CACHE_TTL', '300'))  # Upper bound in seconds; never outlives the exp claim
+
+# Listing total count cache configuration
+COUNT_CACHE_SIZE = int(os.getenv('COUNT_CACHE_SIZE', '5000'))
+COUNT_CACHE_TTL = float(os.getenv('COUNT_CACHE_TTL', '30'))  # Seconds
+
+# Decoded JSON column cache configuration
+JSON_COLUMN_CACHE_SIZE = int(os.getenv('JSON_COLUMN_CACHE_SIZE', '20000'))  # Rows
+JSON_COLUMN_CACHE_TTL = float(os.getenv('JSON_COLUMN_CACHE_TTL', '600'))  # Seconds
+
+# Search engine configuration: 'database' (FULLTEXT/LIKE) or 'memory' (in-process BM25 index)
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'database').lower()
+SEARCH_INDEX_SNAPSHOT = os.getenv('SEARCH_INDEX_SNAPSHOT', 'search_index.snapshot')
+SEARCH_INDEX_REFRESH_INTERVAL = int(os.getenv('SEARCH_INDEX_REFRESH_INTERVAL', '30'))  # Seconds between catch-ups, 0 disables
+SEARCH_FANOUT_WORKERS = int(os.getenv('SEARCH_FANOUT_WORKERS', '8'))  # Threads running category queries in parallel
+SEARCH_CATEGORY_TIMEOUT = float(os.getenv('SEARCH_CATEGORY_TIMEOUT', '2'))  # Seconds before a category is dropped
+
+# Typeahead suggestion configuration
+SUGGEST_MAX_RESULTS = int(os.getenv('SUGGEST_MAX_RESULTS', '20'))
+SUGGEST_BUDGET_MS = float(os.getenv('SUGGEST_BUDGET_MS', '5'))  # Latency budget per lookup
+SUGGEST_REFRESH_INTERVAL = int(os.getenv('SUGGEST_REFRESH_INTERVAL', '300'))  # Seconds between full reloads
+
+# Search result cache configuration
+SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', '2000'))
+SEARCH_CACHE_TTL = float(os.getenv('SEARCH_CACHE_TTL', '60'))  # Seconds
+
+# Public GET response cache configuration: 'memory' (per process) or 'redis' (shared)
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'True').lower() == 'true'
+RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'memory').lower()
+RESPONSE_CACHE_REDIS_URL = os.getenv('RESPONSE_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '5000'))
+RESPONSE_CACHE_GRACE = float(os.getenv('RESPONSE_CACHE_GRACE', '30'))  # Seconds a stale entry may be served while one request refreshes it
+RESPONSE_CACHE_TTLS = {
+    'courses': float(os.getenv('RESPONSE_CACHE_TTL_COURSES', '120')),
+    'course': float(os.getenv('RESPONSE_CACHE_TTL_COURSE', '300')),
+    'opportunities': float(os.getenv('RESPONSE_CACHE_TTL_OPPORTUNITIES', '60')),
+    'portfolios': float(os.getenv('RESPONSE_CACHE_TTL_PORTFOLIOS', '60'))
+}
+
+# Request coalescing: identical concurrent public GETs share one computation
+SINGLE_FLIGHT_ENABLED = os.getenv('SINGLE_FLIGHT_ENABLED', 'True').lower() == 'true'
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv('SINGLE_FLIGHT_TIMEOUT', '10'))  # Seconds a follower waits before computing itself
+
+# HTTP conditional requests (ETag / Last-Modified / 304) on public GETs
+CONDITIONAL_REQUESTS_ENABLED = os.getenv('CONDITIONAL_REQUESTS_ENABLED', 'True').lower() == 'true'
+
+# Streaming listings: pages of at least STREAM_MIN_LIMIT rows (or ?stream=true) are
+# encoded row by row from an unbuffered cursor instead of being built in memory
+STREAM_MIN_LIMIT = int(os.getenv('STREAM_MIN_LIMIT', '200'))
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', '100'))  # Rows read from the socket per fetch
+
+# JSON serializer: 'auto' (orjson when installed), 'orjson' or 'stdlib'
+JSON_SERIALIZER = os.getenv('JSON_SERIALIZER', 'auto').lower()
+
+# Password hashing configuration
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', str(os.cpu_count() or 1)))
+BCRYPT_MAX_QUEUE = int(os.getenv('BCRYPT_MAX_QUEUE', '32'))  # Waiting jobs allowed before rejecting with 503
+
+# ============ JSON SERIALIZATION ============
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson. Output matches Flask's default provider
+    (sorted keys, dates as HTTP dates, Decimal as string) apart from non-ASCII
+    characters being emitted as UTF-8 instead of \\u escapes."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps_bytes(self, obj, indent=False):
+        option = self.option | orjson.OPT_INDENT_2 if indent else self.option
+        try:
+            return orjson.dumps(obj, default=self.default, option=option)
+        except TypeError:
+            # e.g. integers wider than 64 bits; the stdlib encoder handles them
+            layout = {'indent': 2} if indent else {'separators': (',', ':')}
+            return super().dumps(obj, **layout).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
+
+if JSON_SERIALIZER in ('auto', 'orjson') and orjson is not None:
+    app.json = FastJSONProvider(app)
+elif JSON_SERIALIZER == 'orjson':
+    print("JSON serializer: orjson is not installed, using the standard library")
+
+# ============ DATABASE CONNECTION POOL ============
+
+class PoolTimeoutError(Error):
+    """Raised when no pooled connection becomes available in time"""
+
+class PooledConnection:
+    """Checked-out pool connection; close() hands it back to the pool"""
+
+    def __init__(self, pool, connection, created_at):
+        self._pool = pool
+        self._connection = connection
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def close(self):
+        """Return the physical connection to the pool"""
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            self._pool._release(connection, self._created_at)
+
+class ConnectionPool:
+    """Thread-safe MySQL connection pool with overflow, validation and recycling"""
+
+    def __init__(self, config, size=5, max_overflow=10, timeout=10, recycle=3600,
+                 pre_ping=True, init_statements=None):
+        self.config = config
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.init_statements = init_statements or []
+        self._idle = deque()  # (connection, created_at) pairs, most recently used last
+        self._open = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'waitTimeTotal': 0.0,
+            'waitTimeMax': 0.0,
+            'timeouts': 0,
+            'connectionsCreated': 0,
+            'connectionsRecycled': 0,
+            'connectionsInvalidated': 0
+        }
+
+    def _create(self):
+        """Open a physical connection and run the init statements once"""
+        connection = mysql.connector.connect(**self.config)
+        try:
+            cursor = connection.cursor()
+            for statement in self.init_statements:
+                cursor.execute(statement)
+            cursor.close()
+        except Exception:
+            # connect() gives the slot back; the half-initialized connection must not leak
+            self._discard(connection)
+            raise
+        return connection
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, connection, created_at):
+        """Check lifetime and liveness of an idle connection"""
+        if self.recycle and time.monotonic() - created_at > self.recycle:
+            with self._cond:
+                self._stats['connectionsRecycled'] += 1
+            return False
+        if self.pre_ping:
+            try:
+                connection.ping(reconnect=False)
+            except Error:
+                with self._cond:
+                    self._stats['connectionsInvalidated'] += 1
+                return False
+        return True
+
+    def connect(self):
+        """Check a connection out of the pool, waiting up to timeout seconds"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    connection, created_at = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._open < self.size + self.max_overflow:
+                    connection, created_at = None, None
+                    self._open += 1
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(msg='Timed out waiting for a database connection')
+                waited = True
+                self._cond.wait(remaining)
+
+        # Validation and connecting happen outside the lock
+        try:
+            if connection is not None and not self._is_usable(connection, created_at):
+                self._discard(connection)
+                connection = None
+            if connection is None:
+                connection = self._create()
+                created_at = time.monotonic()
+                with self._cond:
+                    self._stats['connectionsCreated'] += 1
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        wait_time = time.monotonic() - started
+        with self._cond:
+            self._stats['checkouts'] += 1
+            self._stats['waitTimeTotal'] += wait_time
+            self._stats['waitTimeMax'] = max(self._stats['waitTimeMax'], wait_time)
+            if waited:
+                self._stats['waits'] += 1
+
+        return PooledConnection(self, connection, created_at)
+
+    def _release(self, connection, created_at):
+        """Reset a returned connection and keep it idle or close it if over size"""
+        keep = True
+        try:
+            connection.rollback()
+        except Error:
+            keep = False
+
+        with self._cond:
+            self._in_use -= 1
+            if keep and len(self._idle) < self.size:
+                self._idle.append((connection, created_at))
+                connection = None
+            else:
+                self._open -= 1
+            self._cond.notify()
+
+        # Overflow and broken connections are closed outside the lock
+        if connection is not None:
+            self._discard(connection)
+
+    def dispose(self):
+        """Close all idle connections"""
+        with self._cond:
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._open -= 1
+                self._discard(connection)
+
+    def stats(self):
+        """Pool usage statistics for monitoring"""
+        with self._cond:
+            checkouts = self._stats['checkouts']
+            return {
+                'size': self.size,
+                'maxOverflow': self.max_overflow,
+                'open': self._open,
+                'inUse': self._in_use,
+                'idle': len(self._idle),
+                'overflow': max(0, self._open - self.size),
+                'checkouts': checkouts,
+                'waits': self._stats['waits'],
+                'timeouts': self._stats['timeouts'],
+                'avgWaitMs': round(self._stats['waitTimeTotal'] / checkouts * 1000, 3) if checkouts else 0.0,
+                'maxWaitMs': round(self._stats['waitTimeMax'] * 1000, 3),
+                'connectionsCreated': self._stats['connectionsCreated'],
+                'connectionsRecycled': self._stats['connectionsRecycled'],
+                'connectionsInvalidated': self._stats['connectionsInvalidated']
+            }
+
+db_pool = ConnectionPool(
+    DB_CONFIG,
+    size=DB_POOL_SIZE,
+    max_overflow=DB_POOL_MAX_OVERFLOW,
+    timeout=DB_POOL_TIMEOUT,
+    recycle=DB_POOL_RECYCLE,
+    pre_ping=DB_POOL_PRE_PING,
+    init_statements=DB_INIT_STATEMENTS
+)
 
 # Database connection helper
 def get_db_connection():
-    """Get database connection with proper charset handling"""
+    """Check out a pooled database connection (charset is set once per physical connection)"""
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        
-        # Set charset after connection (for compatibility)
-        cursor = connection.cursor()
-        cursor.execute("SET NAMES utf8mb4")
-        cursor.close()
-        
-        return connection
+        return db_pool.connect()
     except Error as e:
         print(f"Error connecting to database: {e}")
         return None
 
+class LazyConnection:
+    """Request-scoped connection proxy that checks out from the pool on first use"""
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._connection = None
+
+    @property
+    def checked_out(self):
+        return self._connection is not None
+
+    def _get(self):
+        if self._connection is None:
+            self._connection = self._pool.connect()
+        return self._connection
+
+    def cursor(self, *args, **kwargs):
+        return self._get().cursor(*args, **kwargs)
+
+    def commit(self):
+        if self._connection is not None:
+            self._connection.commit()
+
+    def rollback(self):
+        if self._connection is not None:
+            self._connection.rollback()
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def close(self):
+        """Return the connection to the pool if one was checked out"""
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            connection.close()
+
+# Counters for requests that did / did not need a database connection
+request_db_stats = {'requests': 0, 'withCheckout': 0, 'withoutCheckout': 0}
+request_db_stats_lock = threading.Lock()
+
 def init_database():
     """Initialize database connection on request"""
     if 'db' not in g:
-        g.db = get_db_connection()
+        g.db = LazyConnection(db_pool)
     return g.db
 
 @app.before_request
 def before_request():
-    """Initialize database connection before each request"""
-    g.db = get_db_connection()
+    """Attach a lazy database connection; nothing is checked out until first use"""
+    g.db = LazyConnection(db_pool)
 
 @app.teardown_appcontext
 def close_db(error):
-    """Close database connection after each request"""
+    """Return database connection to the pool after each request"""
     db = g.pop('db', None)
     if db is not None:
+        with request_db_stats_lock:
+            request_db_stats['requests'] += 1
+            if db.checked_out:
+                request_db_stats['withCheckout'] += 1
+            else:
+                request_db_stats['withoutCheckout'] += 1
         db.close()
 
 # ============ STATIC FILE SERVING ============
@@ -125,13 +540,224 @@ def validate_email(email):
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email) is not None
 
+def encode_cursor(sort_value, row_id):
+    """Build an opaque keyset cursor from the sort value and id of a page's last row"""
+    if isinstance(sort_value, datetime.datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Parse a keyset cursor into (datetime, id); returns None for the first page"""
+    if not cursor or cursor == 'start':
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.datetime.fromisoformat(sort_value), int(row_id)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+
+# Query parameters that select a page rather than filter the listing
+PAGING_ARGS = {'page', 'limit', 'cursor', 'includeTotal', 'stream'}
+
+def listing_filters():
+    """Normalized filter set of the current listing request"""
+    return tuple(sorted(
+        (key, value.strip().lower())
+        for key, value in request.args.items()
+        if key not in PAGING_ARGS and value.strip()
+    ))
+
+def get_include_total():
+    """How the listing total is computed: 'exact' (cached), 'estimate' or 'none'"""
+    value = request.args.get('includeTotal', 'true').lower()
+    if value in ('false', 'none', '0'):
+        return 'none'
+    if value == 'estimate':
+        return 'estimate'
+    return 'exact'
+
+def get_total_count(cursor, entity, count_query, params, mode='exact'):
+    """Total for a listing, cached per entity version and normalized filter set.
+    Estimates come from the optimizer's row estimate instead of a COUNT."""
+    key = (entity, get_entity_version(entity), mode, listing_filters())
+    total = count_cache.get(key)
+    if total is None:
+        if mode == 'estimate':
+            cursor.execute("EXPLAIN " + count_query, params)
+            plan = cursor.fetchall()
+            total = 0
+            if plan:
+                rows = plan[0].get('rows') or 0
+                filtered = plan[0].get('filtered') or 100
+                total = int(float(rows) * float(filtered) / 100)
+        else:
+            cursor.execute(count_query, params)
+            total = next(iter(cursor.fetchone().values()))
+        count_cache.set(key, total)
+    return total
+
+def page_totals(cursor, entity, page, limit, count_query, count_params, include_total, total_field):
+    """Pagination fields of a page/limit listing that don't depend on its rows"""
+    pagination = {'currentPage': page, 'hasPrev': page > 1}
+    if include_total != 'none':
+        total_count = get_total_count(cursor, entity, count_query, count_params, include_total)
+        pagination['totalPages'] = (total_count + limit - 1) // limit
+        pagination[total_field] = total_count
+        if include_total == 'estimate':
+            pagination['totalIsEstimate'] = True
+    return pagination
+
+def offset_page(cursor, entity, rows, page, limit, count_query, count_params, include_total, total_field):
+    """Pagination block for page/limit listings.
+    Rows must have been fetched with limit+1 unless include_total is 'exact'."""
+    offset = (page - 1) * limit
+    pagination = page_totals(cursor, entity, page, limit, count_query, count_params, include_total, total_field)
+
+    if include_total != 'exact':
+        pagination['hasNext'] = len(rows) > limit
+        return rows[:limit], pagination
+
+    pagination['hasNext'] = offset + limit < pagination[total_field]
+    return rows, pagination
+
+def keyset_page(rows, limit, sort_key):
+    """Trim a limit+1 fetch to one page and build the cursor for the next one"""
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_next and rows:
+        next_cursor = encode_cursor(rows[-1][sort_key], rows[-1]['id'])
+    return rows, {'limit': limit, 'hasNext': has_next, 'nextCursor': next_cursor}
+
+def stream_requested():
+    """Whether the current listing request should be streamed"""
+    if request.args.get('stream', '').lower() == 'true':
+        return True
+    try:
+        return int(request.args.get('limit', 10)) >= STREAM_MIN_LIMIT
+    except ValueError:
+        return False
+
+def stream_listing(field, query, params, limit, process_row, pagination, sort_key=None):
+    """Stream a listing as {field: [...], pagination, success} from an unbuffered cursor.
+    The query must fetch limit + 1 rows. Rows are processed and encoded in batches of
+    STREAM_BATCH_SIZE, so memory use doesn't grow with limit. hasNext (and nextCursor
+    for keyset pages, using sort_key) is added to pagination after the last row."""
+    cursor = g.db.cursor(dictionary=True, buffered=False)
+    cursor.execute(query, params)  # Errors here still produce a normal error response
+
+    def generate():
+        sent = 0
+        has_next = False
+        last_key = None
+        finished = False
+        try:
+            yield '{"' + field + '":['
+            while True:
+                rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+                if not rows:
+                    break
+                chunks = []
+                for row in rows:
+                    if sent == limit:
+                        has_next = True
+                        continue
+                    if sort_key:
+                        last_key = (row[sort_key], row['id'])
+                    process_row(row)
+                    chunks.append(app.json.dumps(row))
+                    sent += 1
+                if chunks:
+                    yield (',' if sent > len(chunks) else '') + ','.join(chunks)
+            finished = True
+            
+            pagination['hasNext'] = has_next
+            if sort_key:
+                pagination['limit'] = limit
+                pagination['nextCursor'] = encode_cursor(*last_key) if has_next and last_key else None
+            yield '],"pagination":' + app.json.dumps(pagination) + ',"success":true}\n'
+        finally:
+            if not finished:
+                # Client went away mid-stream; drain the result so the connection can be reused
+                try:
+                    g.db.consume_results()
+                except Error:
+                    pass
+            cursor.close()
+
+    return app.response_class(stream_with_context(generate()), mimetype='application/json')
+
+class PasswordHasherBusy(Exception):
+    """Raised when the bcrypt worker pool and its queue are full"""
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded worker pool so login spikes cannot starve other requests"""
+
+    def __init__(self, workers=1, max_queue=32, rounds=12):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        # bcrypt releases the GIL while hashing, so threads run in parallel across cores
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _run(self, fn, *args):
+        """Run fn on the pool and wait for it, rejecting immediately when saturated"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHasherBusy()
+
+        with self._lock:
+            self._pending += 1
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+            self._slots.release()
+
+    def hash(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def check(self, password, hashed):
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'maxQueue': self.max_queue,
+                'rounds': self.rounds,
+                'inFlight': min(self._pending, self.workers),
+                'queued': max(0, self._pending - self.workers),
+                'completed': self._completed,
+                'rejected': self._rejected
+            }
+
+password_hasher = PasswordHasher(workers=BCRYPT_WORKERS, max_queue=BCRYPT_MAX_QUEUE, rounds=BCRYPT_ROUNDS)
+
 def hash_password(password):
     """Hash password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return password_hasher.hash(password)
 
 def check_password(password, hashed):
     """Check password against hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    return password_hasher.check(password, hashed)
+
+def hasher_busy_response():
+    """503 returned when bcrypt workers are saturated"""
+    response = jsonify({'success': False, 'message': 'Server is busy, please try again shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
 
 def generate_token(user_id, user_type, email):
     """Generate JWT token"""
@@ -144,27 +770,200 @@ def generate_token(user_id, user_type, email):
     return jwt.encode(payload, app.config['JWT_SECRET_KEY'], algorithm='HS256')
 
 def verify_token(token):
-    """Verify JWT token"""
+    """Verify JWT token, reusing the payload of recently verified tokens"""
+    key = hashlib.sha256(token.encode('utf-8')).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return dict(payload)
+
     try:
         payload = jwt.decode(token, app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
-        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
 
+    # Cache until the token expires (bounded by JWT_CACHE_TTL)
+    ttl = JWT_CACHE_TTL
+    if 'exp' in payload:
+        ttl = min(ttl, payload['exp'] - time.time())
+    if ttl > 0:
+        token_cache.set(key, payload, ttl=ttl)
+    return dict(payload)
+
+def get_request_token():
+    """Extract the bearer token from the Authorization header"""
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        return auth_header.split(' ')[1]
+    return None
+
+# ============ CACHING ============
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a time-to-live"""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxSize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+# Cache of authenticated user rows keyed by user id
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+# Cache of verified JWT payloads keyed by SHA-256 digest of the token
+token_cache = TTLCache(maxsize=JWT_CACHE_SIZE, ttl=JWT_CACHE_TTL)
+
+# Per-entity version stamps; write endpoints bump them so cached entries keyed
+# on an older version are never read again and simply age out. Each stamp is
+# also kept as an 'entity:<name>' tag in the response cache backend, so with
+# Redis a write in one worker reaches the caches of every worker.
+entity_versions = {'courses': 0, 'opportunities': 0, 'portfolios': 0, 'users': 0}
+entity_versions_lock = threading.Lock()
+
+def get_entity_version(entity):
+    """(this process's stamp, shared stamp or None while the backend is unreachable)"""
+    with entity_versions_lock:
+        local = entity_versions[entity]
+    try:
+        shared = response_cache.backend.tag_versions(('entity:' + entity,))[0]
+    except Exception:
+        shared = None
+    return local, shared
+
+def bump_entity_version(*entities):
+    """Invalidate cached data derived from the given entity types"""
+    with entity_versions_lock:
+        for entity in entities:
+            entity_versions[entity] += 1
+    try:
+        response_cache.backend.bump_tags(['entity:' + entity for entity in entities])
+    except Exception as e:
+        print(f"Error bumping shared entity versions: {e}")
+
+# Cache of listing totals keyed by entity version and normalized filters
+count_cache = TTLCache(maxsize=COUNT_CACHE_SIZE, ttl=COUNT_CACHE_TTL)
+
+# JSON columns per table and the value used when a stored document doesn't parse
+JSON_COLUMNS = {
+    'courses': {'instructor': {'name': 'Unknown', 'avatar': '', 'bio': ''}, 'lessons': []},
+    'opportunities': {'details': {}},
+    'portfolios': {'tags': []},
+    'mentorships': {'specialties': [], 'sessions': []},
+    'media_blobs': {'variants': None, 'metadata': None}
+}
+
+# Decoded JSON column values keyed by (table, id, updated_at); media_blobs use
+# (hash, variants_at or metadata_at) as id and version
+json_column_cache = TTLCache(maxsize=JSON_COLUMN_CACHE_SIZE, ttl=JSON_COLUMN_CACHE_TTL)
+
+def decode_json_columns(table, row):
+    """Replace a row's JSON columns with their decoded values, decoding each
+    row version once. Decoded values are shared between requests and must not
+    be mutated. Empty columns are left as they are."""
+    columns = JSON_COLUMNS[table]
+    raw = tuple(row.get(column) for column in columns)
+    key = (table, row['id'], row.get('updated_at'))
+    
+    # The raw text is compared too, since updated_at only has second precision
+    entry = json_column_cache.get(key)
+    if entry is None or entry[0] != raw:
+        decoded = {}
+        for column, fallback in columns.items():
+            value = row.get(column)
+            if value:
+                try:
+                    value = app.json.loads(value)
+                except (TypeError, ValueError):
+                    value = fallback
+            decoded[column] = value
+        entry = (raw, decoded)
+        if key[2] is not None:
+            json_column_cache.set(key, entry)
+    
+    row.update(entry[1])
+    return row
+
+# Columns cached for g.current_user when USER_CACHE_SLIM is on (everything except the password hash)
+USER_PRINCIPAL_COLUMNS = """
+    id, name, email, user_type, avatar, bio, location, website, specialization,
+    social_provider, social_provider_id, followers, following, projects, awards,
+    is_verified, last_login, created_at, updated_at
+"""
+
+def load_current_user(user_id):
+    """Get the user row for an authenticated request, from cache when possible"""
+    user = user_cache.get(user_id)
+    if user is None:
+        columns = USER_PRINCIPAL_COLUMNS if USER_CACHE_SLIM else '*'
+        cursor = g.db.cursor(dictionary=True)
+        cursor.execute(f"SELECT {columns} FROM users WHERE id = %s", (user_id,))
+        user = cursor.fetchone()
+        cursor.close()
+        if not user:
+            return None
+        user_cache.set(user_id, user)
+    return dict(user)
+
+def invalidate_user(user_id):
+    """Drop a cached user row after the row changed"""
+    user_cache.delete(user_id)
+
 # Authentication decorator
 def auth_required(f):
     """Decorator to require authentication"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        token = None
-        
         # Get token from header
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
+        token = get_request_token()
         
         if not token:
             return jsonify({'success': False, 'message': 'Token is missing'}), 401
@@ -174,12 +973,9 @@ def auth_required(f):
         if not payload:
             return jsonify({'success': False, 'message': 'Token is invalid or expired'}), 401
         
-        # Get user from database
+        # Get user from cache or database
         try:
-            cursor = g.db.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM users WHERE id = %s", (payload['user_id'],))
-            user = cursor.fetchone()
-            cursor.close()
+            user = load_current_user(payload['user_id'])
             
             if not user:
                 return jsonify({'success': False, 'message': 'User not found'}), 401
@@ -192,6 +988,500 @@ def auth_required(f):
     
     return decorated_function
 
+# ============ RESPONSE CACHE ============
+
+class MemoryCacheBackend:
+    """Per-process response cache backend built on TTLCache"""
+
+    name = 'memory'
+
+    def __init__(self, maxsize):
+        self._entries = TTLCache(maxsize=maxsize)
+        self._tags = {}
+        self._locks = {}  # key -> monotonic deadline of the refresh lock
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, entry, ttl):
+        self._entries.set(key, entry, ttl)
+
+    def tag_versions(self, tags):
+        with self._lock:
+            return tuple(self._tags.get(tag, 0) for tag in tags)
+
+    def bump_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._tags[tag] = self._tags.get(tag, 0) + 1
+
+    def try_lock(self, key, ttl):
+        now = time.monotonic()
+        with self._lock:
+            # A lock whose holder never released it frees itself after ttl, like Redis' px
+            if self._locks.get(key, 0) > now:
+                return False
+            self._locks[key] = now + ttl
+            return True
+
+    def unlock(self, key):
+        with self._lock:
+            self._locks.pop(key, None)
+
+    def stats(self):
+        return self._entries.stats()
+
+class RedisCacheBackend:
+    """Response cache backend shared by all workers through a Redis-compatible server.
+    Entries are stored as a fixed binary header (expiry, status) followed by the
+    body, so nothing read back from the network is ever unpickled."""
+
+    name = 'redis'
+    ENTRY_HEADER = struct.Struct('>dH')
+
+    def __init__(self, url, prefix='cinda:'):
+        self._client = redis.Redis.from_url(url)
+        self._client.ping()
+        self._prefix = prefix
+
+    def get(self, key):
+        raw = self._client.get(self._prefix + 'resp:' + key)
+        if raw is None or len(raw) < self.ENTRY_HEADER.size:
+            return None
+        expires_at, status = self.ENTRY_HEADER.unpack_from(raw)
+        return expires_at, status, raw[self.ENTRY_HEADER.size:]
+
+    def set(self, key, entry, ttl):
+        expires_at, status, body = entry
+        self._client.set(self._prefix + 'resp:' + key, self.ENTRY_HEADER.pack(expires_at, status) + body,
+                         px=max(int(ttl * 1000), 1))
+
+    def tag_versions(self, tags):
+        if not tags:
+            return ()
+        values = self._client.mget([self._prefix + 'tag:' + tag for tag in tags])
+        return tuple(int(value or 0) for value in values)
+
+    def bump_tags(self, tags):
+        pipe = self._client.pipeline()
+        for tag in tags:
+            pipe.incr(self._prefix + 'tag:' + tag)
+        pipe.execute()
+
+    def try_lock(self, key, ttl):
+        return bool(self._client.set(self._prefix + 'lock:' + key, b'1', nx=True, px=max(int(ttl * 1000), 1)))
+
+    def unlock(self, key):
+        self._client.delete(self._prefix + 'lock:' + key)
+
+    def stats(self):
+        return {'keys': self._client.dbsize()}
+
+class ResponseCache:
+    """Caches serialized JSON responses of public GET routes.
+    Keys carry the versions of the route's tags, so invalidate() makes every
+    entry built under an older version unreachable. Expired entries are kept
+    for RESPONSE_CACHE_GRACE seconds and served to concurrent requests while a
+    single request recomputes them, so an expiry never causes a stampede."""
+
+    def __init__(self, backend, grace):
+        self.backend = backend
+        self.grace = grace
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def make_key(self, route, view_args, filters, tags, validator=None):
+        """Cache key from the route, normalized arguments, current tag versions
+        and (when known) the conditional request validator of the data.
+        None when the backend can't be reached; the request then bypasses the cache."""
+        try:
+            versions = self.backend.tag_versions(tags)
+        except Exception:
+            # A broken cache backend must never take the API down
+            self._count('errors')
+            return None
+        raw = json.dumps([route, sorted(view_args.items()), filters, list(zip(tags, versions)), validator], default=str)
+        return route + ':' + hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def lookup(self, key):
+        """Return (entry, state) where state is 'hit', 'stale' or 'miss'.
+        A stale entry is only returned to requests that lose the refresh race."""
+        try:
+            entry = self.backend.get(key)
+            if entry is None:
+                self._count('misses')
+                return None, 'miss'
+            if entry[0] > time.time():
+                self._count('hits')
+                return entry, 'hit'
+            if self.backend.try_lock(key, self.grace):
+                self._count('refreshes')
+                return None, 'refresh'
+            self._count('stale_hits')
+            return entry, 'stale'
+        except Exception:
+            # A broken cache backend must never take the API down
+            self._count('errors')
+            return None, 'miss'
+
+    def store(self, key, ttl, status, body, refreshing=False):
+        try:
+            self.backend.set(key, (time.time() + ttl, status, body), ttl + self.grace)
+            if refreshing:
+                self.backend.unlock(key)
+        except Exception:
+            self._count('errors')
+
+    def release(self, key):
+        try:
+            self.backend.unlock(key)
+        except Exception:
+            self._count('errors')
+
+    def invalidate(self, *tags):
+        """Make every cached response tagged with one of the given tags unreachable"""
+        try:
+            self.backend.bump_tags(tags)
+            self._count('invalidations')
+        except Exception:
+            self._count('errors')
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses + self.refreshes
+            stats = {
+                'enabled': RESPONSE_CACHE_ENABLED,
+                'backend': self.backend.name,
+                'hits': self.hits,
+                'staleHits': self.stale_hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+                'invalidations': self.invalidations,
+                'errors': self.errors,
+                'hitRate': round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0
+            }
+        try:
+            stats['store'] = self.backend.stats()
+        except Exception:
+            pass
+        return stats
+
+def create_response_cache():
+    """Build the configured response cache, falling back to memory if Redis is unusable"""
+    if RESPONSE_CACHE_BACKEND == 'redis':
+        if redis is None:
+            print("Response cache: the redis package is not installed, using the memory backend")
+        else:
+            try:
+                return ResponseCache(RedisCacheBackend(RESPONSE_CACHE_REDIS_URL), RESPONSE_CACHE_GRACE)
+            except Exception as e:
+                print(f"Response cache: Redis unavailable ({e}), using the memory backend")
+    return ResponseCache(MemoryCacheBackend(RESPONSE_CACHE_SIZE), RESPONSE_CACHE_GRACE)
+
+response_cache = create_response_cache()
+
+def response_cache_filters(filter_args):
+    """Normalized query arguments for a cache key; unknown arguments (cache busters) are ignored"""
+    filters = [pair for pair in listing_filters() if pair[0] in filter_args]
+    paging = {'includeTotal': get_include_total()}
+    for name, default in (('page', 1), ('limit', 10)):
+        value = request.args.get(name, default)
+        try:
+            paging[name] = int(value)
+        except (TypeError, ValueError):
+            paging[name] = value
+    if request.args.get('cursor') is not None:
+        paging['cursor'] = request.args.get('cursor')
+    return [filters, sorted(paging.items())]
+
+class InFlightCall:
+    """A computation that followers with the same key are waiting on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.failed = False
+        self.waiters = 0
+
+class SingleFlight:
+    """Runs at most one computation per key at a time within this process;
+    callers arriving while it runs wait for it and share its result"""
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.fallbacks = 0
+        self.max_waiters = 0
+
+    def do(self, key, fn):
+        """Return (result, shared); shared is True when another thread computed it"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = InFlightCall()
+                self.leaders += 1
+            else:
+                call.waiters += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+        
+        if not leader:
+            if call.done.wait(self.timeout) and not call.failed:
+                with self._lock:
+                    self.coalesced += 1
+                return call.result, True
+            # The leader is too slow or failed; compute independently
+            with self._lock:
+                self.fallbacks += 1
+            return fn(), False
+        
+        try:
+            call.result = fn()
+        except BaseException:
+            call.failed = True
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def stats(self):
+        with self._lock:
+            requests = self.leaders + self.coalesced + self.fallbacks
+            return {
+                'enabled': SINGLE_FLIGHT_ENABLED,
+                'inFlight': len(self._calls),
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'fallbacks': self.fallbacks,
+                'maxWaiters': self.max_waiters,
+                'coalesceRate': round(self.coalesced / requests, 4) if requests else 0.0
+            }
+
+# In-flight public GET computations keyed like the response cache
+request_flights = SingleFlight(SINGLE_FLIGHT_TIMEOUT)
+
+def cached_response(route, filter_args=(), tags=(), overlay=None):
+    """Cache a public GET route's 200 responses in response_cache.
+    tags are formatted with the view arguments (e.g. 'course:{course_id}') and
+    invalidated by the write routes. overlay(body, **view_args) adds per-user
+    fields on top of the shared anonymous payload for authenticated requests.
+    Identical concurrent misses are coalesced through request_flights."""
+    def apply_overlay(body, kwargs):
+        """Body with the per-user fields added, or an error response"""
+        payload = app.json.loads(body)
+        try:
+            overlay(payload, **kwargs)
+        except Error:
+            return None, (jsonify({'success': False, 'message': 'Database error occurred'}), 500)
+        return app.json.dumps(payload), None
+    
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Streamed pages are too large to cache or share
+            if (not RESPONSE_CACHE_ENABLED and not SINGLE_FLIGHT_ENABLED) or stream_requested():
+                response = app.make_response(f(*args, **kwargs))
+                # The view still builds the anonymous payload
+                if overlay and response.status_code == 200 and not response.is_streamed and get_request_token():
+                    body, error = apply_overlay(response.get_data(), kwargs)
+                    if error:
+                        return error
+                    response.set_data(body)
+                return response
+            
+            route_tags = [tag.format(**kwargs) for tag in tags]
+            key = response_cache.make_key(route, kwargs, response_cache_filters(filter_args), route_tags,
+                                          g.get('response_validator'))
+            if key is None:
+                entry, state = None, 'bypass'
+            elif RESPONSE_CACHE_ENABLED:
+                entry, state = response_cache.lookup(key)
+            else:
+                entry, state = None, 'miss'
+            
+            if entry is not None:
+                status, body = entry[1], entry[2]
+            else:
+                def compute():
+                    response = app.make_response(f(*args, **kwargs))
+                    return response.status_code, response.get_data()
+                
+                try:
+                    if SINGLE_FLIGHT_ENABLED and key is not None:
+                        (status, body), shared = request_flights.do(key, compute)
+                    else:
+                        (status, body), shared = compute(), False
+                except Exception:
+                    if state == 'refresh':
+                        response_cache.release(key)
+                    raise
+                
+                # Only the request that computed the response stores it
+                if state != 'bypass':
+                    if RESPONSE_CACHE_ENABLED and status == 200 and not shared:
+                        response_cache.store(key, RESPONSE_CACHE_TTLS[route], status, body,
+                                             refreshing=state == 'refresh')
+                    elif state == 'refresh':
+                        response_cache.release(key)
+                    state = 'coalesced' if shared else 'miss'
+            
+            if overlay and status == 200 and get_request_token():
+                body, error = apply_overlay(body, kwargs)
+                if error:
+                    return error
+            
+            response = app.response_class(body, status=status, mimetype='application/json')
+            response.headers['X-Cache'] = state.upper()
+            return response
+        return decorated_function
+    return decorator
+
+# ============ CONDITIONAL REQUESTS ============
+
+# Cache-Control per route; course pages are revalidated on every use since
+# their 304 path is a single primary key lookup
+CACHE_CONTROL_POLICIES = {
+    'courses': 'public, max-age=60',
+    'course': 'public, no-cache',
+    'opportunities': 'public, max-age=30',
+    'portfolios': 'public, max-age=30'
+}
+
+def fetch_validator(query, params=()):
+    """Run a validator query; the first column is the UNIX time of the last change.
+    A connection checked out just for the validator goes straight back to the pool,
+    so requests answered from the cache (or waiting on single-flight) don't hold one."""
+    checked_out = g.db.checked_out
+    try:
+        cursor = g.db.cursor()
+        cursor.execute(query, params)
+        row = cursor.fetchone()
+        cursor.close()
+    finally:
+        if not checked_out:
+            g.db.close()
+    return row
+
+def course_validator(course_id):
+    # enrolled_count changes also move updated_at (ON UPDATE CURRENT_TIMESTAMP);
+    # the course image's variants are part of the response too
+    return fetch_validator(f"""
+    SELECT GREATEST(UNIX_TIMESTAMP(c.updated_at), COALESCE(UNIX_TIMESTAMP(ib.variants_at), 0)), c.enrolled_count
+    FROM courses c
+    LEFT JOIN media_blobs ib ON ib.hash = {media_hash_sql('c.image')}
+    WHERE c.id = %s
+    """, (course_id,))
+
+# Listings embed image srcset maps and media metadata, so finished variants and probes count as a change
+MEDIA_CHANGED_SQL = """(SELECT GREATEST(COALESCE(UNIX_TIMESTAMP(MAX(variants_at)), 0),
+                                  COALESCE(UNIX_TIMESTAMP(MAX(metadata_at)), 0)) FROM media_blobs)"""
+
+# updated_at has microsecond precision and every counter update moves it (the
+# counter triggers and enroll_in_course update the row), so MAX(updated_at) from
+# idx_updated_at plus COUNT(*) for deletes identifies a listing version without
+# scanning the rows
+
+def courses_validator():
+    return fetch_validator(f"""
+    SELECT GREATEST(COALESCE(UNIX_TIMESTAMP(MAX(updated_at)), 0), {MEDIA_CHANGED_SQL}),
+           COUNT(*)
+    FROM courses
+    """)
+
+def opportunities_validator():
+    # Counting only open opportunities also catches deadlines passing. Applications
+    # are only ever inserted (deletes cascade from their user or opportunity), so
+    # the newest id tracks applicationsCount; both lookups are index-only.
+    return fetch_validator("""
+    SELECT GREATEST(COALESCE(UNIX_TIMESTAMP(MAX(o.updated_at)), 0),
+                    COALESCE((SELECT UNIX_TIMESTAMP(MAX(applied_at)) FROM opportunity_applications), 0)),
+           COUNT(*),
+           (SELECT COALESCE(MAX(id), 0) FROM opportunity_applications)
+    FROM opportunities o
+    WHERE o.is_active = TRUE AND o.deadline > NOW()
+    """)
+
+def portfolios_validator():
+    # Owner renames touch the owner's portfolios (see update_profile)
+    return fetch_validator(f"""
+    SELECT GREATEST(COALESCE(UNIX_TIMESTAMP(MAX(updated_at)), 0), {MEDIA_CHANGED_SQL}),
+           COUNT(*)
+    FROM portfolios
+    """)
+
+def conditional_response(route, validator, filter_args=(), personalized=False):
+    """Answer If-None-Match / If-Modified-Since with 304 from a cheap validator query.
+    validator(**view_args) returns (last change as UNIX time, *counts) or None when
+    the resource doesn't exist. The strong ETag hashes the validator with the
+    route, its normalized arguments and, for personalized routes, the user.
+    Must wrap cached_response so cached bodies are keyed by the same validator."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not CONDITIONAL_REQUESTS_ENABLED:
+                return f(*args, **kwargs)
+            
+            try:
+                row = validator(**kwargs)
+            except Error:
+                row = None
+            if row is None:
+                return f(*args, **kwargs)
+            g.response_validator = [str(value) for value in row]
+            
+            user_id = None
+            if personalized and get_request_token():
+                payload = verify_token(get_request_token())
+                user_id = payload['user_id'] if payload else 0
+            raw = json.dumps([route, sorted(kwargs.items()), response_cache_filters(filter_args),
+                              user_id, g.response_validator], default=str)
+            etag = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+            last_modified = None
+            if row[0]:
+                last_modified = datetime.datetime.fromtimestamp(int(row[0]), tz=datetime.timezone.utc)
+            
+            # If-Modified-Since is only consulted when no If-None-Match was sent
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            elif request.if_modified_since and last_modified:
+                not_modified = last_modified <= request.if_modified_since
+            else:
+                not_modified = False
+            
+            if not_modified:
+                response = app.response_class(status=304)
+            else:
+                response = app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            if personalized:
+                response.headers['Cache-Control'] = 'private, no-cache' if user_id is not None else CACHE_CONTROL_POLICIES[route]
+                response.vary.add('Authorization')
+            else:
+                response.headers['Cache-Control'] = CACHE_CONTROL_POLICIES[route]
+            return response
+        return decorated_function
+    return decorator
+
 # ============ AUTHENTICATION ROUTES ============
 
 @app.route('/api/auth/register', methods=['POST'])
@@ -250,6 +1540,9 @@ def register():
         user_id = cursor.lastrowid
         g.db.commit()
         cursor.close()
+        bump_entity_version('users')
+        refresh_search_index('users', 'id = %s', (user_id,))
+        suggestion_service.add_user(user_id, data['name'])
         
         # Generate token
         token = generate_token(user_id, data['userType'], data['email'])
@@ -280,6 +1573,8 @@ def register():
             'token': token
         }), 201
         
+    except PasswordHasherBusy:
+        return hasher_busy_response()
     except Error as e:
         return jsonify({'success': False, 'message': 'Database error occurred'}), 500
     except Exception as e:
@@ -310,6 +1605,7 @@ def login():
                       (datetime.datetime.now(), user['id']))
         g.db.commit()
         cursor.close()
+        invalidate_user(user['id'])
         
         # Generate token
         token = generate_token(user['id'], user['user_type'], user['email'])
@@ -349,6 +1645,8 @@ def login():
             'token': token
         }), 200
         
+    except PasswordHasherBusy:
+        return hasher_busy_response()
     except Error as e:
         return jsonify({'success': False, 'message': 'Database error occurred'}), 500
     except Exception as e:
@@ -378,6 +1676,7 @@ def social_login():
                           (datetime.datetime.now(), user['id']))
             g.db.commit()
             cursor.close()
+            invalidate_user(user['id'])
             
             token = generate_token(user['id'], user['user_type'], user['email'])
             
@@ -445,6 +1744,9 @@ def social_login():
             user_id = cursor.lastrowid
             g.db.commit()
             cursor.close()
+            bump_entity_version('users')
+            refresh_search_index('users', 'id = %s', (user_id,))
+            suggestion_service.add_user(user_id, data['name'])
             
             # Generate token
             token = generate_token(user_id, data.get('userType', 'filmmaker'), data['email'])
@@ -575,8 +1877,23 @@ def update_profile():
         
         cursor = g.db.cursor()
         cursor.execute(update_query, update_values)
+        if 'name' in data:
+            # Portfolio listings embed the owner's name; moves their ETag validator
+            cursor.execute("UPDATE portfolios SET updated_at = CURRENT_TIMESTAMP(6) WHERE user_id = %s", (user_id,))
         g.db.commit()
         cursor.close()
+        invalidate_user(user_id)
+        if 'name' in data:
+            # Cached portfolio search results and counts carry the owner's name
+            bump_entity_version('users', 'portfolios')
+        else:
+            bump_entity_version('users')
+        refresh_search_index('users', 'id = %s', (user_id,))
+        if 'name' in data:
+            # Portfolio results carry the owner's name
+            refresh_search_index('portfolios', 'p.user_id = %s', (user_id,))
+            response_cache.invalidate('portfolios')
+            suggestion_service.add_user(user_id, data['name'], g.current_user['followers'] or 0)
         
         return jsonify({'success': True, 'message': 'Profile updated successfully'}), 200
         
@@ -587,7 +1904,25 @@ def update_profile():
 
 # ============ COURSE ROUTES ============
 
+def adjust_enrolled_count(cursor, course_id, delta):
+    """Update the denormalized enrollment counter; call inside the enrollment transaction"""
+    cursor.execute(
+        "UPDATE courses SET enrolled_count = GREATEST(enrolled_count + %s, 0) WHERE id = %s",
+        (delta, course_id)
+    )
+
+def process_course_row(course):
+    """Shape a courses row for the API"""
+    # Parse instructor and lessons JSON
+    decode_json_columns('courses', course)
+    
+    course['enrolledStudents'] = course['enrolled_count']
+    course['imageSrcset'] = variant_srcset(joined_blob_json(course, 'image', 'variants'))
+    del course['enrolled_count']
+
 @app.route('/api/courses', methods=['GET'])
+@conditional_response('courses', courses_validator, filter_args=('category', 'level', 'search'))
+@cached_response('courses', filter_args=('category', 'level', 'search'), tags=('courses',))
 def get_courses():
     """Get all courses with optional filtering"""
     try:
@@ -599,6 +1934,13 @@ def get_courses():
         limit = int(request.args.get('limit', 10))
         offset = (page - 1) * limit
         
+        # Keyset pagination is opt-in via the cursor parameter
+        page_cursor = request.args.get('cursor')
+        try:
+            seek = decode_cursor(page_cursor)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+        
         # Build query
         where_conditions = []
         params = []
@@ -615,59 +1957,62 @@ def get_courses():
             where_conditions.append("(title LIKE %s OR description LIKE %s)")
             params.extend([f'%{search}%', f'%{search}%'])
         
+        if seek:
+            where_conditions.append("(c.created_at < %s OR (c.created_at = %s AND c.id < %s))")
+            params.extend([seek[0], seek[0], seek[1]])
+        
         where_clause = " WHERE " + " AND ".join(where_conditions) if where_conditions else ""
         
-        # Get courses
+        # Get courses (enrolled_count is maintained by enroll_in_course)
         cursor = g.db.cursor(dictionary=True)
         query = f"""
-        SELECT c.*, COUNT(ce.id) as enrolled_count
+        SELECT c.*, ib.hash AS image_hash, ib.variants AS image_variants, ib.variants_at AS image_variants_at
         FROM courses c
-        LEFT JOIN course_enrollments ce ON c.id = ce.course_id
+        LEFT JOIN media_blobs ib ON ib.hash = {media_hash_sql('c.image')}
         {where_clause}
-        GROUP BY c.id
-        ORDER BY c.created_at DESC
+        ORDER BY c.created_at DESC, c.id DESC
         LIMIT %s OFFSET %s
         """
+        count_query = f"SELECT COUNT(DISTINCT c.id) FROM courses c {where_clause}"
         
-        params.extend([limit, offset])
+        if stream_requested():
+            if page_cursor is not None:
+                cursor.close()
+                return stream_listing('courses', query, params + [limit + 1, 0], limit,
+                                      process_course_row, {}, 'created_at')
+            pagination = page_totals(cursor, 'courses', page, limit, count_query, params,
+                                     get_include_total(), 'totalCourses')
+            cursor.close()
+            return stream_listing('courses', query, params + [limit + 1, offset], limit,
+                                  process_course_row, pagination)
+        
+        # Fetch one extra row whenever hasNext can't be derived from an exact total
+        include_total = get_include_total()
+        if page_cursor is not None:
+            params.extend([limit + 1, 0])
+        elif include_total != 'exact':
+            params.extend([limit + 1, offset])
+        else:
+            params.extend([limit, offset])
         cursor.execute(query, params)
         courses = cursor.fetchall()
         
-        # Get total count
-        count_query = f"SELECT COUNT(DISTINCT c.id) FROM courses c {where_clause}"
-        cursor.execute(count_query, params[:-2])  # Exclude limit and offset
-        total_count = cursor.fetchone()['COUNT(DISTINCT c.id)']
+        if page_cursor is not None:
+            courses, pagination = keyset_page(courses, limit, 'created_at')
+        else:
+            # Get total count (cached per filter set, or skipped/estimated on request)
+            courses, pagination = offset_page(cursor, 'courses', courses, page, limit, count_query,
+                                        params[:-2], include_total, 'totalCourses')  # Exclude limit and offset
         cursor.close()
         
         # Process courses data
         for course in courses:
-            # Parse instructor JSON
-            if course['instructor']:
-                try:
-                    course['instructor'] = json.loads(course['instructor'])
-                except:
-                    course['instructor'] = {'name': 'Unknown', 'avatar': '', 'bio': ''}
-            
-            # Parse lessons JSON
-            if course['lessons']:
-                try:
-                    course['lessons'] = json.loads(course['lessons'])
-                except:
-                    course['lessons'] = []
-            
-            course['enrolledStudents'] = course['enrolled_count']
-            del course['enrolled_count']
+            process_course_row(course)
         
         return jsonify({
             'success': True,
             'courses': courses,
-            'pagination': {
-                'currentPage': page,
-                'totalPages': (total_count + limit - 1) // limit,
-                'totalCourses': total_count,
-                'hasNext': offset + limit < total_count,
-                'hasPrev': page > 1
-            }
+            'pagination': pagination
         }), 200
         
     except Error as e:
@@ -675,19 +2020,33 @@ def get_courses():
     except Exception as e:
         return jsonify({'success': False, 'message': 'An error occurred'}), 500
 
+def course_enrollment_overlay(body, course_id):
+    """Add isEnrolled for the authenticated user on top of the shared course payload"""
+    payload = verify_token(get_request_token())
+    if not payload:
+        return
+    cursor = g.db.cursor()
+    cursor.execute("""
+    SELECT id FROM course_enrollments 
+    WHERE user_id = %s AND course_id = %s
+    """, (payload['user_id'], course_id))
+    body['course']['isEnrolled'] = cursor.fetchone() is not None
+    cursor.close()
+
 @app.route('/api/courses/<int:course_id>', methods=['GET'])
+@conditional_response('course', course_validator, personalized=True)
+@cached_response('course', tags=('course:{course_id}',), overlay=course_enrollment_overlay)
 def get_course(course_id):
     """Get specific course by ID"""
     try:
         cursor = g.db.cursor(dictionary=True)
         
-        # Get course with enrollment count
-        cursor.execute("""
-        SELECT c.*, COUNT(ce.id) as enrolled_count
+        # Get course (enrolled_count is maintained by enroll_in_course)
+        cursor.execute(f"""
+        SELECT c.*, ib.hash AS image_hash, ib.variants AS image_variants, ib.variants_at AS image_variants_at
         FROM courses c
-        LEFT JOIN course_enrollments ce ON c.id = ce.course_id
+        LEFT JOIN media_blobs ib ON ib.hash = {media_hash_sql('c.image')}
         WHERE c.id = %s
-        GROUP BY c.id
         """, (course_id,))
         
         course = cursor.fetchone()
@@ -696,35 +2055,8 @@ def get_course(course_id):
             cursor.close()
             return jsonify({'success': False, 'message': 'Course not found'}), 404
         
-        # Parse instructor and lessons JSON
-        if course['instructor']:
-            try:
-                course['instructor'] = json.loads(course['instructor'])
-            except:
-                course['instructor'] = {'name': 'Unknown', 'avatar': '', 'bio': ''}
-        
-        if course['lessons']:
-            try:
-                course['lessons'] = json.loads(course['lessons'])
-            except:
-                course['lessons'] = []
-        
-        course['enrolledStudents'] = course['enrolled_count']
-        del course['enrolled_count']
-        
-        # Check if current user is enrolled (if authenticated)
-        token = request.headers.get('Authorization')
-        if token and token.startswith('Bearer '):
-            payload = verify_token(token.split(' ')[1])
-            if payload:
-                cursor.execute("""
-                SELECT id FROM course_enrollments 
-                WHERE user_id = %s AND course_id = %s
-                """, (payload['user_id'], course_id))
-                
-                enrollment = cursor.fetchone()
-                course['isEnrolled'] = enrollment is not None
-        
+        # Parse JSON columns; isEnrolled is added per user by course_enrollment_overlay
+        process_course_row(course)
         cursor.close()
         
         return jsonify({'success': True, 'course': course}), 200
@@ -759,14 +2091,17 @@ def enroll_in_course(course_id):
             cursor.close()
             return jsonify({'success': False, 'message': 'Already enrolled in this course'}), 409
         
-        # Enroll user
+        # Enroll user and bump the course counter in the same transaction
         cursor.execute("""
         INSERT INTO course_enrollments (user_id, course_id, enrolled_at, progress)
         VALUES (%s, %s, %s, %s)
         """, (user_id, course_id, datetime.datetime.now(), 0))
+        adjust_enrolled_count(cursor, course_id, 1)
         
         g.db.commit()
         cursor.close()
+        bump_entity_version('courses')
+        response_cache.invalidate('courses', f'course:{course_id}')
         
         return jsonify({'success': True, 'message': 'Successfully enrolled in course'}), 201
         
@@ -777,7 +2112,21 @@ def enroll_in_course(course_id):
 
 # ============ OPPORTUNITY ROUTES ============
 
+def process_opportunity_row(opportunity):
+    """Shape an opportunities row for the API"""
+    # Parse details JSON
+    decode_json_columns('opportunities', opportunity)
+    
+    opportunity['applicationsCount'] = opportunity['applications_count']
+    del opportunity['applications_count']
+    
+    # Format deadline
+    if opportunity['deadline']:
+        opportunity['deadline'] = opportunity['deadline'].isoformat()
+
 @app.route('/api/opportunities', methods=['GET'])
+@conditional_response('opportunities', opportunities_validator, filter_args=('type', 'category', 'location', 'search'))
+@cached_response('opportunities', filter_args=('type', 'category', 'location', 'search'), tags=('opportunities',))
 def get_opportunities():
     """Get all opportunities with optional filtering"""
     try:
@@ -790,6 +2139,13 @@ def get_opportunities():
         limit = int(request.args.get('limit', 10))
         offset = (page - 1) * limit
         
+        # Keyset pagination is opt-in via the cursor parameter
+        page_cursor = request.args.get('cursor')
+        try:
+            seek = decode_cursor(page_cursor)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+        
         # Build query
         where_conditions = ["is_active = TRUE", "deadline > %s"]
         params = [datetime.datetime.now()]
@@ -810,6 +2166,10 @@ def get_opportunities():
             where_conditions.append("(title LIKE %s OR description LIKE %s OR company LIKE %s)")
             params.extend([f'%{search}%', f'%{search}%', f'%{search}%'])
         
+        if seek:
+            where_conditions.append("(o.deadline > %s OR (o.deadline = %s AND o.id > %s))")
+            params.extend([seek[0], seek[0], seek[1]])
+        
         where_clause = " WHERE " + " AND ".join(where_conditions)
         
         # Get opportunities
@@ -820,46 +2180,49 @@ def get_opportunities():
         LEFT JOIN opportunity_applications oa ON o.id = oa.opportunity_id
         {where_clause}
         GROUP BY o.id
-        ORDER BY o.deadline ASC
+        ORDER BY o.deadline ASC, o.id ASC
         LIMIT %s OFFSET %s
         """
+        count_query = f"SELECT COUNT(DISTINCT o.id) FROM opportunities o {where_clause}"
         
-        params.extend([limit, offset])
+        if stream_requested():
+            if page_cursor is not None:
+                cursor.close()
+                return stream_listing('opportunities', query, params + [limit + 1, 0], limit,
+                                      process_opportunity_row, {}, 'deadline')
+            pagination = page_totals(cursor, 'opportunities', page, limit, count_query, params,
+                                     get_include_total(), 'totalOpportunities')
+            cursor.close()
+            return stream_listing('opportunities', query, params + [limit + 1, offset], limit,
+                                  process_opportunity_row, pagination)
+        
+        # Fetch one extra row whenever hasNext can't be derived from an exact total
+        include_total = get_include_total()
+        if page_cursor is not None:
+            params.extend([limit + 1, 0])
+        elif include_total != 'exact':
+            params.extend([limit + 1, offset])
+        else:
+            params.extend([limit, offset])
         cursor.execute(query, params)
         opportunities = cursor.fetchall()
         
-        # Get total count
-        count_query = f"SELECT COUNT(DISTINCT o.id) FROM opportunities o {where_clause}"
-        cursor.execute(count_query, params[:-2])  # Exclude limit and offset
-        total_count = cursor.fetchone()['COUNT(DISTINCT o.id)']
+        if page_cursor is not None:
+            opportunities, pagination = keyset_page(opportunities, limit, 'deadline')
+        else:
+            # Get total count (cached per filter set, or skipped/estimated on request)
+            opportunities, pagination = offset_page(cursor, 'opportunities', opportunities, page, limit, count_query,
+                                        params[:-2], include_total, 'totalOpportunities')  # Exclude limit and offset
         cursor.close()
         
         # Process opportunities data
         for opportunity in opportunities:
-            # Parse details JSON
-            if opportunity['details']:
-                try:
-                    opportunity['details'] = json.loads(opportunity['details'])
-                except:
-                    opportunity['details'] = {}
-            
-            opportunity['applicationsCount'] = opportunity['applications_count']
-            del opportunity['applications_count']
-            
-            # Format deadline
-            if opportunity['deadline']:
-                opportunity['deadline'] = opportunity['deadline'].isoformat()
+            process_opportunity_row(opportunity)
         
         return jsonify({
             'success': True,
             'opportunities': opportunities,
-            'pagination': {
-                'currentPage': page,
-                'totalPages': (total_count + limit - 1) // limit,
-                'totalOpportunities': total_count,
-                'hasNext': offset + limit < total_count,
-                'hasPrev': page > 1
-            }
+            'pagination': pagination
         }), 200
         
     except Error as e:
@@ -917,6 +2280,8 @@ def apply_to_opportunity(opportunity_id):
         
         g.db.commit()
         cursor.close()
+        bump_entity_version('opportunities')
+        response_cache.invalidate('opportunities')
         
         return jsonify({'success': True, 'message': 'Application submitted successfully'}), 201
         
@@ -927,7 +2292,34 @@ def apply_to_opportunity(opportunity_id):
 
 # ============ PORTFOLIO ROUTES ============
 
+def process_portfolio_row(portfolio):
+    """Shape a portfolios row (joined with its owner) for the API"""
+    # Parse tags JSON
+    decode_json_columns('portfolios', portfolio)
+    
+    portfolio['likesCount'] = portfolio['likes_count']
+    portfolio['commentsCount'] = portfolio['comments_count']
+    portfolio['thumbnailSrcset'] = variant_srcset(joined_blob_json(portfolio, 'thumbnail', 'variants'))
+    portfolio['videoMetadata'] = joined_blob_json(portfolio, 'video', 'metadata')
+    portfolio['user'] = {
+        'name': portfolio['user_name'],
+        'avatar': portfolio['user_avatar'],
+        'avatarSrcset': variant_srcset(joined_blob_json(portfolio, 'avatar', 'variants'))
+    }
+    
+    # Remove redundant fields
+    del portfolio['likes_count']
+    del portfolio['comments_count']
+    del portfolio['user_name']
+    del portfolio['user_avatar']
+    
+    # Format dates
+    if portfolio['created_at']:
+        portfolio['created_at'] = portfolio['created_at'].isoformat()
+
 @app.route('/api/portfolios', methods=['GET'])
+@conditional_response('portfolios', portfolios_validator, filter_args=('category', 'userId', 'search'))
+@cached_response('portfolios', filter_args=('category', 'userId', 'search'), tags=('portfolios',))
 def get_portfolios():
     """Get all portfolios with optional filtering"""
     try:
@@ -939,6 +2331,13 @@ def get_portfolios():
         limit = int(request.args.get('limit', 10))
         offset = (page - 1) * limit
         
+        # Keyset pagination is opt-in via the cursor parameter
+        page_cursor = request.args.get('cursor')
+        try:
+            seek = decode_cursor(page_cursor)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+        
         # Build query
         where_conditions = []
         params = []
@@ -955,70 +2354,68 @@ def get_portfolios():
             where_conditions.append("(title LIKE %s OR description LIKE %s)")
             params.extend([f'%{search}%', f'%{search}%'])
         
+        if seek:
+            where_conditions.append("(p.created_at < %s OR (p.created_at = %s AND p.id < %s))")
+            params.extend([seek[0], seek[0], seek[1]])
+        
         where_clause = " WHERE " + " AND ".join(where_conditions) if where_conditions else ""
         
-        # Get portfolios
+        # Get portfolios (likes_count/comments_count are kept in sync by triggers)
         cursor = g.db.cursor(dictionary=True)
         query = f"""
         SELECT p.*, u.name as user_name, u.avatar as user_avatar,
-               COUNT(DISTINCT pl.id) as likes_count,
-               COUNT(DISTINCT pc.id) as comments_count
+               tb.hash as thumbnail_hash, tb.variants as thumbnail_variants, tb.variants_at as thumbnail_variants_at,
+               ab.hash as avatar_hash, ab.variants as avatar_variants, ab.variants_at as avatar_variants_at,
+               vb.hash as video_hash, vb.metadata as video_metadata, vb.metadata_at as video_metadata_at
         FROM portfolios p
         LEFT JOIN users u ON p.user_id = u.id
-        LEFT JOIN portfolio_likes pl ON p.id = pl.portfolio_id
-        LEFT JOIN portfolio_comments pc ON p.id = pc.portfolio_id
+        LEFT JOIN media_blobs tb ON tb.hash = {media_hash_sql('p.thumbnail')}
+        LEFT JOIN media_blobs ab ON ab.hash = {media_hash_sql('u.avatar')}
+        LEFT JOIN media_blobs vb ON vb.hash = {media_hash_sql('p.video_url')}
         {where_clause}
-        GROUP BY p.id
-        ORDER BY p.created_at DESC
+        ORDER BY p.created_at DESC, p.id DESC
         LIMIT %s OFFSET %s
         """
+        count_query = f"SELECT COUNT(DISTINCT p.id) FROM portfolios p {where_clause}"
         
-        params.extend([limit, offset])
+        if stream_requested():
+            if page_cursor is not None:
+                cursor.close()
+                return stream_listing('portfolios', query, params + [limit + 1, 0], limit,
+                                      process_portfolio_row, {}, 'created_at')
+            pagination = page_totals(cursor, 'portfolios', page, limit, count_query, params,
+                                     get_include_total(), 'totalPortfolios')
+            cursor.close()
+            return stream_listing('portfolios', query, params + [limit + 1, offset], limit,
+                                  process_portfolio_row, pagination)
+        
+        # Fetch one extra row whenever hasNext can't be derived from an exact total
+        include_total = get_include_total()
+        if page_cursor is not None:
+            params.extend([limit + 1, 0])
+        elif include_total != 'exact':
+            params.extend([limit + 1, offset])
+        else:
+            params.extend([limit, offset])
         cursor.execute(query, params)
         portfolios = cursor.fetchall()
         
-        # Get total count
-        count_query = f"SELECT COUNT(DISTINCT p.id) FROM portfolios p {where_clause}"
-        cursor.execute(count_query, params[:-2])  # Exclude limit and offset
-        total_count = cursor.fetchone()['COUNT(DISTINCT p.id)']
+        if page_cursor is not None:
+            portfolios, pagination = keyset_page(portfolios, limit, 'created_at')
+        else:
+            # Get total count (cached per filter set, or skipped/estimated on request)
+            portfolios, pagination = offset_page(cursor, 'portfolios', portfolios, page, limit, count_query,
+                                        params[:-2], include_total, 'totalPortfolios')  # Exclude limit and offset
         cursor.close()
         
         # Process portfolios data
         for portfolio in portfolios:
-            # Parse tags JSON
-            if portfolio['tags']:
-                try:
-                    portfolio['tags'] = json.loads(portfolio['tags'])
-                except:
-                    portfolio['tags'] = []
-            
-            portfolio['likesCount'] = portfolio['likes_count']
-            portfolio['commentsCount'] = portfolio['comments_count']
-            portfolio['user'] = {
-                'name': portfolio['user_name'],
-                'avatar': portfolio['user_avatar']
-            }
-            
-            # Remove redundant fields
-            del portfolio['likes_count']
-            del portfolio['comments_count']
-            del portfolio['user_name']
-            del portfolio['user_avatar']
-            
-            # Format dates
-            if portfolio['created_at']:
-                portfolio['created_at'] = portfolio['created_at'].isoformat()
+            process_portfolio_row(portfolio)
         
         return jsonify({
             'success': True,
             'portfolios': portfolios,
-            'pagination': {
-                'currentPage': page,
-                'totalPages': (total_count + limit - 1) // limit,
-                'totalPortfolios': total_count,
-                'hasNext': offset + limit < total_count,
-                'hasPrev': page > 1
-            }
+            'pagination': pagination
         }), 200
         
     except Error as e:
@@ -1066,6 +2463,10 @@ def create_portfolio():
         portfolio_id = cursor.lastrowid
         g.db.commit()
         cursor.close()
+        bump_entity_version('portfolios')
+        response_cache.invalidate('portfolios')
+        refresh_search_index('portfolios', 'p.id = %s', (portfolio_id,))
+        suggestion_service.add_portfolio(portfolio_id, data['title'], parse_tags(data.get('tags')))
         
         return jsonify({
             'success': True,
@@ -1115,17 +2516,7 @@ def get_mentorships():
         # Process mentorships data
         for mentorship in mentorships:
             # Parse specialties and sessions JSON
-            if mentorship['specialties']:
-                try:
-                    mentorship['specialties'] = json.loads(mentorship['specialties'])
-                except:
-                    mentorship['specialties'] = []
-            
-            if mentorship['sessions']:
-                try:
-                    mentorship['sessions'] = json.loads(mentorship['sessions'])
-                except:
-                    mentorship['sessions'] = []
+            decode_json_columns('mentorships', mentorship)
             
             # Add user info based on relationship
             if user_type == 'mentor':
@@ -1161,6 +2552,755 @@ def get_mentorships():
     except Exception as e:
         return jsonify({'success': False, 'message': 'An error occurred'}), 500
 
+# ============ MEDIA STORAGE ============
+
+# Files are addressed by SHA-256 over the SHA-256 digests of their UPLOAD_CHUNK_SIZE
+# blocks, so direct uploads and resumable uploads (whose chunks are those blocks)
+# get the same address without reading the data twice. Changing the block size
+# changes every address.
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_COPY_BUFFER = 256 * 1024
+
+# Public names of stored files, <content hash>.<extension>, and of their
+# resized image variants, <content hash>-w<width>.<extension>
+CONTENT_ADDRESSED_NAME = re.compile(r'^[0-9a-f]{64}(-w[0-9]+)?\.[a-z0-9]+$')
+
+def content_hash(block_digests):
+    """Content address from the hex SHA-256 digests of a file's blocks, in order"""
+    return hashlib.sha256(b''.join(bytes.fromhex(digest) for digest in block_digests)).hexdigest()
+
+def split_digests(digests):
+    """Split the concatenated hex digests stored on an upload session"""
+    return [digests[i:i + 64] for i in range(0, len(digests), 64)]
+
+def save_stream(stream, path):
+    """Write a stream to path, hashing it block by block on the way.
+    Returns (content hash, size)."""
+    digests = []
+    block = hashlib.sha256()
+    block_fill = 0
+    size = 0
+    with open(path, 'wb') as out:
+        while True:
+            data = stream.read(UPLOAD_COPY_BUFFER)
+            if not data:
+                break
+            out.write(data)
+            size += len(data)
+            view = memoryview(data)
+            while view:
+                take = min(len(view), UPLOAD_CHUNK_SIZE - block_fill)
+                block.update(view[:take])
+                block_fill += take
+                view = view[take:]
+                if block_fill == UPLOAD_CHUNK_SIZE:
+                    digests.append(block.hexdigest())
+                    block = hashlib.sha256()
+                    block_fill = 0
+    if block_fill or not digests:
+        digests.append(block.hexdigest())
+    return content_hash(digests), size
+
+def blob_path(digest):
+    """Sharded location of a blob: <MEDIA_BLOB_FOLDER>/ab/cd/abcd..."""
+    return os.path.join(MEDIA_BLOB_FOLDER, digest[:2], digest[2:4], digest)
+
+def store_upload(connection, temp_path, digest, size, user_id, filename, keep_source=False, statements=()):
+    """Move a fully written temp file into the blob store and record a logical upload.
+    Identical content is stored once; every logical upload is counted in
+    media_blobs.ref_count. The public file <hash>.<ext> in UPLOAD_FOLDER is a
+    hard link to the blob. statements, (sql, params) pairs, commit in the same
+    transaction. On failure everything is rolled back and the temp file is
+    removed, or left in place with keep_source so the caller can retry.
+    Returns (upload id, public name, deduplicated)."""
+    extension = filename.rsplit('.', 1)[1].lower()
+    public_name = f'{digest}.{extension}'
+    upload_id = secrets.token_hex(16)
+    
+    # The uncommitted blob row stays locked until the files are in place, which
+    # holds off a concurrent GC (and uploads of the same content) until then
+    cursor = connection.cursor()
+    path = blob_path(digest)
+    moved = False
+    created = []
+    try:
+        cursor.execute("""
+        INSERT INTO media_blobs (hash, size, ref_count) VALUES (%s, %s, 1)
+        ON DUPLICATE KEY UPDATE ref_count = ref_count + 1
+        """, (digest, size))
+        cursor.execute("""
+        INSERT INTO media_uploads (id, user_id, blob_hash, filename, public_name)
+        VALUES (%s, %s, %s, %s, %s)
+        """, (upload_id, user_id, digest, secure_filename(filename) or public_name, public_name))
+        for statement, params in statements:
+            cursor.execute(statement, params)
+        
+        deduplicated = os.path.exists(path)
+        if not deduplicated:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+            moved = True
+        
+        public_path = os.path.join(UPLOAD_FOLDER, public_name)
+        if not os.path.exists(public_path):
+            try:
+                os.link(path, public_path)
+                created.append(public_path)
+            except FileExistsError:
+                pass
+            except OSError:
+                # Filesystems without hard links get a copy
+                created.append(public_path)
+                shutil.copyfile(path, public_path)
+        
+        connection.commit()
+    except Exception:
+        # No rows without files and no files without rows
+        connection.rollback()
+        for leftover in created:
+            try:
+                os.remove(leftover)
+            except FileNotFoundError:
+                pass
+        if moved and keep_source:
+            os.replace(path, temp_path)
+        elif moved or not keep_source:
+            try:
+                os.remove(path if moved else temp_path)
+            except FileNotFoundError:
+                pass
+        raise
+    finally:
+        cursor.close()
+    
+    if deduplicated:
+        # Stored already; a leftover temp file is swept with abandoned uploads
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+    return upload_id, public_name, deduplicated
+
+def collect_orphaned_blobs(connection, grace=None):
+    """Delete blobs no logical upload refers to, with their public links.
+    Reference counts are recounted first (user deletion cascades to media_uploads).
+    Files are moved aside before the row is deleted and restored if an upload
+    referenced the blob meanwhile. Returns the number of blobs removed."""
+    grace = MEDIA_GC_GRACE if grace is None else grace
+    cursor = connection.cursor()
+    cursor.execute("""
+    UPDATE media_blobs b
+    SET ref_count = (SELECT COUNT(*) FROM media_uploads u WHERE u.blob_hash = b.hash)
+    WHERE b.updated_at < NOW() - INTERVAL %s SECOND
+    """, (grace,))
+    connection.commit()
+    
+    cursor.execute(
+        "SELECT hash FROM media_blobs WHERE ref_count = 0 AND updated_at < NOW() - INTERVAL %s SECOND",
+        (grace,)
+    )
+    candidates = [row[0] for row in cursor.fetchall()]
+    
+    # Blob files without any row (e.g. rows removed by hand)
+    cutoff = time.time() - grace
+    for root, _, files in os.walk(MEDIA_BLOB_FOLDER):
+        for name in files:
+            if len(name) == 64 and os.stat(os.path.join(root, name)).st_mtime < cutoff:
+                cursor.execute("SELECT hash FROM media_blobs WHERE hash = %s", (name,))
+                if cursor.fetchone() is None:
+                    candidates.append(name)
+    
+    public_links = {}
+    for entry in os.scandir(UPLOAD_FOLDER):
+        if CONTENT_ADDRESSED_NAME.match(entry.name):
+            public_links.setdefault(entry.name[:64], []).append(entry.path)
+    
+    removed = 0
+    for digest in candidates:
+        links = [blob_path(digest)] + public_links.get(digest, [])
+        moved = []
+        for link in links:
+            if os.path.exists(link):
+                os.replace(link, link + '.gc')
+                moved.append(link)
+        
+        try:
+            cursor.execute(
+                "DELETE FROM media_blobs WHERE hash = %s AND ref_count = 0 AND updated_at < NOW() - INTERVAL %s SECOND",
+                (digest, grace)
+            )
+            connection.commit()
+            cursor.execute("SELECT hash FROM media_blobs WHERE hash = %s", (digest,))
+            orphaned = cursor.fetchone() is None
+        except Error:
+            # Still referenced by media_uploads
+            connection.rollback()
+            orphaned = False
+        
+        for link in moved:
+            if orphaned:
+                os.remove(link + '.gc')
+            else:
+                os.replace(link + '.gc', link)
+        if orphaned:
+            removed += 1
+    
+    cursor.close()
+    return removed
+
+def media_storage_stats(cursor):
+    cursor.execute("""
+    SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(size * ref_count), 0) FROM media_blobs
+    """)
+    blobs, stored_bytes, logical_bytes = cursor.fetchone()
+    return {
+        'blobs': blobs,
+        'storedBytes': int(stored_bytes),
+        'logicalBytes': int(logical_bytes),
+        'savedBytes': int(logical_bytes) - int(stored_bytes)
+    }
+
+# ============ IMAGE VARIANTS ============
+
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+
+# (mimetype, extension, Pillow format, save options) of every variant width
+VARIANT_FORMATS = [
+    ('image/webp', 'webp', 'WEBP', {'method': 4}),
+    ('image/jpeg', 'jpg', 'JPEG', {'optimize': True, 'progressive': True})
+]
+VARIANT_RETRY_DELAY = 2  # Seconds before the first retry, doubled for each further attempt
+
+def media_hash_sql(column):
+    """SQL expression for the content hash in an /uploads/<hash>.<ext> URL column,
+    for joining media_blobs on its primary key"""
+    return f"SUBSTRING_INDEX(SUBSTRING_INDEX({column}, '/', -1), '.', 1)"
+
+def render_variants(source_path, digest, widths, quality):
+    """Write resized WebP and JPEG copies of an image next to its public file.
+    Runs in a worker process. Images are never upscaled, so small images get
+    fewer (or no) variants. Returns {mimetype: [[width, public name], ...]}."""
+    with Image.open(source_path) as image:
+        # EXIF orientations 5-8 display the image rotated by 90 degrees
+        rotated = image.getexif().get(0x0112) in (5, 6, 7, 8)
+        display_width = image.height if rotated else image.width
+        targets = [width for width in widths if width < display_width]
+        if not targets:
+            return {}
+        # Let the JPEG decoder downscale while decoding when the largest variant allows it
+        scale = targets[-1] / display_width
+        image.draft('RGB', (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+        image = ImageOps.exif_transpose(image)
+        
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        image = image.convert('RGBA' if has_alpha else 'RGB')  # GIFs keep their first frame
+        if has_alpha:
+            opaque = Image.new('RGB', image.size, (255, 255, 255))
+            opaque.paste(image, mask=image.getchannel('A'))
+        else:
+            opaque = image
+        
+        variants = {mimetype: [] for mimetype, _, _, _ in VARIANT_FORMATS}
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            for mimetype, extension, image_format, options in VARIANT_FORMATS:
+                source = image if image_format == 'WEBP' else opaque
+                name = f'{digest}-w{width}.{extension}'
+                temp_path = os.path.join(UPLOAD_TMP_FOLDER, f'{secrets.token_hex(16)}.variant')
+                source.resize((width, height), Image.LANCZOS).save(
+                    temp_path, image_format, quality=quality, **options
+                )
+                os.replace(temp_path, os.path.join(UPLOAD_FOLDER, name))
+                variants[mimetype].append([width, name])
+        return variants
+
+def record_variants(connection, digest, variants):
+    """Store the variants of a blob; updated_at is kept so blob GC timing is unaffected"""
+    cursor = connection.cursor()
+    cursor.execute("""
+    UPDATE media_blobs SET variants = %s, variants_at = NOW(6), updated_at = updated_at
+    WHERE hash = %s
+    """, (json.dumps(variants), digest))
+    connection.commit()
+    cursor.close()
+
+def joined_blob_json(row, prefix, column):
+    """Pop a media_blobs JSON column joined into a row as <prefix>_hash,
+    <prefix>_<column> and <prefix>_<column>_at, and return its decoded value
+    (decoded once per blob version) or None"""
+    digest = row.pop(f'{prefix}_hash', None)
+    blob = {
+        'id': digest,
+        'updated_at': row.pop(f'{prefix}_{column}_at', None),
+        column: row.pop(f'{prefix}_{column}', None)
+    }
+    if digest is None or not blob[column]:
+        return None
+    return decode_json_columns('media_blobs', blob)[column]
+
+def variant_srcset(variants):
+    """srcset strings per mimetype from decoded media_blobs.variants, or None"""
+    if not variants or not any(variants.values()):
+        return None
+    return {
+        mimetype: ', '.join(f'/uploads/{name} {width}w' for width, name in entries)
+        for mimetype, entries in variants.items()
+    }
+
+class ImageVariantPipeline:
+    """Generates image variants on a process pool with a bounded queue and retries"""
+
+    def __init__(self, workers=2, max_queue=100, retries=3, widths=(320, 640, 1280), quality=80):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retries = retries
+        self.widths = list(widths)
+        self.quality = quality
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + max_queue)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._retried = 0
+        self._rejected = 0
+
+    @property
+    def available(self):
+        return Image is not None and self.workers > 0
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # Started on first use so scripts importing server don't fork workers
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def submit(self, digest):
+        """Queue an image blob; returns False when it is left for the backfill instead"""
+        if not self.available:
+            return False
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            return False
+        
+        with self._lock:
+            self._pending += 1
+        self._attempt(digest, 1)
+        return True
+
+    def _attempt(self, digest, attempt):
+        try:
+            future = self._pool().submit(render_variants, blob_path(digest), digest, self.widths, self.quality)
+        except Exception as e:
+            self._failed_attempt(digest, attempt, e)
+            return
+        future.add_done_callback(lambda done: self._finished(done, digest, attempt))
+
+    def _finished(self, future, digest, attempt):
+        connection = None
+        try:
+            variants = future.result()
+            connection = db_pool.connect()
+            record_variants(connection, digest, variants)
+        except Exception as e:
+            self._failed_attempt(digest, attempt, e)
+            return
+        finally:
+            if connection is not None:
+                connection.close()
+        
+        # Cached listings were built without the new srcset maps
+        response_cache.invalidate('courses', 'portfolios')
+        self._done(True)
+
+    def _failed_attempt(self, digest, attempt, error):
+        if isinstance(error, BrokenProcessPool):
+            # A worker died (e.g. out of memory); later attempts get a fresh pool
+            with self._lock:
+                self._executor = None
+        if attempt > self.retries:
+            print(f"Image variants failed for {digest}: {error}")
+            self._done(False)
+            return
+        
+        with self._lock:
+            self._retried += 1
+        timer = threading.Timer(VARIANT_RETRY_DELAY * 2 ** (attempt - 1), self._attempt, (digest, attempt + 1))
+        timer.daemon = True
+        timer.start()
+
+    def _done(self, succeeded):
+        with self._lock:
+            self._pending -= 1
+            if succeeded:
+                self._completed += 1
+            else:
+                self._failed += 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'available': self.available,
+                'workers': self.workers,
+                'maxQueue': self.max_queue,
+                'widths': self.widths,
+                'pending': self._pending,
+                'completed': self._completed,
+                'failed': self._failed,
+                'retried': self._retried,
+                'rejected': self._rejected
+            }
+
+variant_pipeline = ImageVariantPipeline(
+    workers=MEDIA_VARIANT_WORKERS,
+    max_queue=MEDIA_VARIANT_MAX_QUEUE,
+    retries=MEDIA_VARIANT_RETRIES,
+    widths=MEDIA_VARIANT_WIDTHS,
+    quality=MEDIA_VARIANT_QUALITY
+)
+
+# ============ MEDIA METADATA ============
+
+# Files are memory-mapped and parsers only follow header structures, so probing a
+# multi-gigabyte film touches a few pages rather than reading it
+
+def iter_atoms(data, start, end):
+    """Yield (type, body start, end) of the MP4/QuickTime atoms in data[start:end]"""
+    while start + 8 <= end:
+        size, kind = struct.unpack_from('>I4s', data, start)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, start + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - start  # Extends to the end of the file
+        if size < header:
+            return
+        yield kind, start + header, min(start + size, end)
+        start += size
+
+def find_atom(data, start, end, *path):
+    """Body (start, end) of the first atom along a path of nested atom types, or None"""
+    for kind in path:
+        for child, body, child_end in iter_atoms(data, start, end):
+            if child == kind:
+                start, end = body, child_end
+                break
+        else:
+            return None
+    return start, end
+
+def probe_mp4(data):
+    """MP4 / MOV: duration from mvhd, resolution and codecs from each track"""
+    moov = find_atom(data, 0, len(data), b'moov')
+    if moov is None:
+        return {}
+    info = {'container': 'mov' if data[4:12] == b'ftypqt  ' else 'mp4'}
+    
+    mvhd = find_atom(data, *moov, b'mvhd')
+    if mvhd:
+        body = mvhd[0]
+        if data[body] == 1:
+            timescale, duration = struct.unpack_from('>IQ', data, body + 20)
+        else:
+            timescale, duration = struct.unpack_from('>II', data, body + 12)
+        if timescale:
+            info['duration'] = round(duration / timescale, 3)
+    
+    for kind, body, end in iter_atoms(data, *moov):
+        if kind != b'trak':
+            continue
+        hdlr = find_atom(data, body, end, b'mdia', b'hdlr')
+        handler = data[hdlr[0] + 8:hdlr[0] + 12] if hdlr else b''
+        stsd = find_atom(data, body, end, b'mdia', b'minf', b'stbl', b'stsd')
+        entry = stsd[0] + 8 if stsd else None  # First sample description
+        codec = data[entry + 4:entry + 8].decode('latin-1').strip() if entry else None
+        
+        if handler == b'vide' and 'width' not in info:
+            tkhd = find_atom(data, body, end, b'tkhd')
+            if tkhd:
+                offset = tkhd[0] + (52 if data[tkhd[0]] == 1 else 40)
+                a, b = struct.unpack_from('>ii', data, offset)  # Start of the display matrix
+                width, height = struct.unpack_from('>II', data, offset + 36)
+                width, height = width >> 16, height >> 16
+                if a == 0 and b != 0:
+                    # Rotated by 90 degrees (portrait phone recordings)
+                    width, height = height, width
+                info['width'], info['height'] = width, height
+            if codec:
+                info['videoCodec'] = codec
+        elif handler == b'soun' and 'audioCodec' not in info and entry:
+            info['audioCodec'] = codec
+            info['channels'] = struct.unpack_from('>H', data, entry + 24)[0]
+            info['sampleRate'] = struct.unpack_from('>I', data, entry + 32)[0] >> 16
+    return info
+
+# Matroska / WebM element IDs (with their length marker bits)
+EBML_HEADER = 0x1A45DFA3
+EBML_DOCTYPE = 0x4282
+MKV_SEGMENT = 0x18538067
+MKV_INFO = 0x1549A966
+MKV_TIMECODE_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+MKV_TRACKS = 0x1654AE6B
+MKV_TRACK_ENTRY = 0xAE
+MKV_TRACK_TYPE = 0x83
+MKV_CODEC_ID = 0x86
+MKV_VIDEO = 0xE0
+MKV_PIXEL_WIDTH = 0xB0
+MKV_PIXEL_HEIGHT = 0xBA
+MKV_AUDIO = 0xE1
+MKV_SAMPLING_FREQUENCY = 0xB5
+MKV_CHANNELS = 0x9F
+MKV_CLUSTER = 0x1F43B675
+
+def read_vint(data, pos, keep_marker=False):
+    """EBML variable-length integer at pos: (value, length); value None means unknown size"""
+    first = data[pos]
+    if first == 0:
+        raise ValueError('Invalid EBML variable-length integer')
+    length = 9 - first.bit_length()
+    value = first if keep_marker else first & ((1 << (8 - length)) - 1)
+    for i in range(1, length):
+        value = (value << 8) | data[pos + i]
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        value = None
+    return value, length
+
+def iter_elements(data, start, end):
+    """Yield (id, body start, end) of the EBML elements in data[start:end]"""
+    while start < end:
+        element_id, id_length = read_vint(data, start, keep_marker=True)
+        size, size_length = read_vint(data, start + id_length)
+        body = start + id_length + size_length
+        stop = end if size is None else min(body + size, end)
+        yield element_id, body, stop
+        start = stop
+
+def ebml_uint(data, start, end):
+    return int.from_bytes(data[start:end], 'big')
+
+def ebml_float(data, start, end):
+    return struct.unpack('>f' if end - start == 4 else '>d', data[start:end])[0]
+
+def probe_webm(data):
+    """WebM / Matroska: Segment Info for the duration, Tracks for resolution and codecs"""
+    elements = iter_elements(data, 0, len(data))
+    element_id, body, end = next(elements)
+    if element_id != EBML_HEADER:
+        return {}
+    info = {'container': 'webm'}
+    for child, child_body, child_end in iter_elements(data, body, end):
+        if child == EBML_DOCTYPE:
+            info['container'] = data[child_body:child_end].rstrip(b'\0').decode('ascii', 'replace')
+    
+    segment = next((element for element in elements if element[0] == MKV_SEGMENT), None)
+    if segment is None:
+        return info
+    timecode_scale = 1000000
+    duration = None
+    for element_id, body, end in iter_elements(data, segment[1], segment[2]):
+        if element_id == MKV_INFO:
+            for child, child_body, child_end in iter_elements(data, body, end):
+                if child == MKV_TIMECODE_SCALE:
+                    timecode_scale = ebml_uint(data, child_body, child_end)
+                elif child == MKV_DURATION:
+                    duration = ebml_float(data, child_body, child_end)
+        elif element_id == MKV_TRACKS:
+            for entry, entry_body, entry_end in iter_elements(data, body, end):
+                if entry == MKV_TRACK_ENTRY:
+                    probe_webm_track(data, entry_body, entry_end, info)
+        elif element_id == MKV_CLUSTER:
+            # Media data follows; Info and Tracks always come before it
+            break
+    if duration:
+        # Recordings from MediaRecorder often have no duration until remuxed
+        info['duration'] = round(duration * timecode_scale / 1e9, 3)
+    return info
+
+def probe_webm_track(data, start, end, info):
+    fields = {}
+    for element_id, body, element_end in iter_elements(data, start, end):
+        if element_id == MKV_TRACK_TYPE:
+            fields['type'] = ebml_uint(data, body, element_end)
+        elif element_id == MKV_CODEC_ID:
+            fields['codec'] = data[body:element_end].rstrip(b'\0').decode('ascii', 'replace')
+        elif element_id in (MKV_VIDEO, MKV_AUDIO):
+            for child, child_body, child_end in iter_elements(data, body, element_end):
+                if child == MKV_PIXEL_WIDTH:
+                    fields['width'] = ebml_uint(data, child_body, child_end)
+                elif child == MKV_PIXEL_HEIGHT:
+                    fields['height'] = ebml_uint(data, child_body, child_end)
+                elif child == MKV_SAMPLING_FREQUENCY:
+                    fields['sampleRate'] = int(ebml_float(data, child_body, child_end))
+                elif child == MKV_CHANNELS:
+                    fields['channels'] = ebml_uint(data, child_body, child_end)
+    
+    if fields.get('type') == 1 and 'width' not in info:
+        info['width'] = fields.get('width')
+        info['height'] = fields.get('height')
+        info['videoCodec'] = fields.get('codec')
+    elif fields.get('type') == 2 and 'audioCodec' not in info:
+        info['audioCodec'] = fields.get('codec')
+        info['sampleRate'] = fields.get('sampleRate', 8000)  # Matroska default
+        info['channels'] = fields.get('channels', 1)
+
+def probe_wav(data):
+    """WAV: format from the fmt chunk, duration from the data chunk size"""
+    if data[0:4] != b'RIFF' or data[8:12] != b'WAVE':
+        return {}
+    info = {'container': 'wav'}
+    start = 12
+    while start + 8 <= len(data):
+        kind, size = struct.unpack_from('<4sI', data, start)
+        body = start + 8
+        if kind == b'fmt ':
+            _, channels, sample_rate, byte_rate, _, bits = struct.unpack_from('<HHIIHH', data, body)
+            info.update({'channels': channels, 'sampleRate': sample_rate, 'bitsPerSample': bits,
+                         'bitrate': byte_rate * 8})
+        elif kind == b'data':
+            if info.get('bitrate'):
+                # Streamed recordings may leave the size at its maximum; the file length bounds it
+                size = min(size, len(data) - body)
+                info['duration'] = round(size * 8 / info['bitrate'], 3)
+            break
+        start = body + size + (size & 1)  # Chunks are word aligned
+    return info
+
+MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],  # MPEG-1 Layer III
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]  # MPEG-2 / 2.5 Layer III
+}
+MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+MP3_SYNC_SCAN = 64 * 1024  # Bytes searched for the first frame after the ID3v2 tag
+
+def mp3_frame(data, pos):
+    """Decode the MPEG audio Layer III frame header at pos, or None"""
+    if pos + 4 > len(data):
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    if data[pos] != 0xFF or b1 & 0xE0 != 0xE0:
+        return None
+    version = (b1 >> 3) & 3  # 3: MPEG-1, 2: MPEG-2, 0: MPEG-2.5
+    if version == 1 or (b1 >> 1) & 3 != 1:
+        return None
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 3
+    if bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrate = MP3_BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    samples = 1152 if version == 3 else 576
+    return {
+        'version': version,
+        'bitrate': bitrate,
+        'sampleRate': sample_rate,
+        'channels': 1 if b3 >> 6 == 3 else 2,
+        'samples': samples,
+        'length': samples // 8 * bitrate // sample_rate + ((b2 >> 1) & 1)
+    }
+
+def probe_mp3(data):
+    """MP3: first frame header, with the Xing/Info or VBRI header for VBR files"""
+    start = 0
+    if data[0:3] == b'ID3':
+        tag_size = 0
+        for byte in data[6:10]:
+            tag_size = (tag_size << 7) | (byte & 0x7F)  # Synchsafe integer
+        start = 10 + tag_size + (10 if data[5] & 0x10 else 0)
+    
+    # A frame only counts when the next one starts right after it
+    frame = None
+    limit = min(len(data), start + MP3_SYNC_SCAN)
+    pos = data.find(b'\xff', start, limit)
+    while pos != -1:
+        frame = mp3_frame(data, pos)
+        if frame and (pos + frame['length'] >= len(data) or mp3_frame(data, pos + frame['length'])):
+            break
+        frame = None
+        pos = data.find(b'\xff', pos + 1, limit)
+    if frame is None:
+        return {}
+    info = {'container': 'mp3', 'sampleRate': frame['sampleRate'], 'channels': frame['channels']}
+    
+    # Xing/Info follows the side information; VBRI sits at a fixed offset
+    side_info = (32 if frame['channels'] == 2 else 17) if frame['version'] == 3 else (17 if frame['channels'] == 2 else 9)
+    xing = pos + 4 + side_info
+    frames = audio_bytes = None
+    if data[xing:xing + 4] in (b'Xing', b'Info'):
+        flags = struct.unpack_from('>I', data, xing + 4)[0]
+        offset = xing + 8
+        if flags & 1:
+            frames = struct.unpack_from('>I', data, offset)[0]
+            offset += 4
+        if flags & 2:
+            audio_bytes = struct.unpack_from('>I', data, offset)[0]
+    elif data[pos + 36:pos + 40] == b'VBRI':
+        audio_bytes, frames = struct.unpack_from('>II', data, pos + 46)
+    
+    if frames:
+        duration = frames * frame['samples'] / frame['sampleRate']
+        info['duration'] = round(duration, 3)
+        if audio_bytes:
+            info['bitrate'] = int(audio_bytes * 8 / duration)
+    else:
+        # Constant bitrate: the audio size gives the duration
+        end = len(data) - (128 if data[-128:-125] == b'TAG' else 0)
+        info['bitrate'] = frame['bitrate']
+        info['duration'] = round((end - pos) * 8 / frame['bitrate'], 3)
+    return info
+
+MEDIA_PROBES = {'mp4': probe_mp4, 'mov': probe_mp4, 'webm': probe_webm, 'mp3': probe_mp3, 'wav': probe_wav}
+
+def probe_media(path, extension):
+    """Duration, resolution, codecs and bitrate of a video/audio file from its headers.
+    None for file types that aren't probed, {} when the headers can't be parsed."""
+    probe = MEDIA_PROBES.get(extension)
+    if probe is None:
+        return None
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return {}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            try:
+                info = probe(data)
+            except (struct.error, ValueError, IndexError, StopIteration, UnicodeDecodeError):
+                return {}
+    if info.get('duration') and 'bitrate' not in info:
+        info['bitrate'] = int(size * 8 / info['duration'])
+    return info
+
+def store_media_metadata(connection, digest, public_name, overwrite=False):
+    """Probe a stored upload and save the result on its blob; None for other file types.
+    Blobs that were probed before keep their metadata unless overwrite is set."""
+    metadata = probe_media(blob_path(digest), public_name.rsplit('.', 1)[1])
+    if metadata is not None:
+        cursor = connection.cursor()
+        cursor.execute(f"""
+        UPDATE media_blobs SET metadata = %s, metadata_at = NOW(6), updated_at = updated_at
+        WHERE hash = %s {'' if overwrite else 'AND metadata IS NULL'}
+        """, (json.dumps(metadata), digest))
+        connection.commit()
+        cursor.close()
+    return metadata
+
+def probe_stored_upload(connection, digest, public_name):
+    """store_media_metadata for an upload that is already stored: a failing probe
+    is logged and left to backfill_metadata.py instead of failing the request"""
+    try:
+        return store_media_metadata(connection, digest, public_name)
+    except Exception as e:
+        print(f"Error probing {public_name}: {e}")
+        try:
+            connection.rollback()
+        except Error:
+            pass
+        return None
+
 # ============ FILE UPLOAD ROUTES ============
 
 @app.route('/api/upload', methods=['POST'])
@@ -1177,13 +3317,18 @@ def upload_file():
             return jsonify({'success': False, 'message': 'No file selected'}), 400
         
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            # Add timestamp to filename to avoid conflicts
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_")
-            filename = f"{timestamp}{filename}"
+            # Hash while streaming to a temp file, then store it by content (duplicates share one blob)
+            temp_path = os.path.join(UPLOAD_TMP_FOLDER, f'{secrets.token_hex(16)}.upload')
+            digest, size = save_stream(file.stream, temp_path)
+            upload_id, filename, deduplicated = store_upload(
+                g.db, temp_path, digest, size, g.current_user['id'], file.filename
+            )
             
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
+            # Resized copies for srcset are generated in the background
+            if not deduplicated and filename.rsplit('.', 1)[1] in IMAGE_EXTENSIONS:
+                variant_pipeline.submit(digest)
+            # Duration, resolution etc. of videos and audio (None for other files)
+            metadata = probe_stored_upload(g.db, digest, filename)
             
             # Return file URL
             file_url = f"/uploads/{filename}"
@@ -1192,120 +3337,1537 @@ def upload_file():
                 'success': True,
                 'message': 'File uploaded successfully',
                 'fileUrl': file_url,
-                'filename': filename
+                'filename': filename,
+                'uploadId': upload_id,
+                'deduplicated': deduplicated,
+                'metadata': metadata
             }), 200
         else:
             return jsonify({'success': False, 'message': 'Invalid file type'}), 400
             
+    except Error as e:
+        return jsonify({'success': False, 'message': 'Database error occurred'}), 500
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'File upload failed'}), 500
+
+# ============ RESUMABLE UPLOAD ROUTES ============
+
+# Every chunk except the last is exactly UPLOAD_CHUNK_SIZE bytes and is sent at
+# offset = n * UPLOAD_CHUNK_SIZE with its SHA-256 in the X-Chunk-SHA256 header
+UPLOAD_CHUNK_LEASE = 600  # Seconds one request may hold a session while writing a chunk
+
+def upload_part_path(upload_id):
+    return os.path.join(UPLOAD_TMP_FOLDER, f'{upload_id}.part')
+
+def write_chunk(path, offset, stream, length):
+    """Copy length bytes of the request body into path at offset, hashing as it goes.
+    Returns (sha256 hex digest, bytes written)."""
+    hasher = hashlib.sha256()
+    written = 0
+    with open(path, 'r+b') as part:
+        part.seek(offset)
+        while written < length:
+            block = stream.read(min(UPLOAD_COPY_BUFFER, length - written))
+            if not block:
+                break
+            hasher.update(block)
+            part.write(block)
+            written += len(block)
+    return hasher.hexdigest(), written
+
+def collect_abandoned_uploads(cursor, max_age=None):
+    """Delete upload sessions idle for longer than max_age seconds with their partial
+    files, plus partial files that no longer have a session. Returns the number removed."""
+    max_age = UPLOAD_SESSION_TTL if max_age is None else max_age
+    removed = 0
+    
+    cursor.execute("SELECT id FROM upload_sessions WHERE updated_at < NOW() - INTERVAL %s SECOND", (max_age,))
+    for (upload_id,) in cursor.fetchall():
+        # Re-check idleness in the DELETE in case the upload was resumed meanwhile
+        cursor.execute(
+            "DELETE FROM upload_sessions WHERE id = %s AND updated_at < NOW() - INTERVAL %s SECOND",
+            (upload_id, max_age)
+        )
+        if cursor.rowcount:
+            removed += 1
+            try:
+                os.remove(upload_part_path(upload_id))
+            except FileNotFoundError:
+                pass
+    
+    cutoff = time.time() - max_age
+    for entry in os.scandir(UPLOAD_TMP_FOLDER):
+        if entry.stat().st_mtime >= cutoff:
+            continue
+        if entry.name.endswith(('.upload', '.variant')):
+            # Direct upload interrupted before it reached the blob store, or a variant worker that died
+            os.remove(entry.path)
+            removed += 1
+            continue
+        if not entry.name.endswith('.part'):
+            continue
+        cursor.execute("SELECT id FROM upload_sessions WHERE id = %s", (entry.name[:-len('.part')],))
+        if cursor.fetchone() is None:
+            os.remove(entry.path)
+            removed += 1
+    return removed
+
+last_upload_gc = [0.0]
+upload_gc_lock = threading.Lock()
+
+def maybe_collect_abandoned_uploads():
+    """Sweep abandoned uploads at most once per UPLOAD_GC_INTERVAL in this process"""
+    with upload_gc_lock:
+        if time.monotonic() - last_upload_gc[0] < UPLOAD_GC_INTERVAL:
+            return
+        last_upload_gc[0] = time.monotonic()
+    cursor = g.db.cursor()
+    collect_abandoned_uploads(cursor)
+    g.db.commit()
+    cursor.close()
+
+def upload_status(upload):
+    """Public view of an upload session row"""
+    return {
+        'uploadId': upload['id'],
+        'filename': upload['filename'],
+        'size': upload['total_size'],
+        'offset': upload['received_bytes'],
+        'chunkSize': UPLOAD_CHUNK_SIZE,
+        'complete': upload['received_bytes'] == upload['total_size']
+    }
+
+def get_upload_session(cursor, upload_id):
+    cursor.execute(
+        "SELECT * FROM upload_sessions WHERE id = %s AND user_id = %s",
+        (upload_id, g.current_user['id'])
+    )
+    return cursor.fetchone()
+
+@app.route('/api/uploads', methods=['POST'])
+@auth_required
+def create_upload():
+    """Start a resumable upload"""
+    try:
+        data = request.get_json() or {}
+        filename = data.get('filename', '')
+        size = data.get('size')
+        
+        if not filename or not allowed_file(filename):
+            return jsonify({'success': False, 'message': 'Invalid file type'}), 400
+        
+        if not isinstance(size, int) or size <= 0:
+            return jsonify({'success': False, 'message': 'size is required'}), 400
+        
+        if size > UPLOAD_MAX_SIZE:
+            return jsonify({'success': False, 'message': 'File is too large'}), 413
+        
+        upload_id = secrets.token_hex(16)
+        open(upload_part_path(upload_id), 'wb').close()
+        
+        cursor = g.db.cursor(dictionary=True)
+        cursor.execute("""
+        INSERT INTO upload_sessions (id, user_id, filename, total_size, received_bytes, chunk_digests)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        """, (upload_id, g.current_user['id'], filename, size, 0, ''))
+        g.db.commit()
+        upload = get_upload_session(cursor, upload_id)
+        cursor.close()
+        
+        maybe_collect_abandoned_uploads()
+        
+        return jsonify({'success': True, 'upload': upload_status(upload)}), 201
+        
+    except Error as e:
+        return jsonify({'success': False, 'message': 'Database error occurred'}), 500
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Upload could not be started'}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+@auth_required
+def get_upload(upload_id):
+    """Get the offset to resume an upload from"""
+    try:
+        cursor = g.db.cursor(dictionary=True)
+        upload = get_upload_session(cursor, upload_id)
+        cursor.close()
+        
+        if not upload:
+            return jsonify({'success': False, 'message': 'Upload not found'}), 404
+        
+        return jsonify({'success': True, 'upload': upload_status(upload)}), 200
+        
+    except Error as e:
+        return jsonify({'success': False, 'message': 'Database error occurred'}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['PUT'])
+@auth_required
+def upload_chunk(upload_id):
+    """Write one chunk of a resumable upload at ?offset="""
+    try:
+        try:
+            offset = int(request.args.get('offset', ''))
+        except ValueError:
+            return jsonify({'success': False, 'message': 'offset is required'}), 400
+        
+        checksum = request.headers.get('X-Chunk-SHA256', '').strip().lower()
+        if not checksum:
+            return jsonify({'success': False, 'message': 'X-Chunk-SHA256 header is required'}), 400
+        
+        cursor = g.db.cursor(dictionary=True)
+        upload = get_upload_session(cursor, upload_id)
+        
+        if not upload:
+            cursor.close()
+            return jsonify({'success': False, 'message': 'Upload not found'}), 404
+        
+        # Chunks are accepted strictly in order; the client resumes from the returned offset
+        if offset != upload['received_bytes']:
+            cursor.close()
+            return jsonify({'success': False, 'message': 'Unexpected offset', 'upload': upload_status(upload)}), 409
+        
+        length = min(UPLOAD_CHUNK_SIZE, upload['total_size'] - offset)
+        if length <= 0:
+            cursor.close()
+            return jsonify({'success': False, 'message': 'Upload is already complete'}), 409
+        
+        if request.content_length != length:
+            cursor.close()
+            return jsonify({'success': False, 'message': f'Chunk must be {length} bytes'}), 400
+        
+        # Claim the session so two requests can't write the same offset at once
+        cursor.execute("""
+        UPDATE upload_sessions SET lease_until = NOW() + INTERVAL %s SECOND
+        WHERE id = %s AND received_bytes = %s AND (lease_until IS NULL OR lease_until < NOW())
+        """, (UPLOAD_CHUNK_LEASE, upload_id, offset))
+        claimed = cursor.rowcount == 1
+        g.db.commit()
+        if not claimed:
+            cursor.close()
+            return jsonify({'success': False, 'message': 'Another chunk is being written'}), 409
+        
+        path = upload_part_path(upload_id)
+        digest, written = None, 0
+        try:
+            digest, written = write_chunk(path, offset, request.stream, length)
+        finally:
+            accepted = written == length and digest == checksum
+            if not accepted:
+                # Drop whatever was written past the last good chunk and release the claim
+                with open(path, 'r+b') as part:
+                    part.truncate(offset)
+                cursor.execute("UPDATE upload_sessions SET lease_until = NULL WHERE id = %s", (upload_id,))
+                g.db.commit()
+        
+        if written != length:
+            cursor.close()
+            return jsonify({'success': False, 'message': 'Chunk was incomplete'}), 400
+        
+        if digest != checksum:
+            cursor.close()
+            return jsonify({'success': False, 'message': 'Chunk checksum mismatch'}), 422
+        
+        cursor.execute("""
+        UPDATE upload_sessions
+        SET received_bytes = received_bytes + %s, chunk_digests = CONCAT(chunk_digests, %s), lease_until = NULL
+        WHERE id = %s
+        """, (length, digest, upload_id))
+        g.db.commit()
+        upload['received_bytes'] += length
+        cursor.close()
+        
+        return jsonify({'success': True, 'upload': upload_status(upload)}), 200
+        
+    except Error as e:
+        return jsonify({'success': False, 'message': 'Database error occurred'}), 500
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Chunk upload failed'}), 500
+
+@app.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+@auth_required
+def complete_upload(upload_id):
+    """Finish a resumable upload and move the file into UPLOAD_FOLDER"""
+    try:
+        cursor = g.db.cursor(dictionary=True)
+        upload = get_upload_session(cursor, upload_id)
+        
+        if not upload:
+            cursor.close()
+            return jsonify({'success': False, 'message': 'Upload not found'}), 404
+        
+        if upload['received_bytes'] != upload['total_size']:
+            cursor.close()
+            return jsonify({'success': False, 'message': 'Upload is incomplete', 'upload': upload_status(upload)}), 409
+        
+        # Claim the session so a concurrent complete backs off. It is deleted together
+        # with the stored upload, and released if storing fails so the client can retry.
+        cursor.execute("""
+        UPDATE upload_sessions SET lease_until = NOW() + INTERVAL %s SECOND
+        WHERE id = %s AND received_bytes = total_size AND (lease_until IS NULL OR lease_until < NOW())
+        """, (UPLOAD_CHUNK_LEASE, upload_id))
+        claimed = cursor.rowcount == 1
+        g.db.commit()
+        if not claimed:
+            cursor.close()
+            return jsonify({'success': False, 'message': 'Upload is already being completed'}), 409
+        
+        # The chunk digests give the content address, so finishing is a rename
+        digest = content_hash(split_digests(upload['chunk_digests']))
+        try:
+            media_id, filename, deduplicated = store_upload(
+                g.db, upload_part_path(upload_id), digest, upload['total_size'],
+                g.current_user['id'], upload['filename'], keep_source=True,
+                statements=[("DELETE FROM upload_sessions WHERE id = %s", (upload_id,))]
+            )
+        except Exception:
+            # The partial file is still in place
+            cursor.execute("UPDATE upload_sessions SET lease_until = NULL WHERE id = %s", (upload_id,))
+            g.db.commit()
+            raise
+        finally:
+            cursor.close()
+        if not deduplicated and filename.rsplit('.', 1)[1] in IMAGE_EXTENSIONS:
+            variant_pipeline.submit(digest)
+        metadata = probe_stored_upload(g.db, digest, filename)
+        
+        return jsonify({
+            'success': True,
+            'message': 'File uploaded successfully',
+            'fileUrl': f"/uploads/{filename}",
+            'filename': filename,
+            'uploadId': media_id,
+            'deduplicated': deduplicated,
+            'metadata': metadata
+        }), 200
+        
+    except Error as e:
+        return jsonify({'success': False, 'message': 'Database error occurred'}), 500
     except Exception as e:
         return jsonify({'success': False, 'message': 'File upload failed'}), 500
 
+@app.route('/api/uploads/<upload_id>', methods=['DELETE'])
+@auth_required
+def abort_upload(upload_id):
+    """Cancel a resumable upload"""
+    try:
+        cursor = g.db.cursor()
+        cursor.execute(
+            "DELETE FROM upload_sessions WHERE id = %s AND user_id = %s",
+            (upload_id, g.current_user['id'])
+        )
+        deleted = cursor.rowcount == 1
+        g.db.commit()
+        cursor.close()
+        
+        if not deleted:
+            return jsonify({'success': False, 'message': 'Upload not found'}), 404
+        
+        try:
+            os.remove(upload_part_path(upload_id))
+        except FileNotFoundError:
+            pass
+        
+        return jsonify({'success': True, 'message': 'Upload cancelled'}), 200
+        
+    except Error as e:
+        return jsonify({'success': False, 'message': 'Database error occurred'}), 500
+
 # ============ SEARCH ROUTES ============
 
+# Searchable content per category. 'columns' must match a FULLTEXT index to use MATCH ... AGAINST;
+# the in-process index also stores 'index_extra' columns for filtering
+SEARCH_SOURCES = {
+    'courses': {
+        'table': 'courses',
+        'select': """'course' as type, id, title, description, category, level, price, image,
+                   created_at""",
+        'from': 'courses',
+        'columns': ['title', 'description'],
+        'order': 'created_at DESC'
+    },
+    'opportunities': {
+        'table': 'opportunities',
+        'select': """'opportunity' as type, id, title, description, type, company, deadline,
+                   created_at""",
+        'from': 'opportunities',
+        'columns': ['title', 'description', 'company'],
+        'active_only': True,
+        'index_extra': ['is_active'],
+        'order': 'deadline ASC'
+    },
+    'portfolios': {
+        'table': 'portfolios',
+        'select': """'portfolio' as type, p.id, p.title, p.description, p.category, 
+                   p.thumbnail, p.views, p.created_at, u.name as user_name""",
+        'from': 'portfolios p LEFT JOIN users u ON p.user_id = u.id',
+        'columns': ['p.title', 'p.description'],
+        'updated_column': 'p.updated_at',
+        'order': 'p.created_at DESC'
+    },
+    'users': {
+        'table': 'users',
+        'select': """'user' as type, id, name, email, user_type, bio, location, avatar,
+                   followers, created_at""",
+        'from': 'users',
+        'columns': ['name', 'bio', 'location'],
+        'order': 'followers DESC, created_at DESC'
+    }
+}
+
+SEARCH_MODES = {
+    'natural': 'IN NATURAL LANGUAGE MODE',
+    'boolean': 'IN BOOLEAN MODE'
+}
+
+# InnoDB skips tokens shorter than innodb_ft_min_token_size (3 by default)
+FULLTEXT_MIN_TOKEN = int(os.getenv('FULLTEXT_MIN_TOKEN', '3'))
+
+# Which tables have a FULLTEXT index on the searched columns (re-checked every few minutes)
+fulltext_index_cache = TTLCache(maxsize=64, ttl=300)
+
+def has_fulltext_index(cursor, table, columns):
+    """Check whether a FULLTEXT index covers exactly the given columns"""
+    wanted = frozenset(column.split('.')[-1] for column in columns)
+    available = fulltext_index_cache.get(table)
+    if available is None:
+        cursor.execute("""
+        SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_TYPE = 'FULLTEXT'
+        """, (table,))
+        indexes = {}
+        for row in cursor.fetchall():
+            values = list(row.values()) if isinstance(row, dict) else row
+            indexes.setdefault(values[0], set()).add(values[1])
+        available = [frozenset(index_columns) for index_columns in indexes.values()]
+        fulltext_index_cache.set(table, available)
+    return wanted in available
+
+def fulltext_usable(query):
+    """FULLTEXT ignores short tokens; fall back to LIKE when nothing would match"""
+    return any(len(token) >= FULLTEXT_MIN_TOKEN for token in re.findall(r'\w+', query))
+
+def search_category(cursor, category, query, mode, limit, offset):
+    """Search one category; returns (rows, engine) where engine is 'fulltext' or 'like'"""
+    source = SEARCH_SOURCES[category]
+    where_conditions = []
+    params = []
+    select = source['select']
+    order = source['order']
+
+    if fulltext_usable(query) and has_fulltext_index(cursor, source['table'], source['columns']):
+        engine = 'fulltext'
+        match = f"MATCH({', '.join(source['columns'])}) AGAINST (%s {SEARCH_MODES[mode]})"
+        select = f"{select}, {match} AS relevance"
+        where_conditions.append(match)
+        params = [query, query]
+        order = f"relevance DESC, {order}"
+    else:
+        engine = 'like'
+        search_pattern = f'%{query}%'
+        where_conditions.append("(" + " OR ".join(f"{column} LIKE %s" for column in source['columns']) + ")")
+        params.extend([search_pattern] * len(source['columns']))
+
+    if source.get('active_only'):
+        where_conditions.append("is_active = TRUE AND deadline > %s")
+        params.append(datetime.datetime.now())
+
+    cursor.execute(f"""
+    SELECT {select}
+    FROM {source['from']}
+    WHERE {' AND '.join(where_conditions)}
+    ORDER BY {order}
+    LIMIT %s OFFSET %s
+    """, params + [limit, offset])
+    return cursor.fetchall(), engine
+
+# ============ IN-PROCESS SEARCH INDEX ============
+
+SEARCH_STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in into is it its of on or that the their
+this to was were will with
+""".split())
+
+SEARCH_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+def fold_text(text):
+    """Lowercase text and strip accents"""
+    text = unicodedata.normalize('NFKD', str(text or '').lower())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+def tokenize(text):
+    """Lowercase, strip accents and split text into index terms"""
+    if not text:
+        return []
+    return [token for token in SEARCH_TOKEN_RE.findall(fold_text(text)) if token not in SEARCH_STOPWORDS]
+
+class ReadWriteLock:
+    """Lock shared by readers and exclusive for writers; a waiting writer blocks
+    new readers so a steady stream of searches can't starve index updates"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+class InvertedIndex:
+    """BM25-ranked inverted index over the documents of one search category.
+    Besides its doc-ordered posting list, every queried term gets an impact-ordered
+    copy (documents by descending term score). Top-k queries walk those lists with
+    the threshold algorithm and stop once no unseen document can make the page, so
+    a query reads the heads of its lists instead of scoring every posting.
+    text_of(row) gives a stored row's document text; removals re-tokenize it so
+    document frequencies only count live documents."""
+
+    NORM_DRIFT = 0.02  # Relative change of the average length that triggers renormalizing
+
+    def __init__(self, text_of, k1=1.2, b=0.75):
+        self.text_of = text_of
+        self.k1 = k1
+        self.b = b
+        self._postings = {}  # term -> (array of doc numbers, array of term frequencies)
+        self._dead = Counter()  # term -> postings of tombstoned documents
+        self._doc_ids = []  # doc number -> row id, None once the document is replaced or removed
+        self._doc_lengths = array('I')
+        self._norms = array('d')  # doc number -> k1 * (1 - b + b * length / average length)
+        self._norm_average = 0.0  # Average length the norms were computed with
+        self._impacts = {}  # term -> (postings covered, doc numbers, partial scores), best first
+        self._docs = {}  # row id -> (doc number, stored row)
+        self._total_length = 0
+        self._deleted = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _norm(self, length):
+        return self.k1 * (1 - self.b + self.b * length / (self._norm_average or 1))
+
+    def _check_norms(self):
+        """Recompute the length norms once the average document length has drifted"""
+        if not self._docs:
+            return
+        average = self._total_length / len(self._docs)
+        if abs(average - self._norm_average) <= self.NORM_DRIFT * self._norm_average:
+            return
+        self._norm_average = average
+        self._norms = array('d', (self._norm(length) for length in self._doc_lengths))
+        self._impacts = {}
+
+    def get(self, row_id):
+        """The stored row of an indexed document, or None"""
+        entry = self._docs.get(row_id)
+        return entry[1] if entry else None
+
+    def add(self, row_id, row):
+        """Index a document, replacing any previous version of the same row"""
+        self.remove(row_id)
+        doc = len(self._doc_ids)
+        terms = tokenize(self.text_of(row))
+        for term, frequency in Counter(terms).items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array('I'), array('H'))
+            postings[0].append(doc)
+            postings[1].append(min(frequency, 65535))
+        self._doc_ids.append(row_id)
+        self._doc_lengths.append(len(terms))
+        self._norms.append(self._norm(len(terms)))
+        self._total_length += len(terms)
+        self._docs[row_id] = (doc, row)
+        self._check_norms()
+
+    def remove(self, row_id):
+        """Tombstone a document; posting lists are cleaned up by compact()"""
+        entry = self._docs.pop(row_id, None)
+        if entry is None:
+            return
+        doc, row = entry
+        self._doc_ids[doc] = None
+        self._total_length -= self._doc_lengths[doc]
+        self._dead.update(set(tokenize(self.text_of(row))))
+        self._deleted += 1
+        if self._deleted > 1000 and self._deleted > len(self._docs) // 4:
+            self.compact()
+        else:
+            self._check_norms()
+
+    def compact(self):
+        """Drop tombstoned documents from every posting list and renumber the rest"""
+        remap = array('i', [-1]) * len(self._doc_ids)
+        doc_ids = []
+        doc_lengths = array('I')
+        norms = array('d')
+        for doc, row_id in enumerate(self._doc_ids):
+            if row_id is not None:
+                remap[doc] = len(doc_ids)
+                doc_ids.append(row_id)
+                doc_lengths.append(self._doc_lengths[doc])
+                norms.append(self._norms[doc])
+
+        postings = {}
+        for term, (docs, frequencies) in self._postings.items():
+            new_docs = array('I')
+            new_frequencies = array('H')
+            for doc, frequency in zip(docs, frequencies):
+                if remap[doc] >= 0:
+                    new_docs.append(remap[doc])
+                    new_frequencies.append(frequency)
+            if new_docs:
+                postings[term] = (new_docs, new_frequencies)
+
+        self._postings = postings
+        self._dead = Counter()
+        self._doc_ids = doc_ids
+        self._doc_lengths = doc_lengths
+        self._norms = norms
+        self._impacts = {}
+        self._docs = {row_id: (remap[doc], row) for row_id, (doc, row) in self._docs.items()}
+        self._deleted = 0
+        self._check_norms()
+
+    def _impact_list(self, term, docs, frequencies):
+        """Impact-ordered postings of a term. Postings appended since the list was
+        built are left to the caller until they are worth a rebuild."""
+        cached = self._impacts.get(term)
+        if cached is not None and len(docs) - cached[0] <= max(256, cached[0] // 8):
+            return cached
+        norms = self._norms
+        parts = [frequency / (frequency + norms[doc]) for doc, frequency in zip(docs, frequencies)]
+        order = sorted(range(len(parts)), key=parts.__getitem__, reverse=True)
+        cached = (len(parts), array('I', [docs[i] for i in order]), array('d', [parts[i] for i in order]))
+        self._impacts[term] = cached
+        return cached
+
+    def search(self, query, limit, offset=0, predicate=None):
+        """Return the (score, row) pairs of one page of BM25-ranked matches"""
+        total_docs = len(self._docs)
+        if not total_docs:
+            return []
+
+        # (weight, docs, frequencies, impact docs, impact scores, postings covered) per term
+        terms = []
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            docs, frequencies = postings
+            doc_frequency = len(docs) - self._dead[term]
+            if not doc_frequency:
+                continue
+            idf = math.log(1 + (total_docs - doc_frequency + 0.5) / (doc_frequency + 0.5))
+            covered, impact_docs, impact_parts = self._impact_list(term, docs, frequencies)
+            terms.append((idf * (self.k1 + 1), docs, frequencies, impact_docs, impact_parts, covered))
+        if not terms:
+            return []
+
+        wanted = offset + limit
+        doc_ids = self._doc_ids
+        norms = self._norms
+        stored = self._docs
+        seen = set()
+        top = []  # Min-heap of (score, row id) of the best documents so far
+
+        bisect_left = bisect.bisect_left
+
+        def consider(doc, known=-1, known_part=0.0):
+            """Score a document; the part of term number known is already at hand"""
+            seen.add(doc)
+            row_id = doc_ids[doc]
+            if row_id is None or (predicate is not None and not predicate(stored[row_id][1])):
+                return
+            norm = norms[doc]
+            score = 0.0
+            for number, (weight, docs, frequencies, _, _, _) in enumerate(terms):
+                if number == known:
+                    score += weight * known_part
+                    continue
+                i = bisect_left(docs, doc)
+                if i < len(docs) and docs[i] == doc:
+                    frequency = frequencies[i]
+                    score += weight * (frequency / (frequency + norm))
+            if len(top) < wanted:
+                heapq.heappush(top, (score, row_id))
+            elif (score, row_id) > top[0]:
+                heapq.heapreplace(top, (score, row_id))
+
+        # Postings newer than their impact list are scored directly
+        for _, docs, _, _, _, covered in terms:
+            for doc in docs[covered:]:
+                if doc not in seen:
+                    consider(doc)
+
+        # Threshold algorithm: an unseen document scores at most the sum of the
+        # next impact in every list, so stop once the page reaches that bound (ties
+        # with the last result are interchangeable)
+        position = 0
+        while True:
+            threshold = 0.0
+            exhausted = True
+            for number, (weight, _, _, impact_docs, impact_parts, _) in enumerate(terms):
+                if position < len(impact_docs):
+                    exhausted = False
+                    doc = impact_docs[position]
+                    if doc not in seen:
+                        consider(doc, number, impact_parts[position])
+                    if position + 1 < len(impact_docs):
+                        threshold += weight * impact_parts[position + 1]
+            position += 1
+            if exhausted or (len(top) == wanted and top[0][0] >= threshold):
+                break
+
+        top.sort(reverse=True)
+        return [(score, stored[row_id][1]) for score, row_id in top[offset:]]
+
+    def rows(self):
+        return [row for _, row in self._docs.values()]
+
+    def stats(self):
+        return {
+            'documents': len(self._docs),
+            'terms': len(self._postings),
+            'tombstones': self._deleted
+        }
+
+class SearchIndex:
+    """In-memory search engine over SEARCH_SOURCES. Write endpoints update the worker
+    that served them; every worker also catches up on rows updated elsewhere every
+    SEARCH_INDEX_REFRESH_INTERVAL seconds."""
+
+    SNAPSHOT_VERSION = 1
+    CATCH_UP_SLACK = datetime.timedelta(minutes=1)  # Rows committed a little after their updated_at
+
+    def __init__(self, snapshot_path):
+        self.snapshot_path = snapshot_path
+        self.indexes = self._empty_indexes()
+        self.ready = False
+        self.built_at = None
+        self.dirty = False
+        self._lock = ReadWriteLock()  # Guards the indexes: searches share it, updates take it alone
+        self._state_lock = threading.Lock()
+        self._synced_at = None  # Database time at the start of the last pass over SEARCH_SOURCES
+        self._started = False
+        self._caught_up = 0
+        self._queries = 0
+        self._query_time = 0.0
+
+    # -- loading --
+
+    def _source_query(self, category, where=''):
+        source = SEARCH_SOURCES[category]
+        extra = ''.join(f", {column}" for column in source.get('index_extra', []))
+        return f"SELECT {source['select']}{extra} FROM {source['from']} {where}"
+
+    def _document_text(self, category, row):
+        return ' '.join(str(row.get(column.split('.')[-1]) or '') for column in SEARCH_SOURCES[category]['columns'])
+
+    def _empty_indexes(self):
+        return {category: InvertedIndex(partial(self._document_text, category)) for category in SEARCH_SOURCES}
+
+    def _upsert(self, category, row):
+        self.indexes[category].add(row['id'], row)
+
+    def refresh(self, cursor, category, where, params):
+        """Re-read rows matching an SQL condition and re-index them"""
+        cursor.execute(self._source_query(category, f"WHERE {where}"), params)
+        rows = cursor.fetchall()
+        with self._lock.write():
+            for row in rows:
+                self._upsert(category, row)
+            self.dirty = True
+        return len(rows)
+
+    def build_from_database(self, connection, since=None):
+        """Index every row (or rows updated after since) streaming from MySQL.
+        Rows identical to the indexed version are skipped; returns how many changed."""
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("SELECT NOW() AS now")
+        synced_at = cursor.fetchone()['now']
+        changed = 0
+        for category, source in SEARCH_SOURCES.items():
+            index = self.indexes[category]
+            where, params = '', ()
+            if since is not None:
+                where, params = f"WHERE {source.get('updated_column', 'updated_at')} > %s", (since,)
+            cursor.execute(self._source_query(category, where), params)
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                with self._lock.write():
+                    for row in rows:
+                        if index.get(row['id']) != row:
+                            self._upsert(category, row)
+                            changed += 1
+        cursor.close()
+        self._synced_at = synced_at
+        return changed
+
+    def load_snapshot(self):
+        """Rebuild the index from the snapshot file; returns the snapshot time or None"""
+        if not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, 'rb') as snapshot_file:
+                snapshot = pickle.load(snapshot_file)
+            if snapshot.get('version') != self.SNAPSHOT_VERSION:
+                return None
+            with self._lock.write():
+                for category, rows in snapshot['rows'].items():
+                    if category in self.indexes:
+                        for row in rows:
+                            self._upsert(category, row)
+            return snapshot['built_at']
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError, TypeError, ValueError) as e:
+            # A damaged snapshot is dropped and the index rebuilt from MySQL
+            print(f"Ignoring unreadable search index snapshot {self.snapshot_path}: {e}")
+            with self._lock.write():
+                self.indexes = self._empty_indexes()
+            try:
+                os.remove(self.snapshot_path)
+            except OSError:
+                pass
+            return None
+
+    def save_snapshot(self):
+        """Write all indexed rows to the snapshot file atomically. Each writer uses
+        its own temp file, so workers saving at the same time can't interleave."""
+        with self._lock.read():
+            snapshot = {
+                'version': self.SNAPSHOT_VERSION,
+                'built_at': datetime.datetime.now(),
+                'rows': {category: index.rows() for category, index in self.indexes.items()}
+            }
+            self.dirty = False
+        directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.search-index-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as snapshot_file:
+                pickle.dump(snapshot, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.snapshot_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def warm_up(self):
+        """Load the snapshot, catch up on rows changed since, and mark the index ready"""
+        started = time.monotonic()
+        try:
+            built_at = self.load_snapshot()
+            connection = db_pool.connect()
+            try:
+                # Rows changed while the snapshot was on disk (with slack for clock skew)
+                since = built_at - datetime.timedelta(minutes=5) if built_at else None
+                self.build_from_database(connection, since=since)
+            finally:
+                connection.close()
+            self.built_at = datetime.datetime.now()
+            self.ready = True
+            self.save_snapshot()
+            print(f"Search index ready in {time.monotonic() - started:.1f}s")
+        except Exception as e:
+            print(f"Error building search index: {e}")
+            with self._state_lock:
+                self._started = False
+            return False
+        return True
+
+    def catch_up(self):
+        """Re-index rows updated since the last pass, whichever worker wrote them.
+        Deleted rows aren't seen here; they drop out on the next full build."""
+        connection = db_pool.connect()
+        try:
+            changed = self.build_from_database(connection, since=self._synced_at - self.CATCH_UP_SLACK)
+        finally:
+            connection.close()
+        if changed:
+            self.dirty = True
+            with self._state_lock:
+                self._caught_up += changed
+        return changed
+
+    def _run(self):
+        if not self.warm_up() or SEARCH_INDEX_REFRESH_INTERVAL <= 0:
+            return
+        while True:
+            time.sleep(SEARCH_INDEX_REFRESH_INTERVAL)
+            try:
+                self.catch_up()
+            except Exception as e:
+                print(f"Error refreshing search index: {e}")
+
+    def ensure_started(self):
+        """Start warming up (then catching up periodically) in the background on first use"""
+        with self._state_lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._run, name='search-index', daemon=True).start()
+
+    # -- querying --
+
+    def search(self, category, query, limit, offset):
+        source = SEARCH_SOURCES[category]
+        predicate = None
+        if source.get('active_only'):
+            now = datetime.datetime.now()
+            predicate = lambda row: row.get('is_active') and row.get('deadline') and row['deadline'] > now
+
+        started = time.perf_counter()
+        with self._lock.read():
+            matches = self.indexes[category].search(query, limit, offset, predicate)
+        with self._state_lock:
+            self._queries += 1
+            self._query_time += time.perf_counter() - started
+
+        hidden = source.get('index_extra', [])
+        results = []
+        for score, row in matches:
+            result = {key: value for key, value in row.items() if key not in hidden}
+            result['relevance'] = round(score, 4)
+            results.append(result)
+        return results
+
+    def stats(self):
+        with self._lock.read(), self._state_lock:
+            return {
+                'backend': SEARCH_BACKEND,
+                'ready': self.ready,
+                'builtAt': self.built_at.isoformat() if self.built_at else None,
+                'syncedAt': self._synced_at.isoformat() if self._synced_at else None,
+                'caughtUp': self._caught_up,
+                'queries': self._queries,
+                'avgQueryMs': round(self._query_time / self._queries * 1000, 3) if self._queries else 0.0,
+                'categories': {category: index.stats() for category, index in self.indexes.items()}
+            }
+
+search_index = SearchIndex(SEARCH_INDEX_SNAPSHOT)
+
+@atexit.register
+def save_search_index():
+    """Persist index changes on shutdown so the next start only catches up"""
+    if search_index.ready and search_index.dirty:
+        try:
+            search_index.save_snapshot()
+        except Exception as e:
+            print(f"Error saving search index snapshot: {e}")
+
+def refresh_search_index(category, where, params):
+    """Re-index rows changed by a write endpoint (memory backend only)"""
+    if SEARCH_BACKEND != 'memory':
+        return
+    try:
+        cursor = g.db.cursor(dictionary=True)
+        search_index.refresh(cursor, category, where, params)
+        cursor.close()
+    except Error as e:
+        print(f"Error refreshing search index: {e}")
+
+# ============ SEARCH SUGGESTIONS ============
+
+def normalize_phrase(text):
+    """Fold a title or name into the lowercase, accent-free form used for prefix matching"""
+    return ' '.join(SEARCH_TOKEN_RE.findall(fold_text(text)))
+
+class PrefixIndex:
+    """Sorted-array prefix index returning the most popular completions of a prefix"""
+
+    def __init__(self, max_results=20):
+        self.max_results = max_results
+        self._keys = []  # sorted normalized keys
+        self._refs = []  # parallel to _keys: (kind, ref) of the suggestion
+        self._entries = {}  # (kind, ref) -> {'text', 'type', 'id', 'weight', 'keys'}
+        self._cache = {}  # prefix -> top completions, dropped when a key under it changes
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _keys_for(text):
+        """Every word suffix of the phrase, so 'grading' completes 'Color Grading'"""
+        words = normalize_phrase(text).split()[:6]
+        return sorted({' '.join(words[i:]) for i in range(len(words))
+                       if i == 0 or words[i] not in SEARCH_STOPWORDS})
+
+    def _forget_prefixes(self, key):
+        for length in range(1, len(key) + 1):
+            self._cache.pop(key[:length], None)
+
+    def remove(self, kind, ref):
+        with self._lock:
+            entry = self._entries.pop((kind, ref), None)
+            if entry is None:
+                return
+            for key in entry['keys']:
+                position = bisect.bisect_left(self._keys, key)
+                while position < len(self._keys) and self._keys[position] == key:
+                    if self._refs[position] == (kind, ref):
+                        del self._keys[position]
+                        del self._refs[position]
+                        break
+                    position += 1
+                self._forget_prefixes(key)
+
+    def add(self, kind, ref, text, weight, suggestion_id=None):
+        """Insert or replace a suggestion"""
+        keys = self._keys_for(text)
+        if not keys:
+            return
+        with self._lock:
+            self.remove(kind, ref)
+            self._entries[(kind, ref)] = {
+                'text': text,
+                'type': kind,
+                'id': suggestion_id,
+                'weight': weight,
+                'keys': keys
+            }
+            for key in keys:
+                position = bisect.bisect_right(self._keys, key)
+                self._keys.insert(position, key)
+                self._refs.insert(position, (kind, ref))
+                self._forget_prefixes(key)
+
+    def load(self, suggestions):
+        """Replace the whole index from (kind, ref, text, weight, id) tuples"""
+        entries = {}
+        pairs = []
+        for kind, ref, text, weight, suggestion_id in suggestions:
+            keys = self._keys_for(text)
+            if not keys:
+                continue
+            entries[(kind, ref)] = {'text': text, 'type': kind, 'id': suggestion_id, 'weight': weight, 'keys': keys}
+            pairs.extend((key, (kind, ref)) for key in keys)
+        pairs.sort()
+        with self._lock:
+            self._entries = entries
+            self._keys = [key for key, _ in pairs]
+            self._refs = [ref for _, ref in pairs]
+            self._cache = {}
+
+    def complete(self, prefix, limit, budget=None):
+        """Top completions by weight; returns (suggestions, truncated).
+        When budget (seconds) runs out, the best matches scanned so far are returned."""
+        prefix = normalize_phrase(prefix)
+        if not prefix:
+            return [], False
+        limit = min(limit, self.max_results)
+
+        with self._lock:
+            cached = self._cache.get(prefix)
+            if cached is not None:
+                return cached[:limit], False
+
+            started = time.perf_counter()
+            low = bisect.bisect_left(self._keys, prefix)
+            high = bisect.bisect_left(self._keys, prefix + '\uffff')
+            best = {}
+            truncated = False
+            for chunk_start in range(low, high, 2048):
+                for ref in self._refs[chunk_start:min(chunk_start + 2048, high)]:
+                    if ref not in best:
+                        best[ref] = self._entries[ref]['weight']
+                if budget is not None and time.perf_counter() - started > budget:
+                    truncated = chunk_start + 2048 < high
+                    break
+
+            top = heapq.nlargest(self.max_results, best.items(), key=lambda item: item[1])
+            suggestions = [
+                {key: self._entries[ref][key] for key in ('text', 'type', 'id')}
+                for ref, _ in top
+            ]
+            if not truncated:
+                self._cache[prefix] = suggestions
+            return suggestions[:limit], truncated
+
+    def warm(self, max_length=2):
+        """Precompute completions for short prefixes, which have the largest ranges"""
+        prefixes = {key[:length] for key in set(self._keys) for length in range(1, max_length + 1)}
+        for prefix in prefixes:
+            self.complete(prefix, self.max_results)
+
+    def stats(self):
+        with self._lock:
+            return {'suggestions': len(self._entries), 'keys': len(self._keys), 'cachedPrefixes': len(self._cache)}
+
+class SuggestionService:
+    """Keeps the PrefixIndex loaded from MySQL in the background; requests never query the database"""
+
+    def __init__(self):
+        self.index = PrefixIndex(max_results=SUGGEST_MAX_RESULTS)
+        self.ready = False
+        self.loaded_at = None
+        self._tag_weights = Counter()
+        self._lock = threading.Lock()
+        self._started = False
+        self._requests = 0
+        self._truncated = 0
+
+    def load(self):
+        """Rebuild all suggestions with popularity weights"""
+        connection = db_pool.connect()
+        try:
+            cursor = connection.cursor(dictionary=True)
+            suggestions = []
+
+            cursor.execute("SELECT id, title, enrolled_count FROM courses")
+            for row in cursor.fetchall():
+                suggestions.append(('course', row['id'], row['title'], row['enrolled_count'] or 0, row['id']))
+
+            cursor.execute("""
+            SELECT id, title, company FROM opportunities
+            WHERE is_active = TRUE AND deadline > %s
+            """, (datetime.datetime.now(),))
+            companies = Counter()
+            for row in cursor.fetchall():
+                suggestions.append(('opportunity', row['id'], row['title'], 0, row['id']))
+                if row['company']:
+                    companies[row['company']] += 1
+            suggestions.extend(('company', name, name, count, None) for name, count in companies.items())
+
+            cursor.execute("SELECT id, title, tags, views FROM portfolios")
+            tag_weights = Counter()
+            for row in cursor.fetchall():
+                suggestions.append(('portfolio', row['id'], row['title'], row['views'] or 0, row['id']))
+                for tag in parse_tags(row['tags']):
+                    tag_weights[tag] += (row['views'] or 0) + 1
+            suggestions.extend(('tag', tag, tag, weight, None) for tag, weight in tag_weights.items())
+
+            cursor.execute("SELECT id, name, followers FROM users")
+            for row in cursor.fetchall():
+                suggestions.append(('user', row['id'], row['name'], row['followers'] or 0, row['id']))
+            cursor.close()
+        finally:
+            connection.close()
+
+        self.index.load(suggestions)
+        self.index.warm()
+        with self._lock:
+            self._tag_weights = tag_weights
+        self.loaded_at = datetime.datetime.now()
+        self.ready = True
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self.load()
+            except Exception as e:
+                print(f"Error loading search suggestions: {e}")
+            time.sleep(SUGGEST_REFRESH_INTERVAL)
+
+    def ensure_started(self):
+        """Start the background loader on first use"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._refresh_loop, name='search-suggest', daemon=True).start()
+
+    # -- incremental updates from write endpoints --
+
+    def add_user(self, user_id, name, followers=0):
+        if self.ready:
+            self.index.add('user', user_id, name, followers, user_id)
+
+    def add_portfolio(self, portfolio_id, title, tags):
+        if not self.ready:
+            return
+        self.index.add('portfolio', portfolio_id, title, 0, portfolio_id)
+        for tag in tags:
+            with self._lock:
+                self._tag_weights[tag] += 1
+                weight = self._tag_weights[tag]
+            self.index.add('tag', tag, tag, weight)
+
+    def complete(self, prefix, limit):
+        suggestions, truncated = self.index.complete(prefix, limit, budget=SUGGEST_BUDGET_MS / 1000)
+        with self._lock:
+            self._requests += 1
+            self._truncated += truncated
+        return suggestions, truncated
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'ready': self.ready,
+                'loadedAt': self.loaded_at.isoformat() if self.loaded_at else None,
+                'requests': self._requests,
+                'truncated': self._truncated
+            }
+        stats.update(self.index.stats())
+        return stats
+
+def parse_tags(value):
+    """Portfolio tags column as a list of strings"""
+    if not value:
+        return []
+    try:
+        tags = json.loads(value) if isinstance(value, str) else value
+    except ValueError:
+        return []
+    return [str(tag) for tag in tags if tag] if isinstance(tags, list) else []
+
+suggestion_service = SuggestionService()
+
+# Pooled connections the search fan-out may hold at once. Every search also holds
+# its request's connection, so the fan-out gets a third of the pool and the rest
+# stays available to requests (and to the searches waiting on their fan-out).
+SEARCH_FANOUT_CONNECTIONS = max(1, min(SEARCH_FANOUT_WORKERS, (DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW) // 3))
+search_connection_slots = threading.BoundedSemaphore(SEARCH_FANOUT_CONNECTIONS)
+
+def search_category_pooled(category, query, mode, limit, offset, deadline):
+    """Run one category search on its own pooled connection; returns (rows, engine).
+    Gives up with a timeout if no fan-out connection frees up before the deadline."""
+    if not search_connection_slots.acquire(timeout=max(0, deadline - time.monotonic())):
+        raise FutureTimeoutError()
+    try:
+        connection = db_pool.connect()
+        try:
+            cursor = connection.cursor(dictionary=True)
+            rows, engine = search_category(cursor, category, query, mode, limit, offset)
+            cursor.close()
+            return rows, engine
+        finally:
+            connection.close()
+    finally:
+        search_connection_slots.release()
+
+def timed_call(fn, *args):
+    """Call fn and return (result, elapsed milliseconds)"""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+# Per-category search results keyed by entity version and normalized query
+search_cache = TTLCache(maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
+
+def normalize_search_query(query):
+    """Case, accent and whitespace differences don't change results under utf8mb4_unicode_ci"""
+    return ' '.join(fold_text(query).split())
+
+# Worker threads for running category searches in parallel
+search_executor = ThreadPoolExecutor(max_workers=SEARCH_FANOUT_WORKERS, thread_name_prefix='search')
+
+def search_fanout(categories, query, mode, limit, offset):
+    """Search several categories concurrently, each with SEARCH_CATEGORY_TIMEOUT seconds.
+    Returns {category: (rows, engine, elapsed_ms)} and {category: reason} for the ones that failed."""
+    deadline = time.monotonic() + SEARCH_CATEGORY_TIMEOUT
+    futures = {
+        name: search_executor.submit(timed_call, search_category_pooled, name, query, mode, limit, offset, deadline)
+        for name in categories
+    }
+    outcomes = {}
+    unavailable = {}
+    for name, future in futures.items():
+        try:
+            (rows, engine), elapsed = future.result(timeout=max(0, deadline - time.monotonic()))
+            outcomes[name] = (rows, engine, elapsed)
+        except FutureTimeoutError:
+            # The query keeps running and returns its connection when done; its result is dropped
+            unavailable[name] = 'timeout'
+        except Exception as e:
+            print(f"Error searching {name}: {e}")
+            unavailable[name] = 'error'
+    return outcomes, unavailable
+
 @app.route('/api/search', methods=['GET'])
 def search():
     """Global search across all content"""
     try:
         query = request.args.get('q', '').strip()
         category = request.args.get('category', 'all')  # all, courses, opportunities, portfolios, users
+        mode = request.args.get('mode', 'natural')  # natural, boolean (FULLTEXT modes)
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 20))
-        offset = (page - 1) * limit
         
         if not query:
             return jsonify({'success': False, 'message': 'Search query is required'}), 400
         
-        search_pattern = f'%{query}%'
-        results = {}
+        if mode not in SEARCH_MODES:
+            return jsonify({'success': False, 'message': 'Invalid search mode'}), 400
+        
+        # With category=all each category gets a quarter of the page
+        categories = [name for name in SEARCH_SOURCES if category in ['all', name]]
+        category_limit = limit if category != 'all' else max(1, limit // 4)
+        category_offset = (page - 1) * category_limit
+        
+        use_index = False
+        if SEARCH_BACKEND == 'memory':
+            search_index.ensure_started()
+            use_index = search_index.ready
+        
+        # Serve categories from the result cache where possible. Keys carry the category's
+        # entity version, so a new portfolio only invalidates portfolio results.
+        normalized_query = normalize_search_query(query)
+        source = 'memory' if use_index else mode
+        cache_keys = {
+            name: (name, get_entity_version(name), source, normalized_query, category_limit, category_offset)
+            for name in categories
+        }
+        cached = {}
+        for name in categories:
+            entry = search_cache.get(cache_keys[name])
+            if entry is not None:
+                cached[name] = entry
+        pending = [name for name in categories if name not in cached]
+        
+        # One extra row per category tells whether another page exists
+        outcomes = {}
+        unavailable = {}
+        if not pending:
+            pass
+        elif use_index:
+            for name in pending:
+                rows, elapsed = timed_call(search_index.search, name, query, category_limit + 1, category_offset)
+                outcomes[name] = (rows, 'memory', elapsed)
+        elif len(pending) > 1:
+            outcomes, unavailable = search_fanout(pending, query, mode, category_limit + 1, category_offset)
+            if not outcomes and not cached:
+                return jsonify({'success': False, 'message': 'Search is temporarily unavailable'}), 503
+        else:
+            cursor = g.db.cursor(dictionary=True)
+            for name in pending:
+                (rows, engine), elapsed = timed_call(
+                    search_category, cursor, name, query, mode, category_limit + 1, category_offset
+                )
+                outcomes[name] = (rows, engine, elapsed)
+            cursor.close()
         
-        cursor = g.db.cursor(dictionary=True)
+        # Only complete category results are cached
+        for name, (rows, engine, _) in outcomes.items():
+            search_cache.set(cache_keys[name], (rows, engine))
+        timings = [f"{name};dur={elapsed:.1f}" for name, (_, _, elapsed) in outcomes.items()]
+        timings += [f'{name};desc="cache"' for name in cached]
+        timings += [f'{name};desc="{reason}"' for name, reason in unavailable.items()]
+        for name, (rows, engine) in cached.items():
+            outcomes[name] = (rows, engine, 0.0)
         
-        # Search courses
-        if category in ['all', 'courses']:
-            cursor.execute("""
-            SELECT 'course' as type, id, title, description, category, level, price, image,
-                   created_at
-            FROM courses 
-            WHERE title LIKE %s OR description LIKE %s
-            ORDER BY created_at DESC
-            LIMIT %s OFFSET %s
-            """, (search_pattern, search_pattern, limit if category == 'courses' else limit//4, 
-                  offset if category == 'courses' else 0))
-            results['courses'] = cursor.fetchall()
-        
-        # Search opportunities
-        if category in ['all', 'opportunities']:
-            cursor.execute("""
-            SELECT 'opportunity' as type, id, title, description, type, company, deadline,
-                   created_at
-            FROM opportunities 
-            WHERE (title LIKE %s OR description LIKE %s OR company LIKE %s) 
-                  AND is_active = TRUE AND deadline > %s
-            ORDER BY deadline ASC
-            LIMIT %s OFFSET %s
-            """, (search_pattern, search_pattern, search_pattern, datetime.datetime.now(),
-                  limit if category == 'opportunities' else limit//4, 
-                  offset if category == 'opportunities' else 0))
-            results['opportunities'] = cursor.fetchall()
-        
-        # Search portfolios
-        if category in ['all', 'portfolios']:
-            cursor.execute("""
-            SELECT 'portfolio' as type, p.id, p.title, p.description, p.category, 
-                   p.thumbnail, p.views, p.created_at, u.name as user_name
-            FROM portfolios p
-            LEFT JOIN users u ON p.user_id = u.id
-            WHERE p.title LIKE %s OR p.description LIKE %s
-            ORDER BY p.created_at DESC
-            LIMIT %s OFFSET %s
-            """, (search_pattern, search_pattern, 
-                  limit if category == 'portfolios' else limit//4,
-                  offset if category == 'portfolios' else 0))
-            results['portfolios'] = cursor.fetchall()
-        
-        # Search users
-        if category in ['all', 'users']:
-            cursor.execute("""
-            SELECT 'user' as type, id, name, email, user_type, bio, location, avatar,
-                   followers, created_at
-            FROM users 
-            WHERE name LIKE %s OR bio LIKE %s OR location LIKE %s
-            ORDER BY followers DESC, created_at DESC
-            LIMIT %s OFFSET %s
-            """, (search_pattern, search_pattern, search_pattern,
-                  limit if category == 'users' else limit//4,
-                  offset if category == 'users' else 0))
-            results['users'] = cursor.fetchall()
-        
-        cursor.close()
+        results = {}
+        engines = {}
+        has_more = {}
+        for name, (rows, engine, elapsed) in outcomes.items():
+            results[name] = rows[:category_limit]
+            engines[name] = engine
+            has_more[name] = len(rows) > category_limit
+        for name in unavailable:
+            results[name] = []
         
         # Format results
         total_results = sum(len(category_results) for category_results in results.values())
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'query': query,
             'category': category,
+            'mode': mode,
+            'engine': engines,
             'results': results,
             'totalResults': total_results,
+            'partial': bool(unavailable),
+            'unavailable': unavailable,
             'pagination': {
                 'currentPage': page,
-                'hasNext': total_results == limit,
+                'hasNext': any(has_more.values()),
+                'hasMore': has_more,
                 'hasPrev': page > 1
             }
-        }), 200
+        })
+        # Per-category timings for debugging (shown by browser dev tools)
+        response.headers['Server-Timing'] = ', '.join(timings)
+        return response, 200
         
     except Error as e:
         return jsonify({'success': False, 'message': 'Database error occurred'}), 500
     except Exception as e:
         return jsonify({'success': False, 'message': 'Search failed'}), 500
 
+@app.route('/api/search/suggest', methods=['GET'])
+def search_suggest():
+    """Typeahead suggestions from the in-memory prefix index (never queries MySQL)"""
+    query = request.args.get('q', '').strip()
+    try:
+        limit = int(request.args.get('limit', 8))
+    except ValueError:
+        limit = 8
+    
+    suggestion_service.ensure_started()
+    
+    suggestions, truncated = [], False
+    if query and suggestion_service.ready:
+        suggestions, truncated = suggestion_service.complete(query, max(1, limit))
+    
+    return jsonify({
+        'success': True,
+        'query': query,
+        'suggestions': suggestions,
+        'ready': suggestion_service.ready,
+        'truncated': truncated
+    }), 200
+
 # ============ STATIC FILE SERVING ============
 
+# Content-addressed names never change what they point to
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+IMMUTABLE_STAT_TTL = 3600  # Such files only disappear through blob GC, which a failed open() notices
+
+# stat() results of served uploads keyed by file name
+media_stat_cache = TTLCache(maxsize=MEDIA_STAT_CACHE_SIZE, ttl=MEDIA_STAT_CACHE_TTL)
+
+def media_file_info(filename):
+    """Path, size, validators and type of a servable upload, or None"""
+    info = media_stat_cache.get(filename)
+    if info is not None:
+        return info
+    
+    # Hidden entries are the partial upload and blob folders
+    if filename.startswith('.'):
+        return None
+    path = safe_join(os.path.abspath(UPLOAD_FOLDER), filename)
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    
+    immutable = CONTENT_ADDRESSED_NAME.match(filename) is not None
+    info = {
+        'path': path,
+        'size': st.st_size,
+        'modified': datetime.datetime.fromtimestamp(int(st.st_mtime), tz=datetime.timezone.utc),
+        'etag': filename.split('.', 1)[0] if immutable else f'{st.st_mtime_ns:x}-{st.st_size:x}',
+        'mimetype': mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        'immutable': immutable
+    }
+    media_stat_cache.set(filename, info, ttl=IMMUTABLE_STAT_TTL if immutable else None)
+    return info
+
+def media_range(info):
+    """The (start, stop) byte span a Range request asks for, None for the whole
+    file, or False when the single requested range can't be satisfied"""
+    if request.range is None or request.range.units != 'bytes' or len(request.range.ranges) != 1:
+        # Multipart ranges are answered with the whole file
+        return None
+    
+    # If-Range: only send part of the file if it is still the version the client has
+    if_range = request.if_range
+    if if_range.etag is not None and if_range.etag != info['etag']:
+        return None
+    if if_range.date is not None and if_range.date != info['modified']:
+        return None
+    
+    span = request.range.range_for_length(info['size'])
+    return span if span is not None else False
+
+def iter_file_range(f, start, length):
+    """Yield length bytes of an open file from start, closing it afterwards"""
+    try:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(UPLOAD_COPY_BUFFER, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
 @app.route('/uploads/<filename>')
 def uploaded_file(filename):
-    """Serve uploaded files"""
-    return app.send_static_file(f'uploads/{filename}')
+    """Serve uploaded files with conditional and byte-range requests"""
+    info = media_file_info(filename)
+    if info is None:
+        return jsonify({'success': False, 'message': 'File not found'}), 404
+    
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(info['etag'])
+    elif request.if_modified_since:
+        not_modified = info['modified'] <= request.if_modified_since
+    else:
+        not_modified = False
+    
+    size = info['size']
+    if not_modified:
+        response = app.response_class(status=304)
+    elif MEDIA_SENDFILE_MODE in ('nginx', 'apache'):
+        # The proxy streams the file and answers Range itself
+        response = app.response_class(mimetype=info['mimetype'])
+        if MEDIA_SENDFILE_MODE == 'nginx':
+            response.headers['X-Accel-Redirect'] = f"{MEDIA_ACCEL_PREFIX.rstrip('/')}/{quote(filename)}"
+        else:
+            response.headers['X-Sendfile'] = info['path']
+    else:
+        span = media_range(info)
+        if span is False:
+            response = app.response_class(status=416)
+            response.headers['Content-Range'] = f'bytes */{size}'
+            response.headers['Accept-Ranges'] = 'bytes'
+            return response
+        start, stop = span or (0, size)
+        
+        if request.method == 'HEAD':
+            body = b''
+        else:
+            try:
+                f = open(info['path'], 'rb')
+            except OSError:
+                # Removed since it was stat()ed (blob GC or a deleted upload)
+                media_stat_cache.delete(filename)
+                return jsonify({'success': False, 'message': 'File not found'}), 404
+            file_wrapper = request.environ.get('wsgi.file_wrapper')
+            if file_wrapper is not None and stop == size:
+                # Servers such as gunicorn sendfile() the rest of the file from the current offset
+                f.seek(start)
+                body = file_wrapper(f, UPLOAD_COPY_BUFFER)
+            else:
+                body = iter_file_range(f, start, stop - start)
+        
+        response = app.response_class(body, status=206 if span else 200, mimetype=info['mimetype'],
+                                      direct_passthrough=True)
+        response.content_length = stop - start
+        if span:
+            response.headers['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+    
+    response.set_etag(info['etag'])
+    response.last_modified = info['modified']
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if info['immutable'] else f'public, max-age={MEDIA_MAX_AGE}'
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
 
 # ============ ERROR HANDLERS ============
 
@@ -1347,6 +4909,30 @@ def health_check():
             'message': 'Health check failed'
         }), 503
 
+@app.route('/api/health/stats', methods=['GET'])
+def health_stats():
+    """Runtime statistics for monitoring"""
+    return jsonify({
+        'success': True,
+        'stats': {
+            'dbPool': db_pool.stats(),
+            'dbCheckout': dict(request_db_stats),
+            'userCache': user_cache.stats(),
+            'tokenCache': token_cache.stats(),
+            'passwordHasher': password_hasher.stats(),
+            'countCache': count_cache.stats(),
+            'searchIndex': search_index.stats(),
+            'searchSuggest': suggestion_service.stats(),
+            'searchCache': search_cache.stats(),
+            'responseCache': response_cache.stats(),
+            'singleFlight': request_flights.stats(),
+            'jsonColumnCache': json_column_cache.stats(),
+            'mediaStatCache': media_stat_cache.stats(),
+            'imageVariants': variant_pipeline.stats()
+        },
+        'timestamp': datetime.datetime.now().isoformat()
+    }), 200
+
 # ============ MAIN ============
 
 if __name__ == '__main__':
@@ -1361,10 +4947,14 @@ if __name__ == '__main__':
     print(f"  Host: {DB_CONFIG['host']}:{DB_CONFIG['port']}")
     print(f"  Database: {DB_CONFIG['database']}")
     print(f"  User: {DB_CONFIG['user']}")
+    print(f"  Pool: {DB_POOL_SIZE} connections (+{DB_POOL_MAX_OVERFLOW} overflow), {SEARCH_FANOUT_CONNECTIONS} for search fan-out")
     print("Make sure to:")
     print("  1. Import database_schema.sql into phpMyAdmin")
     print("  2. Update .env file with your database credentials")
     print("  3. Ensure MySQL server is running")
     print()
     
+    if SEARCH_BACKEND == 'memory':
+        search_index.ensure_started()
+    
     app.run(debug=debug, host=host, port=port)
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""Shared fixtures for the unit tests.
+
+server is imported against an in-memory stand-in for the MySQL driver, so the
+suite runs without a database server. FakeDatabase only understands the
+statements of the code paths under test and fails loudly on anything else.
+"""
+
+import copy
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Configuration read at import time; load_dotenv() never overrides these
+os.environ.setdefault('UPLOAD_FOLDER', tempfile.mkdtemp(prefix='cinda-tests-'))
+os.environ.setdefault('MEDIA_VARIANT_WORKERS', '0')
+os.environ.setdefault('SEARCH_BACKEND', 'database')
+os.environ.setdefault('RESPONSE_CACHE_BACKEND', 'memory')
+
+import mysql.connector
+from mysql.connector import Error
+
+import server
+
+
+class FakeCursor:
+    def __init__(self, connection, dictionary=False):
+        self.connection = connection
+        self.dictionary = dictionary
+        self.rowcount = -1
+        self._rows = []
+
+    def execute(self, query, params=None):
+        self.connection.database.statements.append((' '.join(query.split()), params))
+        rows, self.rowcount = self.connection.database.execute(self.connection, query, params or ())
+        if not self.dictionary:
+            rows = [tuple(row.values()) for row in rows]
+        self._rows = list(rows)
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Stand-in for a mysql-connector connection"""
+
+    def __init__(self, database):
+        self.database = database
+        self.closed = False
+        self.alive = True
+
+    def cursor(self, dictionary=False, **kwargs):
+        return FakeCursor(self, dictionary)
+
+    def commit(self):
+        self.database.commit(self)
+
+    def rollback(self):
+        self.database.rollback(self)
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise Error(msg='MySQL server has gone away')
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDatabase:
+    """In-memory tables for the user, upload session and media storage statements.
+    Writes are applied at once and undone by rollback(); one open transaction
+    at a time is enough for these tests."""
+
+    def __init__(self):
+        self.tables = {'users': {}, 'upload_sessions': {}, 'media_blobs': {}, 'media_uploads': {}}
+        self.statements = []
+        self.connections = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.fail_on = None  # Statement prefix that raises, to test error paths
+        self._snapshot = None
+
+    def connect(self, **config):
+        connection = FakeConnection(self)
+        self.connections.append(connection)
+        return connection
+
+    def commit(self, connection):
+        self.commits += 1
+        self._snapshot = None
+
+    def rollback(self, connection):
+        self.rollbacks += 1
+        if self._snapshot is not None:
+            self.tables, self._snapshot = self._snapshot, None
+
+    def _write(self):
+        if self._snapshot is None:
+            self._snapshot = copy.deepcopy(self.tables)
+
+    def execute(self, connection, query, params):
+        """Returns (rows, rowcount)"""
+        sql = ' '.join(query.split())
+        if self.fail_on and sql.startswith(self.fail_on):
+            raise Error(msg=f'Injected failure: {sql}')
+        users = self.tables['users']
+        sessions = self.tables['upload_sessions']
+        blobs = self.tables['media_blobs']
+        uploads = self.tables['media_uploads']
+        now = time.time()
+
+        if sql.startswith('SET NAMES'):
+            return [], 0
+        if sql.startswith('SELECT') and 'FROM users WHERE id = %s' in sql:
+            user = users.get(params[0])
+            return ([dict(user)] if user else []), 1 if user else 0
+
+        if sql.startswith('INSERT INTO upload_sessions'):
+            self._write()
+            upload_id, user_id, filename, total_size, received_bytes, chunk_digests = params
+            sessions[upload_id] = {
+                'id': upload_id, 'user_id': user_id, 'filename': filename, 'total_size': total_size,
+                'received_bytes': received_bytes, 'chunk_digests': chunk_digests,
+                'lease_until': None, 'updated_at': now
+            }
+            return [], 1
+        if sql == 'SELECT * FROM upload_sessions WHERE id = %s AND user_id = %s':
+            upload = sessions.get(params[0])
+            if upload is None or upload['user_id'] != params[1]:
+                return [], 0
+            return [dict(upload)], 1
+        if sql.startswith('SELECT id FROM upload_sessions WHERE updated_at <'):
+            return [{'id': upload['id']} for upload in sessions.values() if upload['updated_at'] < now - params[0]], 0
+        if sql == 'SELECT id FROM upload_sessions WHERE id = %s':
+            return ([{'id': params[0]}] if params[0] in sessions else []), 0
+        if sql.startswith('UPDATE upload_sessions SET lease_until = NOW() + INTERVAL %s SECOND'):
+            self._write()
+            upload = sessions.get(params[1])
+            if upload is None or (upload['lease_until'] is not None and upload['lease_until'] >= now):
+                return [], 0
+            if 'received_bytes = total_size' in sql:
+                if upload['received_bytes'] != upload['total_size']:
+                    return [], 0
+            elif upload['received_bytes'] != params[2]:
+                return [], 0
+            upload['lease_until'] = now + params[0]
+            return [], 1
+        if sql == 'UPDATE upload_sessions SET lease_until = NULL WHERE id = %s':
+            self._write()
+            upload = sessions.get(params[0])
+            if upload is None:
+                return [], 0
+            upload['lease_until'] = None
+            return [], 1
+        if sql.startswith('UPDATE upload_sessions SET received_bytes = received_bytes + %s'):
+            self._write()
+            length, digest, upload_id = params
+            upload = sessions[upload_id]
+            upload['received_bytes'] += length
+            upload['chunk_digests'] += digest
+            upload['lease_until'] = None
+            upload['updated_at'] = now
+            return [], 1
+        if sql.startswith('DELETE FROM upload_sessions WHERE id = %s'):
+            self._write()
+            upload = sessions.get(params[0])
+            if upload is None or ('user_id' in sql and upload['user_id'] != params[1]):
+                return [], 0
+            del sessions[params[0]]
+            return [], 1
+
+        if sql.startswith('INSERT INTO media_blobs (hash, size, ref_count) VALUES (%s, %s, 1) ON DUPLICATE KEY UPDATE'):
+            self._write()
+            digest, size = params
+            if digest in blobs:
+                blobs[digest]['ref_count'] += 1
+                return [], 2
+            blobs[digest] = {'hash': digest, 'size': size, 'ref_count': 1, 'metadata': None}
+            return [], 1
+        if sql.startswith('INSERT INTO media_uploads'):
+            self._write()
+            upload_id, user_id, blob_hash, filename, public_name = params
+            uploads[upload_id] = {
+                'id': upload_id, 'user_id': user_id, 'blob_hash': blob_hash,
+                'filename': filename, 'public_name': public_name
+            }
+            return [], 1
+
+        raise AssertionError(f'Unexpected statement: {sql}')
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """A fresh FakeDatabase behind the driver and a fresh connection pool"""
+    database = FakeDatabase()
+    monkeypatch.setattr(mysql.connector, 'connect', database.connect)
+    monkeypatch.setattr(server, 'db_pool', server.ConnectionPool({}, size=2, max_overflow=2, timeout=1))
+    server.user_cache.clear()
+    yield database
+    server.db_pool.dispose()
+
+
+@pytest.fixture
+def media_folders(monkeypatch, tmp_path):
+    """Point the upload, partial upload and blob folders at a temp directory"""
+    folders = {
+        'UPLOAD_FOLDER': tmp_path / 'uploads',
+        'UPLOAD_TMP_FOLDER': tmp_path / 'uploads' / '.partial',
+        'MEDIA_BLOB_FOLDER': tmp_path / 'uploads' / '.blobs'
+    }
+    for name, path in folders.items():
+        path.mkdir(parents=True, exist_ok=True)
+        monkeypatch.setattr(server, name, str(path))
+    return folders
+
+
+@pytest.fixture
+def client():
+    return server.app.test_client()
+
+
+@pytest.fixture
+def user(database):
+    """A student account and the headers that authenticate as it"""
+    row = {'id': 1, 'email': 'student@example.com', 'user_type': 'student', 'first_name': 'Test'}
+    database.tables['users'][row['id']] = row
+    token = server.generate_token(row['id'], row['user_type'], row['email'])
+    return {'row': row, 'headers': {'Authorization': f'Bearer {token}'}}
@@ -0,0 +1,146 @@
+import json
+
+import pytest
+
+import server
+
+AUTHENTICATED = {'Authorization': 'Bearer token'}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    response_cache = server.ResponseCache(server.MemoryCacheBackend(100), grace=30)
+    monkeypatch.setattr(server, 'response_cache', response_cache)
+    monkeypatch.setattr(server, 'request_flights', server.SingleFlight(1))
+    monkeypatch.setattr(server, 'RESPONSE_CACHE_ENABLED', True)
+    monkeypatch.setattr(server, 'SINGLE_FLIGHT_ENABLED', True)
+    monkeypatch.setitem(server.RESPONSE_CACHE_TTLS, 'item', 60)
+    return response_cache
+
+
+@pytest.fixture
+def item_view():
+    """A cached 'item' route whose overlay marks the item for authenticated requests"""
+    calls = []
+
+    def overlay(body, item_id):
+        if body['item'].get('fail'):
+            raise server.Error(msg='overlay query failed')
+        body['item']['mine'] = True
+
+    @server.cached_response('item', tags=('item:{item_id}',), overlay=overlay)
+    def view(item_id):
+        calls.append(item_id)
+        if server.request.args.get('status') == 'missing':
+            return server.jsonify({'success': False, 'message': 'Item not found'}), 404
+        if server.request.args.get('stream') == 'true':
+            return server.app.response_class((chunk for chunk in ['{"success": true, ', '"item": {}}']),
+                                             mimetype='application/json')
+        return server.jsonify({'success': True, 'item': {'id': item_id, 'fail': server.request.args.get('fail') == '1'}}), 200
+
+    def call(path='/api/items/1', headers=None, item_id=1):
+        with server.app.test_request_context(path, headers=headers or {}):
+            response = server.app.make_response(view(item_id=item_id))
+            body = response.get_data()
+            return response, (json.loads(body) if body else None)
+
+    call.calls = calls
+    return call
+
+
+def test_miss_then_hit(cache, item_view):
+    first, first_body = item_view()
+    second, second_body = item_view()
+
+    assert first.headers['X-Cache'] == 'MISS'
+    assert second.headers['X-Cache'] == 'HIT'
+    assert first_body == second_body == {'success': True, 'item': {'id': 1, 'fail': False}}
+    assert item_view.calls == [1]
+
+
+def test_overlay_is_added_on_miss_and_hit_but_never_cached(cache, item_view):
+    miss, miss_body = item_view(headers=AUTHENTICATED)
+    hit, hit_body = item_view(headers=AUTHENTICATED)
+    anonymous, anonymous_body = item_view()
+
+    assert (miss.headers['X-Cache'], hit.headers['X-Cache'], anonymous.headers['X-Cache']) == ('MISS', 'HIT', 'HIT')
+    assert miss_body['item']['mine'] is True
+    assert hit_body['item']['mine'] is True
+    assert 'mine' not in anonymous_body['item']
+    assert item_view.calls == [1]
+
+
+def test_overlay_error_is_a_500(cache, item_view):
+    response, body = item_view('/api/items/1?fail=1', headers=AUTHENTICATED)
+    assert response.status_code == 500
+    assert body['success'] is False
+
+
+def test_invalidated_tag_is_a_miss(cache, item_view):
+    item_view()
+    cache.invalidate('item:1')
+    response, _ = item_view()
+    other, _ = item_view(item_id=2)
+
+    assert response.headers['X-Cache'] == 'MISS'
+    assert other.headers['X-Cache'] == 'MISS'
+    assert item_view.calls == [1, 1, 2]
+
+
+def test_errors_are_not_cached_or_overlaid(cache, item_view):
+    first, first_body = item_view('/api/items/1?status=missing', headers=AUTHENTICATED)
+    second, _ = item_view('/api/items/1?status=missing')
+
+    assert first.status_code == second.status_code == 404
+    assert first_body == {'success': False, 'message': 'Item not found'}
+    assert second.headers['X-Cache'] == 'MISS'
+    assert item_view.calls == [1, 1]
+
+
+def test_cache_backend_failure_bypasses_with_overlay(cache, item_view, monkeypatch):
+    def unreachable(tags):
+        raise ConnectionError('cache backend is down')
+
+    monkeypatch.setattr(cache.backend, 'tag_versions', unreachable)
+    first, first_body = item_view(headers=AUTHENTICATED)
+    second, _ = item_view(headers=AUTHENTICATED)
+
+    assert first.headers['X-Cache'] == second.headers['X-Cache'] == 'BYPASS'
+    assert first_body['item']['mine'] is True
+    assert item_view.calls == [1, 1]
+    assert cache.stats()['errors'] == 2
+
+
+def test_disabled_cache_still_applies_overlay(cache, item_view, monkeypatch):
+    monkeypatch.setattr(server, 'RESPONSE_CACHE_ENABLED', False)
+    monkeypatch.setattr(server, 'SINGLE_FLIGHT_ENABLED', False)
+    authenticated, authenticated_body = item_view(headers=AUTHENTICATED)
+    anonymous, anonymous_body = item_view()
+
+    assert 'X-Cache' not in authenticated.headers
+    assert authenticated_body['item']['mine'] is True
+    assert 'mine' not in anonymous_body['item']
+    assert item_view.calls == [1, 1]
+
+
+def test_disabled_cache_overlay_error_is_a_500(cache, item_view, monkeypatch):
+    monkeypatch.setattr(server, 'RESPONSE_CACHE_ENABLED', False)
+    monkeypatch.setattr(server, 'SINGLE_FLIGHT_ENABLED', False)
+    response, _ = item_view('/api/items/1?fail=1', headers=AUTHENTICATED)
+    assert response.status_code == 500
+
+
+def test_large_pages_bypass_the_cache_with_overlay(cache, item_view):
+    response, body = item_view(f'/api/items/1?limit={server.STREAM_MIN_LIMIT}', headers=AUTHENTICATED)
+
+    assert 'X-Cache' not in response.headers
+    assert body['item']['mine'] is True
+    assert cache.stats()['misses'] == 0
+
+
+def test_streamed_response_is_passed_through(cache, item_view):
+    response, body = item_view('/api/items/1?stream=true', headers=AUTHENTICATED)
+
+    assert 'X-Cache' not in response.headers
+    assert body == {'success': True, 'item': {}}
+    assert cache.stats()['misses'] == 0
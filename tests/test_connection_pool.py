@@ -0,0 +1,161 @@
+import threading
+import time
+
+import pytest
+
+import server
+from conftest import FakeDatabase
+
+
+@pytest.fixture
+def pool_database(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(server.mysql.connector, 'connect', database.connect)
+    return database
+
+
+def make_pool(**options):
+    options.setdefault('init_statements', ['SET NAMES utf8mb4'])
+    return server.ConnectionPool({}, **options)
+
+
+def physical(connection):
+    return connection._connection
+
+
+def test_released_connection_is_reused(pool_database):
+    pool = make_pool(size=2, max_overflow=0)
+    first = pool.connect()
+    raw = physical(first)
+    first.close()
+
+    second = pool.connect()
+    assert physical(second) is raw
+    assert len(pool_database.connections) == 1
+    # Init statements run once per physical connection, not per checkout
+    assert pool_database.statements.count(('SET NAMES utf8mb4', None)) == 1
+    second.close()
+
+    stats = pool.stats()
+    assert stats['checkouts'] == 2
+    assert stats['connectionsCreated'] == 1
+    assert stats['open'] == 1 and stats['idle'] == 1 and stats['inUse'] == 0
+
+
+def test_close_is_idempotent(pool_database):
+    pool = make_pool(size=1, max_overflow=0)
+    connection = pool.connect()
+    connection.close()
+    connection.close()
+    assert pool.stats()['inUse'] == 0
+    assert pool.stats()['idle'] == 1
+
+
+def test_overflow_connections_are_closed_on_release(pool_database):
+    pool = make_pool(size=1, max_overflow=1)
+    first, second = pool.connect(), pool.connect()
+    assert pool.stats()['overflow'] == 1
+    first.close()
+    second.close()
+
+    stats = pool.stats()
+    assert stats['open'] == 1 and stats['idle'] == 1
+    assert sum(connection.closed for connection in pool_database.connections) == 1
+
+
+def test_checkout_times_out_when_exhausted(pool_database):
+    pool = make_pool(size=1, max_overflow=0, timeout=0.05)
+    held = pool.connect()
+    with pytest.raises(server.PoolTimeoutError):
+        pool.connect()
+    assert pool.stats()['timeouts'] == 1
+    held.close()
+
+
+def test_waiter_gets_released_connection(pool_database):
+    pool = make_pool(size=1, max_overflow=0, timeout=2)
+    held = pool.connect()
+    raw = physical(held)
+    result = {}
+
+    def wait_for_connection():
+        connection = pool.connect()
+        result['raw'] = physical(connection)
+        connection.close()
+
+    waiter = threading.Thread(target=wait_for_connection)
+    waiter.start()
+    time.sleep(0.05)
+    held.close()
+    waiter.join(2)
+
+    assert result['raw'] is raw
+    assert pool.stats()['waits'] == 1
+
+
+def test_connection_past_recycle_age_is_replaced(pool_database):
+    pool = make_pool(size=1, max_overflow=0, recycle=0.01)
+    first = pool.connect()
+    raw = physical(first)
+    first.close()
+    time.sleep(0.02)
+
+    second = pool.connect()
+    assert physical(second) is not raw
+    assert raw.closed
+    assert pool.stats()['connectionsRecycled'] == 1
+    assert pool.stats()['open'] == 1
+    second.close()
+
+
+def test_dead_connection_fails_pre_ping_and_is_replaced(pool_database):
+    pool = make_pool(size=1, max_overflow=0, pre_ping=True)
+    first = pool.connect()
+    raw = physical(first)
+    first.close()
+    raw.alive = False
+
+    second = pool.connect()
+    assert physical(second) is not raw
+    assert raw.closed
+    assert pool.stats()['connectionsInvalidated'] == 1
+    second.close()
+
+
+def test_failed_init_statement_frees_the_slot(pool_database):
+    pool = make_pool(size=1, max_overflow=0, timeout=0.05)
+    pool_database.fail_on = 'SET NAMES'
+    with pytest.raises(server.Error):
+        pool.connect()
+    assert pool_database.connections[0].closed
+    assert pool.stats()['open'] == 0 and pool.stats()['inUse'] == 0
+
+    pool_database.fail_on = None
+    connection = pool.connect()
+    connection.close()
+
+
+def test_release_rolls_back_open_transaction(pool_database):
+    pool = make_pool(size=1, max_overflow=0)
+    connection = pool.connect()
+    cursor = connection.cursor()
+    cursor.execute("INSERT INTO media_uploads (id, user_id, blob_hash, filename, public_name) "
+                   "VALUES (%s, %s, %s, %s, %s)", ('u1', 1, 'h', 'a.png', 'h.png'))
+    connection.close()
+    assert pool_database.tables['media_uploads'] == {}
+
+
+def test_lazy_connection_checks_out_on_first_use(pool_database):
+    pool = make_pool(size=1, max_overflow=0)
+    lazy = server.LazyConnection(pool)
+    lazy.commit()
+    lazy.close()
+    assert not lazy.checked_out
+    assert pool.stats()['checkouts'] == 0
+
+    lazy.cursor().execute('SET NAMES utf8mb4')
+    assert lazy.checked_out
+    assert pool.stats()['inUse'] == 1
+    lazy.close()
+    assert not lazy.checked_out
+    assert pool.stats()['inUse'] == 0
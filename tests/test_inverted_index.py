@@ -0,0 +1,147 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+import server
+
+VOCABULARY = [f'word{i}' for i in range(60)]
+
+
+def document_text(row):
+    return f"{row['title']} {row['description']}"
+
+
+def make_row(row_id, rng):
+    # Skewed term choice gives frequent and rare terms and repeated terms per document
+    words = [VOCABULARY[min(int(rng.expovariate(0.08)), len(VOCABULARY) - 1)] for _ in range(rng.randint(3, 40))]
+    return {'id': row_id, 'title': ' '.join(words[:3]), 'description': ' '.join(words[3:]), 'active': row_id % 3 != 0}
+
+
+def brute_force(index, rows, query, predicate=None):
+    """Score every live document with BM25, using the average length the index's norms were built with"""
+    tokenized = {row_id: server.tokenize(document_text(row)) for row_id, row in rows.items()}
+    frequencies = Counter(term for terms in tokenized.values() for term in set(terms))
+    total = len(rows)
+    scores = []
+    for row_id, terms in tokenized.items():
+        if predicate is not None and not predicate(rows[row_id]):
+            continue
+        counts = Counter(terms)
+        norm = index.k1 * (1 - index.b + index.b * len(terms) / index._norm_average)
+        score = 0.0
+        matched = False
+        for term in set(server.tokenize(query)):
+            if not counts[term]:
+                continue
+            matched = True
+            idf = math.log(1 + (total - frequencies[term] + 0.5) / (frequencies[term] + 0.5))
+            score += idf * (index.k1 + 1) * counts[term] / (counts[term] + norm)
+        if matched:
+            scores.append((score, row_id))
+    scores.sort(reverse=True)
+    return scores
+
+
+def assert_same_ranking(index, rows, query, limit=10, offset=0, predicate=None):
+    expected = brute_force(index, rows, query, predicate)[offset:offset + limit]
+    results = index.search(query, limit, offset, predicate)
+    assert [score for score, _ in results] == pytest.approx([score for score, _ in expected], rel=1e-9)
+    # Ties may come back in either order, so only distinct scores pin the row
+    for (score, row), (expected_score, row_id) in zip(results, expected):
+        assert row['id'] == row_id or score == pytest.approx(expected_score, rel=1e-9)
+        assert rows[row['id']] is row
+
+
+@pytest.fixture
+def corpus():
+    rng = random.Random(1234)
+    index = server.InvertedIndex(document_text)
+    rows = {}
+    for row_id in range(1, 1501):
+        rows[row_id] = make_row(row_id, rng)
+        index.add(row_id, rows[row_id])
+    return index, rows, rng
+
+
+QUERIES = ['word0', 'word3', 'word1 word7', 'word2 word5 word11', 'word40', 'word59 word0', 'unknownterm']
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_matches_brute_force(corpus, query):
+    index, rows, _ = corpus
+    assert_same_ranking(index, rows, query)
+
+
+def test_matches_brute_force_with_offset_and_predicate(corpus):
+    index, rows, _ = corpus
+    active = lambda row: row['active']
+    assert_same_ranking(index, rows, 'word1 word4', limit=20, offset=15)
+    assert_same_ranking(index, rows, 'word1 word4', limit=10, offset=5, predicate=active)
+
+
+def test_matches_brute_force_after_updates_and_deletes(corpus):
+    index, rows, rng = corpus
+    for row_id in rng.sample(sorted(rows), 600):
+        rows[row_id] = make_row(row_id, rng)
+        index.add(row_id, rows[row_id])
+    for row_id in rng.sample(sorted(rows), 300):
+        del rows[row_id]
+        index.remove(row_id)
+    for row_id in range(2001, 2101):
+        rows[row_id] = make_row(row_id, rng)
+        index.add(row_id, rows[row_id])
+
+    assert len(index) == len(rows)
+    assert index.stats()['tombstones'] == 900
+    for query in QUERIES:
+        assert_same_ranking(index, rows, query)
+        assert_same_ranking(index, rows, query, limit=5, offset=7)
+
+
+def test_compaction_keeps_ranking(corpus):
+    index, rows, rng = corpus
+    for row_id in rng.sample(sorted(rows), 500):
+        del rows[row_id]
+        index.remove(row_id)
+    index.compact()
+
+    assert index.stats()['tombstones'] == 0
+    for query in QUERIES:
+        assert_same_ranking(index, rows, query)
+
+
+def test_removed_documents_do_not_count_towards_document_frequency():
+    index = server.InvertedIndex(document_text)
+    index.add(1, {'id': 1, 'title': 'camera', 'description': 'lens'})
+    index.add(2, {'id': 2, 'title': 'camera', 'description': 'tripod'})
+    index.remove(1)
+
+    assert index.search('lens', 10) == []
+    [(score, row)] = index.search('camera', 10)
+    assert row['id'] == 2
+    # A term in every live document still gets a positive idf
+    assert score > 0
+
+
+def test_norms_follow_the_average_length(corpus):
+    index, rows, rng = corpus
+    for row_id in range(3001, 3301):
+        rows[row_id] = {'id': row_id, 'title': 'word0', 'description': ' '.join(['word1'] * 150)}
+        index.add(row_id, rows[row_id])
+
+    average = index._total_length / len(index)
+    assert abs(average - index._norm_average) <= index.NORM_DRIFT * index._norm_average
+    assert_same_ranking(index, rows, 'word0 word1')
+
+
+def test_replaced_document_is_searchable_by_new_text_only():
+    index = server.InvertedIndex(document_text)
+    index.add(1, {'id': 1, 'title': 'documentary', 'description': 'workshop'})
+    index.add(1, {'id': 1, 'title': 'animation', 'description': 'workshop'})
+
+    assert len(index) == 1
+    assert index.search('documentary', 10) == []
+    assert [row['title'] for _, row in index.search('animation', 10)] == ['animation']
+    assert index.get(1)['title'] == 'animation'
@@ -0,0 +1,121 @@
+import io
+import os
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def connection(database, media_folders):
+    return database.connect()
+
+
+def write_temp(media_folders, content, name='incoming.upload'):
+    """A fully written temp file and its content address, as upload_file produces them"""
+    path = str(media_folders['UPLOAD_TMP_FOLDER'] / name)
+    digest, size = server.save_stream(io.BytesIO(content), path)
+    return path, digest, size
+
+
+def fail_commit(database, monkeypatch):
+    def commit(connection):
+        raise server.Error(msg='Lost connection during commit')
+    monkeypatch.setattr(database, 'commit', commit)
+
+
+def test_new_content_is_stored_once_and_linked(connection, database, media_folders):
+    temp_path, digest, size = write_temp(media_folders, b'frame data')
+    upload_id, public_name, deduplicated = server.store_upload(connection, temp_path, digest, size, 1, 'Trailer.PNG')
+
+    assert public_name == f'{digest}.png'
+    assert deduplicated is False
+    assert not os.path.exists(temp_path)
+    public_path = media_folders['UPLOAD_FOLDER'] / public_name
+    assert os.path.samefile(public_path, server.blob_path(digest))
+    assert public_path.read_bytes() == b'frame data'
+
+    assert database.tables['media_blobs'][digest] == {'hash': digest, 'size': size, 'ref_count': 1, 'metadata': None}
+    assert database.tables['media_uploads'][upload_id] == {
+        'id': upload_id, 'user_id': 1, 'blob_hash': digest, 'filename': 'Trailer.PNG', 'public_name': public_name
+    }
+
+
+def test_duplicate_content_shares_the_blob_and_counts_references(connection, database, media_folders):
+    first_path, digest, size = write_temp(media_folders, b'same bytes', 'first.upload')
+    first = server.store_upload(connection, first_path, digest, size, 1, 'a.png')
+    second_path, _, _ = write_temp(media_folders, b'same bytes', 'second.upload')
+    second = server.store_upload(connection, second_path, digest, size, 2, 'b.png')
+    third_path, _, _ = write_temp(media_folders, b'same bytes', 'third.upload')
+    third = server.store_upload(connection, third_path, digest, size, 2, 'c.jpg')
+
+    assert [result[2] for result in (first, second, third)] == [False, True, True]
+    assert first[1] == second[1] == f'{digest}.png'
+    assert third[1] == f'{digest}.jpg'
+    assert len({first[0], second[0], third[0]}) == 3
+    assert database.tables['media_blobs'][digest]['ref_count'] == 3
+    assert sorted(row['user_id'] for row in database.tables['media_uploads'].values()) == [1, 2, 2]
+
+    # One blob on disk, every public name a link to it, no temp files left over
+    for name in (first[1], third[1]):
+        assert os.path.samefile(media_folders['UPLOAD_FOLDER'] / name, server.blob_path(digest))
+    assert os.listdir(media_folders['UPLOAD_TMP_FOLDER']) == []
+
+
+def test_failed_commit_removes_files_and_rows(connection, database, media_folders, monkeypatch):
+    temp_path, digest, size = write_temp(media_folders, b'never stored')
+    fail_commit(database, monkeypatch)
+
+    with pytest.raises(server.Error):
+        server.store_upload(connection, temp_path, digest, size, 1, 'clip.png')
+
+    assert database.tables['media_blobs'] == {} and database.tables['media_uploads'] == {}
+    assert not os.path.exists(server.blob_path(digest))
+    assert not os.path.exists(media_folders['UPLOAD_FOLDER'] / f'{digest}.png')
+    assert not os.path.exists(temp_path)
+
+
+def test_failed_commit_puts_a_kept_source_back(connection, database, media_folders, monkeypatch):
+    temp_path, digest, size = write_temp(media_folders, b'retry me')
+    fail_commit(database, monkeypatch)
+
+    with pytest.raises(server.Error):
+        server.store_upload(connection, temp_path, digest, size, 1, 'clip.png', keep_source=True)
+
+    with open(temp_path, 'rb') as source:
+        assert source.read() == b'retry me'
+    assert not os.path.exists(server.blob_path(digest))
+    assert not os.path.exists(media_folders['UPLOAD_FOLDER'] / f'{digest}.png')
+
+
+def test_failed_duplicate_leaves_the_existing_blob_alone(connection, database, media_folders):
+    temp_path, digest, size = write_temp(media_folders, b'shared', 'first.upload')
+    _, public_name, _ = server.store_upload(connection, temp_path, digest, size, 1, 'a.png')
+
+    temp_path, _, _ = write_temp(media_folders, b'shared', 'second.upload')
+    database.fail_on = 'INSERT INTO media_uploads'
+    with pytest.raises(server.Error):
+        server.store_upload(connection, temp_path, digest, size, 2, 'b.png')
+
+    assert database.tables['media_blobs'][digest]['ref_count'] == 1
+    assert len(database.tables['media_uploads']) == 1
+    assert os.path.samefile(media_folders['UPLOAD_FOLDER'] / public_name, server.blob_path(digest))
+    assert not os.path.exists(temp_path)
+
+
+def test_extra_statements_commit_in_the_same_transaction(connection, database, media_folders):
+    database.tables['upload_sessions']['u1'] = {'id': 'u1', 'user_id': 1}
+    temp_path, digest, size = write_temp(media_folders, b'statement data')
+    database.fail_on = 'DELETE FROM upload_sessions'
+
+    with pytest.raises(server.Error):
+        server.store_upload(connection, temp_path, digest, size, 1, 'a.png', keep_source=True,
+                            statements=[("DELETE FROM upload_sessions WHERE id = %s", ('u1',))])
+    assert database.tables['media_blobs'] == {} and database.tables['media_uploads'] == {}
+    assert os.path.exists(temp_path)
+
+    database.fail_on = None
+    server.store_upload(connection, temp_path, digest, size, 1, 'a.png', keep_source=True,
+                        statements=[("DELETE FROM upload_sessions WHERE id = %s", ('u1',))])
+    assert database.tables['upload_sessions'] == {}
+    assert database.tables['media_blobs'][digest]['ref_count'] == 1
@@ -0,0 +1,182 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+import server
+
+CHUNK_SIZE = 8
+CONTENT = b'resumable upload of twenty-nine'[:29]
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch, database, media_folders):
+    monkeypatch.setattr(server, 'UPLOAD_CHUNK_SIZE', CHUNK_SIZE)
+
+
+def start(client, user, size=len(CONTENT), filename='still.png'):
+    response = client.post('/api/uploads', json={'filename': filename, 'size': size}, headers=user['headers'])
+    assert response.status_code == 201
+    return response.get_json()['upload']
+
+
+def put_chunk(client, user, upload_id, offset, data, checksum=None):
+    headers = dict(user['headers'], **{'X-Chunk-SHA256': checksum or hashlib.sha256(data).hexdigest()})
+    return client.put(f'/api/uploads/{upload_id}?offset={offset}', data=data, headers=headers)
+
+
+def send_all(client, user, upload_id, content=CONTENT, start_at=0):
+    for offset in range(start_at, len(content), CHUNK_SIZE):
+        response = put_chunk(client, user, upload_id, offset, content[offset:offset + CHUNK_SIZE])
+        assert response.status_code == 200
+
+
+def complete(client, user, upload_id):
+    return client.post(f'/api/uploads/{upload_id}/complete', headers=user['headers'])
+
+
+def test_chunks_resume_and_complete(client, user, database, media_folders):
+    upload = start(client, user)
+    assert upload['offset'] == 0 and upload['chunkSize'] == CHUNK_SIZE
+    upload_id = upload['uploadId']
+
+    response = put_chunk(client, user, upload_id, 0, CONTENT[:CHUNK_SIZE])
+    assert response.get_json()['upload']['offset'] == CHUNK_SIZE
+
+    # A client that lost track resumes from the stored offset
+    resumed = client.get(f'/api/uploads/{upload_id}', headers=user['headers']).get_json()['upload']
+    assert resumed['offset'] == CHUNK_SIZE and not resumed['complete']
+    send_all(client, user, upload_id, start_at=resumed['offset'])
+
+    response = complete(client, user, upload_id)
+    body = response.get_json()
+    assert response.status_code == 200, body
+
+    # Same content address as a direct upload of the file
+    digest, size = server.save_stream(io.BytesIO(CONTENT), str(media_folders['UPLOAD_TMP_FOLDER'] / 'direct'))
+    assert body['filename'] == f'{digest}.png'
+    assert body['deduplicated'] is False
+    with open(media_folders['UPLOAD_FOLDER'] / body['filename'], 'rb') as stored:
+        assert stored.read() == CONTENT
+
+    assert upload_id not in database.tables['upload_sessions']
+    assert not os.path.exists(server.upload_part_path(upload_id))
+    assert database.tables['media_blobs'][digest]['ref_count'] == 1
+    assert database.tables['media_uploads'][body['uploadId']]['public_name'] == body['filename']
+
+
+def test_out_of_order_chunk_is_rejected_with_offset(client, user):
+    upload_id = start(client, user)['uploadId']
+    put_chunk(client, user, upload_id, 0, CONTENT[:CHUNK_SIZE])
+
+    response = put_chunk(client, user, upload_id, 2 * CHUNK_SIZE, CONTENT[2 * CHUNK_SIZE:3 * CHUNK_SIZE])
+    assert response.status_code == 409
+    assert response.get_json()['upload']['offset'] == CHUNK_SIZE
+
+    response = put_chunk(client, user, upload_id, 0, CONTENT[:CHUNK_SIZE])
+    assert response.status_code == 409
+
+
+def test_bad_chunks_leave_the_offset_unchanged(client, user, database):
+    upload_id = start(client, user)['uploadId']
+    put_chunk(client, user, upload_id, 0, CONTENT[:CHUNK_SIZE])
+    chunk = CONTENT[CHUNK_SIZE:2 * CHUNK_SIZE]
+
+    response = put_chunk(client, user, upload_id, CHUNK_SIZE, chunk, checksum='0' * 64)
+    assert response.status_code == 422
+    response = put_chunk(client, user, upload_id, CHUNK_SIZE, chunk[:-1])
+    assert response.status_code == 400
+
+    assert os.path.getsize(server.upload_part_path(upload_id)) == CHUNK_SIZE
+    session = database.tables['upload_sessions'][upload_id]
+    assert session['received_bytes'] == CHUNK_SIZE and session['lease_until'] is None
+    assert put_chunk(client, user, upload_id, CHUNK_SIZE, chunk).status_code == 200
+
+
+def test_chunk_is_refused_while_another_is_written(client, user, database):
+    upload_id = start(client, user)['uploadId']
+    database.tables['upload_sessions'][upload_id]['lease_until'] = float('inf')
+
+    response = put_chunk(client, user, upload_id, 0, CONTENT[:CHUNK_SIZE])
+    assert response.status_code == 409
+    assert database.tables['upload_sessions'][upload_id]['received_bytes'] == 0
+
+
+def test_incomplete_upload_cannot_be_completed(client, user, database):
+    upload_id = start(client, user)['uploadId']
+    put_chunk(client, user, upload_id, 0, CONTENT[:CHUNK_SIZE])
+
+    response = complete(client, user, upload_id)
+    assert response.status_code == 409
+    assert response.get_json()['upload']['offset'] == CHUNK_SIZE
+    assert upload_id in database.tables['upload_sessions']
+
+
+def test_failed_complete_keeps_the_upload_for_a_retry(client, user, database, media_folders):
+    upload_id = start(client, user)['uploadId']
+    send_all(client, user, upload_id)
+
+    database.fail_on = 'INSERT INTO media_uploads'
+    response = complete(client, user, upload_id)
+    assert response.status_code == 500
+
+    session = database.tables['upload_sessions'][upload_id]
+    assert session['lease_until'] is None
+    assert database.tables['media_blobs'] == {}
+    with open(server.upload_part_path(upload_id), 'rb') as part:
+        assert part.read() == CONTENT
+    assert sorted(os.listdir(media_folders['UPLOAD_FOLDER'])) == ['.blobs', '.partial']
+
+    database.fail_on = None
+    response = complete(client, user, upload_id)
+    assert response.status_code == 200
+    assert upload_id not in database.tables['upload_sessions']
+
+
+def test_concurrent_complete_backs_off(client, user, database):
+    upload_id = start(client, user)['uploadId']
+    send_all(client, user, upload_id)
+    database.tables['upload_sessions'][upload_id]['lease_until'] = float('inf')
+
+    response = complete(client, user, upload_id)
+    assert response.status_code == 409
+    assert upload_id in database.tables['upload_sessions']
+    assert os.path.exists(server.upload_part_path(upload_id))
+
+
+def test_identical_uploads_share_one_blob(client, user, database, media_folders):
+    results = []
+    for _ in range(2):
+        upload_id = start(client, user)['uploadId']
+        send_all(client, user, upload_id)
+        results.append(complete(client, user, upload_id).get_json())
+
+    assert [result['deduplicated'] for result in results] == [False, True]
+    assert results[0]['filename'] == results[1]['filename']
+    digest = results[0]['filename'].split('.')[0]
+    assert database.tables['media_blobs'][digest]['ref_count'] == 2
+    assert len(database.tables['media_uploads']) == 2
+    assert os.listdir(media_folders['UPLOAD_TMP_FOLDER']) == []
+
+
+def test_uploads_are_private_to_their_owner(client, user, database):
+    upload_id = start(client, user)['uploadId']
+    database.tables['users'][2] = {'id': 2, 'email': 'other@example.com', 'user_type': 'student'}
+    token = server.generate_token(2, 'student', 'other@example.com')
+    other = {'headers': {'Authorization': f'Bearer {token}'}}
+
+    assert client.get(f'/api/uploads/{upload_id}', headers=other['headers']).status_code == 404
+    assert put_chunk(client, other, upload_id, 0, CONTENT[:CHUNK_SIZE]).status_code == 404
+    assert complete(client, other, upload_id).status_code == 404
+
+
+def test_abort_removes_session_and_part(client, user, database):
+    upload_id = start(client, user)['uploadId']
+    put_chunk(client, user, upload_id, 0, CONTENT[:CHUNK_SIZE])
+
+    response = client.delete(f'/api/uploads/{upload_id}', headers=user['headers'])
+    assert response.status_code == 200
+    assert upload_id not in database.tables['upload_sessions']
+    assert not os.path.exists(server.upload_part_path(upload_id))
+    assert client.get(f'/api/uploads/{upload_id}', headers=user['headers']).status_code == 404